@@ -0,0 +1,159 @@
+"""
+crew 全体のオフラインベンチマーク（LLM の記録を再生、または決定的なスタブモデル）。
+
+LLM を呼ばずに Roots().crew().kickoff を繰り返し実行し、実行時間・ツール時間・
+LLM（再生）時間を測る。crew.py やツールの変更による実行時間の差を再現性のある形で比べられる。
+
+    cd roots
+    # 1. 実際の実行で LLM の応答を記録する（ネットワークが必要なのはここだけ）
+    roots --record-llm .roots/llm_recordings/full_audit.jsonl
+    # 2. 記録を再生して計測する（--latency-scale 1 で記録時の LLM 待ち時間も再現）
+    python -m benchmarks.bench_crew --recording .roots/llm_recordings/full_audit.jsonl
+    # 記録がなくても、合成リポジトリとスタブモデルで計測できる
+    python -m benchmarks.bench_crew --stub --scale 1
+
+再生時も記録内のツール呼び出し（ファイル書き込みを含む）は実際に実行される点に注意。
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.bench_tools import (
+    BASELINE_DIR, MIN_REGRESSION_MS, REGRESSION_RATIO, point_tools_at,
+)
+from benchmarks.synthetic_repo import ensure_repo
+from roots.crew import Roots
+from roots.llm_replay import LLMRecordingStore, ReplayLLM, StubLLM
+from roots.project import get_project_root
+from roots.state import state_dir, state_path
+from roots.tools.cache import TOOL_CACHE
+from roots.tracing import Tracer
+
+# スタブモデルが各タスクで行うツール呼び出し（全エージェントが持つツールだけを使う）
+STUB_SCRIPT = [
+    ('Read File', {'file_path': 'src/hooks/useFacilityData.ts', 'max_lines': 0}),
+    ('Read File', {'file_path': 'package.json'}),
+]
+
+
+def _make_llm(args):
+    if args.recording:
+        return ReplayLLM(
+            LLMRecordingStore(args.recording), latency_scale=args.latency_scale,
+            strict=args.strict, fallback=None if args.strict else StubLLM(args.stub_delay)
+        )
+    return StubLLM(args.stub_delay, script=STUB_SCRIPT)
+
+
+def run_once(args, project_root: str, iteration: int) -> dict:
+    TOOL_CACHE.clear()
+    llm = _make_llm(args)
+    tracer = Tracer(state_path('bench', 'traces', f"crew-{iteration}.jsonl"))
+    inputs = {
+        'project_root': project_root,
+        'current_phase': '1',
+        'focus_area': 'full_audit',
+        'current_year': str(datetime.now().year),
+    }
+
+    crew = Roots(max_concurrency=args.max_concurrency, llm=llm).crew()
+    crew.verbose = False
+    for agent in crew.agents:
+        agent.verbose = False
+
+    tracer.start()
+    start = time.perf_counter()
+    try:
+        crew.kickoff(inputs=inputs)
+    finally:
+        wall = time.perf_counter() - start
+        tracer.stop()
+
+    result = {'wall_s': wall, **tracer.totals()}
+    if isinstance(llm, ReplayLLM):
+        result.update({f"replay_{k}": v for k, v in llm.counts.items()})
+    return result
+
+
+def summarize(runs: list) -> dict:
+    summary = {}
+    for key in runs[0]:
+        values = [r[key] for r in runs]
+        summary[key] = round(statistics.median(values), 4)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench_crew", description="crew 全体のオフラインベンチマーク")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--recording", help="再生する LLM の記録（roots --record-llm で作成）")
+    source.add_argument("--stub", action="store_true", help="決定的なスタブモデルを使う（既定）")
+    parser.add_argument("--scale", type=int, default=None,
+                        help="ツールの参照先を合成リポジトリ（この倍率）にする")
+    parser.add_argument("--iterations", type=int, default=3, help="実行回数（中央値を採用）")
+    parser.add_argument("--max-concurrency", type=int, default=4)
+    parser.add_argument("--latency-scale", type=float, default=0.0,
+                        help="記録時の LLM レイテンシに掛ける倍率（0 で待たない）")
+    parser.add_argument("--stub-delay", type=float, default=0.0, help="スタブモデルの 1 呼び出しあたりの待ち時間（秒）")
+    parser.add_argument("--strict", action="store_true",
+                        help="プロンプトが完全一致する記録だけを使い、それ以外はエラーにする")
+    parser.add_argument("--name", default=None, help="ベースライン名（既定: recording のファイル名 or stub）")
+    parser.add_argument("--save", action="store_true", help="結果をベースラインとして保存する")
+    parser.add_argument("--compare", action="store_true", help="保存済みベースラインと比較する")
+    args = parser.parse_args(argv)
+
+    # crewAI の実行に必要な環境変数（実際には呼ばれない）
+    os.environ.setdefault('MODEL', 'roots-offline')
+    os.environ.setdefault('CREWAI_TRACING_ENABLED', 'false')
+    os.environ.setdefault('OTEL_SDK_DISABLED', 'true')
+
+    project_root = None
+    if args.scale is not None:
+        project_root = ensure_repo(state_path('bench'), args.scale)
+        point_tools_at(project_root)
+    project_root = project_root or get_project_root()
+
+    # synthesis_report は report.md をカレントディレクトリに書くので、作業ディレクトリを分ける
+    os.environ['ROOTS_STATE_DIR'] = state_dir()
+    workdir = state_path('bench', 'crew-workdir', 'x')
+    os.chdir(os.path.dirname(workdir))
+
+    runs = [run_once(args, project_root, i) for i in range(args.iterations)]
+    summary = summarize(runs)
+
+    name = args.name or (os.path.splitext(os.path.basename(args.recording))[0] if args.recording else 'stub')
+    if args.scale is not None:
+        name += f"-{args.scale}x"
+    print(f"[crew: {name}] {args.iterations} runs, max concurrency {args.max_concurrency}")
+    for key, value in summary.items():
+        print(f"  {key:<16} {value:>10}")
+
+    path = os.path.join(BASELINE_DIR, f"crew-{name}.json")
+    status = 0
+    if args.compare:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)['summary']
+        except (OSError, ValueError, KeyError):
+            print(f"  ベースラインがありません: {path}")
+        else:
+            then, now = baseline['wall_s'] * 1000, summary['wall_s'] * 1000
+            print(f"  vs base          {now / then if then else 0:>9.2f}x")
+            if now > then * REGRESSION_RATIO and now - then >= MIN_REGRESSION_MS:
+                print(f"性能劣化を検出しました: wall {then:.1f} ms -> {now:.1f} ms")
+                status = 1
+    if args.save:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'name': name, 'iterations': args.iterations,
+                       'max_concurrency': args.max_concurrency, 'summary': summary}, f, indent=2)
+        print(f"  ベースラインを保存しました: {path}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""
+LLM スケジューラのベンチマーク（ローカルのスタブサーバーに対して実行）。
+
+スタブサーバーは window 秒あたり --limit リクエスト・--token-limit トークンを超えると
+429 を返す（Gemini のレート制限を縮小したもの）。並列に動くエージェントの代わりに
+複数のワーカーが同時に呼び出し、次の 2 通りを比べる。
+
+- naive: 各ワーカーが 429 を受けたら個別に指数バックオフして再試行する（スケジューラなし）
+- scheduled: 共有の LLMScheduler（トークンバケット・優先度・ジッタ付き再試行）を通す
+
+ワーカー 0 はクリティカルパス上のタスクとして高い優先度で呼び出す。
+
+    cd roots
+    python -m benchmarks.bench_scheduler
+    python -m benchmarks.bench_scheduler --workers 8 --calls 10 --limit 20 --window 1
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from roots.scheduler import LLMScheduler, is_rate_limited
+
+
+class StubLLMServer:
+    """window 秒の移動窓でリクエスト数・トークン数を制限する HTTP スタブ。"""
+
+    def __init__(self, limit: int, token_limit: int = 0, window: float = 1.0, latency: float = 0.05):
+        self.limit = limit
+        self.token_limit = token_limit
+        self.window = window
+        self.latency = latency
+        self.accepted = 0
+        self.rejected = 0
+        self._log = deque()
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])) or b'{}')
+                tokens = int(body.get('tokens', 0))
+                if not server._admit(tokens):
+                    self._reply(429, {'error': {'code': 429, 'status': 'RESOURCE_EXHAUSTED'}})
+                    return
+                time.sleep(server.latency)
+                self._reply(200, {'text': 'ok', 'usage': {'total_tokens': tokens}})
+
+            def _reply(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}/v1/generate"
+
+    def _admit(self, tokens: int) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            while self._log and self._log[0][0] <= now - self.window:
+                self._log.popleft()
+            used = sum(t for _, t in self._log)
+            if len(self._log) >= self.limit or (self.token_limit and used + tokens > self.token_limit):
+                self.rejected += 1
+                return False
+            self._log.append((now, tokens))
+            self.accepted += 1
+            return True
+
+    def __enter__(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def call_stub(url: str, tokens: int) -> dict:
+    request = urllib.request.Request(
+        url, data=json.dumps({'tokens': tokens}).encode(),
+        headers={'Content-Type': 'application/json'}, method='POST'
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.loads(response.read())
+
+
+def _naive_call(url: str, tokens: int, base_delay: float, max_retries: int = 10) -> int:
+    """429 を受けたら自分だけ指数バックオフする（ジッタなし）。429 の回数を返す。"""
+    for attempt in range(max_retries + 1):
+        try:
+            call_stub(url, tokens)
+            return attempt
+        except urllib.error.HTTPError as e:
+            if not is_rate_limited(e) or attempt == max_retries:
+                raise
+            time.sleep(base_delay * 2 ** attempt)
+    return max_retries
+
+
+def run_mode(mode: str, args) -> dict:
+    with StubLLMServer(args.limit, args.token_limit, args.window, args.latency) as server:
+        scheduler = LLMScheduler(
+            rpm=args.limit * 60 / args.window,
+            tpm=args.token_limit * 60 / args.window if args.token_limit else None,
+            base_delay=args.base_delay, window=args.window, seed=0,
+        )
+        finished = {}
+
+        def worker(index: int):
+            name = f"task-{index}"
+            priority = 2 if index == 0 else 1
+            scheduler.priorities[name] = priority
+            for _ in range(args.calls):
+                if mode == 'naive':
+                    _naive_call(server.url, args.tokens, args.base_delay)
+                else:
+                    scheduler.call(lambda: call_stub(server.url, args.tokens),
+                                   priority=priority, tokens=args.tokens, task=name)
+            finished[index] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+
+    result = {
+        'wall_s': round(wall, 3),
+        'critical_task_s': round(finished[0], 3),
+        'other_tasks_mean_s': round(statistics.mean(finished[i] for i in range(1, args.workers)), 3)
+        if args.workers > 1 else 0.0,
+        'requests': server.accepted,
+        '429s': server.rejected,
+    }
+    if mode == 'scheduled':
+        stats = scheduler.stats()
+        result['wait_p50_s'] = round(stats['wait_p50'], 3)
+        result['wait_p95_s'] = round(stats['wait_p95'], 3)
+        result['report'] = scheduler.report()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LLM スケジューラのベンチマーク（ローカルのスタブサーバー）")
+    parser.add_argument("--workers", type=int, default=6, help="同時に呼び出すワーカー（エージェント）数")
+    parser.add_argument("--calls", type=int, default=10, help="ワーカーあたりの呼び出し回数")
+    parser.add_argument("--limit", type=int, default=10, help="window 秒あたりのリクエスト数の上限")
+    parser.add_argument("--token-limit", type=int, default=0, help="window 秒あたりのトークン数の上限（0 で無制限）")
+    parser.add_argument("--tokens", type=int, default=500, help="1 呼び出しあたりのトークン数")
+    parser.add_argument("--window", type=float, default=1.0, help="レート制限の窓（秒）")
+    parser.add_argument("--latency", type=float, default=0.05, help="スタブサーバーの応答時間（秒）")
+    parser.add_argument("--base-delay", type=float, default=0.1, help="再試行の初期待ち時間（秒）")
+    parser.add_argument("--mode", choices=['naive', 'scheduled', 'both'], default='both')
+    args = parser.parse_args(argv)
+
+    modes = ['naive', 'scheduled'] if args.mode == 'both' else [args.mode]
+    print(f"[scheduler] {args.workers} workers x {args.calls} calls, "
+          f"limit {args.limit} req / {args.window:g}s"
+          + (f", {args.token_limit} tokens / {args.window:g}s" if args.token_limit else ""))
+    results = {mode: run_mode(mode, args) for mode in modes}
+    keys = [k for k in results[modes[-1]] if k != 'report']
+    print(f"  {'':<20}" + "".join(f"{mode:>12}" for mode in modes))
+    for key in keys:
+        print(f"  {key:<20}" + "".join(f"{results[m].get(key, ''):>12}" for m in modes))
+    if 'scheduled' in results:
+        print()
+        print(results['scheduled']['report'])
+
+
+if __name__ == '__main__':
+    main()
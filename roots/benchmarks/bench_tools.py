@@ -0,0 +1,202 @@
+"""
+roots ツールのオフラインベンチマーク。
+
+合成リポジトリ（benchmarks/synthetic_repo.py）に対して各ツールのアクションを実行し、
+コールド（キャッシュなし）・ウォーム（キャッシュ済み）のレイテンシとピークメモリを測る。
+LLM は一切呼ばない。
+
+    cd roots
+    python -m benchmarks.bench_tools                  # 1x / 10x / 50x を計測
+    python -m benchmarks.bench_tools --scale 1 --save # ベースラインを保存
+    python -m benchmarks.bench_tools --compare        # ベースラインと比較（劣化があれば終了コード 1）
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks.synthetic_repo import ensure_repo
+from roots.project import set_project_root
+from roots.state import state_path
+from roots.tools import cache as tool_cache
+from roots.tools import (
+    directory_explorer, file_reader, grep_search, supabase_query,
+)
+from roots.tools.knowledge_search import KNOWLEDGE_DIR, _MARKDOWN_HEADING, chunk_markdown
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+# ベースライン比でこの倍率を超え、かつ差が MIN_REGRESSION_MS 以上なら劣化とみなす
+REGRESSION_RATIO = 1.25
+MIN_REGRESSION_MS = 5.0
+
+
+def _actions():
+    """(名前, ツール, 引数) の一覧。"""
+    reader = file_reader.FileReaderTool()
+    grep = grep_search.GrepSearchTool()
+    explorer = directory_explorer.DirectoryExplorerTool()
+    schema = supabase_query.SupabaseSchemaExplorerTool()
+    return [
+        ('read_file.small', reader, {'file_path': 'src/lib/supabase.ts'}),
+        ('read_file.big_hook', reader, {'file_path': 'src/hooks/useFacilityData.ts', 'max_lines': 0}),
+        ('grep.common', grep, {'pattern': 'useState', 'max_results': 50}),
+        ('grep.rare', grep, {'pattern': 'incident_reports', 'file_pattern': '.tsx'}),
+        ('grep.regex', grep, {'pattern': r'supabase\.from\([\'"]\w+_records', 'max_results': 100}),
+        ('explore.src', explorer, {'path': 'src', 'max_depth': 3}),
+        ('schema.list_migrations', schema, {'action': 'list_migrations'}),
+        ('schema.read_migration', schema, {'action': 'read_migration', 'target': '20240101000042'}),
+        ('schema.find_table', schema, {'action': 'find_table', 'target': 'facility_settings'}),
+        ('schema.find_rls', schema, {'action': 'find_rls', 'target': 'staff'}),
+        ('schema.analyze_types', schema, {'action': 'analyze_types', 'target': 'FacilitySettings'}),
+    ]
+
+
+def check_output(name: str, result) -> None:
+    """検索が 0 件なら計測の意味がないので止める（引数の誤りで空振りしても気づけるように）。"""
+    if name.startswith('grep.') and isinstance(result, str) and '\nResults: 0 matches' in result:
+        raise RuntimeError(f"{name} matched nothing: {result.splitlines()[0]}")
+
+
+def check_knowledge_chunks(path: str = os.path.join(KNOWLEDGE_DIR, 'current_issues.md')) -> None:
+    """'#' 見出しのある文書は '#' 見出しだけで分割される（番号付きリストの項目が見出しにならない）。"""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    titles = {m.group(2) for m in map(_MARKDOWN_HEADING.match, text.splitlines()) if m}
+    for chunk in chunk_markdown(text):
+        stray = [t for t in chunk['title'].split(' > ') if chunk['title'] and t not in titles]
+        if stray:
+            raise RuntimeError(f"{os.path.basename(path)}:{chunk['line']} split at non-heading lines: {stray}")
+
+
+def point_tools_at(project_root: str):
+    """ツールの参照先プロジェクトを合成リポジトリに切り替える。"""
+    set_project_root(project_root)
+
+
+def _time_ms(tool, kwargs) -> float:
+    start = time.perf_counter()
+    tool._run(**kwargs)
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(tool, kwargs, repeat: int) -> dict:
+    cache = tool_cache.TOOL_CACHE
+
+    cold = []
+    for _ in range(repeat):
+        cache.clear()
+        cold.append(_time_ms(tool, kwargs))
+
+    cache.clear()
+    tool._run(**kwargs)
+    warm = [_time_ms(tool, kwargs) for _ in range(repeat)]
+
+    # tracemalloc は計測を大きく遅くするので、レイテンシとは別に 1 回だけ実行する
+    cache.clear()
+    tracemalloc.start()
+    result = tool._run(**kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'cold_ms': round(statistics.median(cold), 3),
+        'warm_ms': round(statistics.median(warm), 3),
+        'peak_kb': round(peak / 1024, 1),
+        'output_chars': len(result) if isinstance(result, str) else 0,
+    }
+
+
+def run_scale(scale: int, repeat: int) -> dict:
+    repo = ensure_repo(state_path('bench'), scale)
+    point_tools_at(repo)
+    results = {}
+    for name, tool, kwargs in _actions():
+        check_output(name, tool._run(**kwargs))
+        results[name] = measure(tool, kwargs, repeat)
+    tool_cache.TOOL_CACHE.clear()
+    return results
+
+
+def format_table(scale: int, results: dict, baseline: dict = None) -> str:
+    header = f"  {'action':<26} {'cold ms':>9} {'warm ms':>9} {'peak KB':>9} {'chars':>9}"
+    if baseline:
+        header += f" {'vs base':>8}"
+    lines = [f"[{scale}x]", header]
+    for name, r in results.items():
+        line = (
+            f"  {name:<26} {r['cold_ms']:>9.2f} {r['warm_ms']:>9.3f} "
+            f"{r['peak_kb']:>9.1f} {r['output_chars']:>9}"
+        )
+        if baseline and name in baseline:
+            base = baseline[name]['cold_ms']
+            line += f" {r['cold_ms'] / base if base else 0:>7.2f}x"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def regressions(results: dict, baseline: dict) -> list:
+    found = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric in ('cold_ms', 'warm_ms'):
+            now, then = r[metric], base[metric]
+            if now > then * REGRESSION_RATIO and now - then >= MIN_REGRESSION_MS:
+                found.append(f"{name} {metric}: {then:.2f} -> {now:.2f}")
+    return found
+
+
+def _baseline_path(scale: int) -> str:
+    return os.path.join(BASELINE_DIR, f"{scale}x.json")
+
+
+def _load_baseline(scale: int):
+    try:
+        with open(_baseline_path(scale), 'r', encoding='utf-8') as f:
+            return json.load(f)['results']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench_tools", description="roots ツールのオフラインベンチマーク")
+    parser.add_argument("--scale", type=int, action="append",
+                        help="合成リポジトリの倍率（複数指定可、既定: 1 10 50）")
+    parser.add_argument("--repeat", type=int, default=5, help="各計測の繰り返し回数（中央値を採用）")
+    parser.add_argument("--save", action="store_true", help="結果をベースラインとして保存する")
+    parser.add_argument("--compare", action="store_true", help="保存済みベースラインと比較する")
+    args = parser.parse_args(argv)
+
+    check_knowledge_chunks()
+    failed = []
+    for scale in args.scale or [1, 10, 50]:
+        results = run_scale(scale, args.repeat)
+        baseline = _load_baseline(scale) if args.compare else None
+        print(format_table(scale, results, baseline))
+
+        if args.compare:
+            if baseline is None:
+                print(f"  ベースラインがありません: {_baseline_path(scale)}")
+            else:
+                failed += [f"[{scale}x] {r}" for r in regressions(results, baseline)]
+        if args.save:
+            os.makedirs(BASELINE_DIR, exist_ok=True)
+            with open(_baseline_path(scale), 'w', encoding='utf-8') as f:
+                json.dump({'scale': scale, 'repeat': args.repeat, 'results': results}, f, indent=2)
+            print(f"  ベースラインを保存しました: {_baseline_path(scale)}")
+        print()
+
+    if failed:
+        print("性能劣化を検出しました:")
+        print("\n".join(f"  {r}" for r in failed))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+"""
+kidos と同じ形の合成リポジトリを生成する。
+
+1x はおおよそ実際の kidos 相当（TS/TSX 約 350 ファイル、2000 行超のフック数本、
+SQL マイグレーション約 170 本）。scale 倍するとファイル数が比例して増える。
+内容は seed から決定的に生成されるため、同じ scale なら毎回同じリポジトリになる。
+"""
+import json
+import os
+import random
+import shutil
+
+GENERATOR_VERSION = 1
+
+DOMAINS = [
+    'addition', 'attendance', 'billing', 'children', 'compliance', 'dashboard',
+    'documents', 'facility', 'records', 'schedule', 'staff', 'support-plan',
+]
+TABLES = [
+    'facilities', 'facility_settings', 'facility_time_slots', 'users', 'staff',
+    'employment_records', 'children', 'usage_records', 'attendance_records',
+    'billing_records', 'addition_settings', 'support_plans', 'shift_patterns',
+    'contact_logs', 'incident_reports', 'documents', 'holiday_periods',
+]
+HOOK_NAMES = ['useFacilityData', 'useStaffMaster', 'useBilling', 'useChildrenData']
+
+# 1x あたりのファイル数
+COMPONENTS_PER_DOMAIN = 20
+SMALL_HOOKS = 30
+BIG_HOOKS = 3
+PAGES = 50
+API_ROUTES = 30
+LIB_FILES = 25
+MIGRATIONS = 170
+DOCS = 15
+
+
+def _camel(name: str) -> str:
+    return ''.join(part.capitalize() for part in name.replace('-', '_').split('_'))
+
+
+def _component(rng: random.Random, name: str, domain: str) -> str:
+    hook = rng.choice(HOOK_NAMES)
+    table = rng.choice(TABLES)
+    lines = [
+        "'use client';",
+        "",
+        "import React, { useState, useEffect, useMemo } from 'react';",
+        f"import {{ {hook} }} from '@/hooks/{hook}';",
+        f"import type {{ {_camel(table)} }} from '@/types';",
+        "",
+        f"type {name}Props = {{",
+        "  facilityId: string;",
+        "  onClose?: () => void;",
+        "};",
+        "",
+        f"// {domain} 画面: {table} の一覧と編集",
+        f"export default function {name}({{ facilityId, onClose }}: {name}Props) {{",
+        f"  const {{ data, loading, error }} = {hook}(facilityId);",
+        "  const [selected, setSelected] = useState<string | null>(null);",
+        "  const [filter, setFilter] = useState('');",
+    ]
+    for i in range(rng.randint(4, 30)):
+        lines += [
+            f"  const handle{_camel(table)}{i} = async (id: string) => {{",
+            "    if (!id) return;",
+            f"    const {{ error }} = await supabase.from('{table}').update({{ updated_at: new Date().toISOString() }}).eq('id', id);",
+            "    if (error) {",
+            f"      console.error('{name} handle{i} failed', error);",
+            "      return;",
+            "    }",
+            "    setSelected(id);",
+            "  };",
+            "",
+        ]
+    lines += [
+        "  const rows = useMemo(() => (data ?? []).filter((r) => r.name?.includes(filter)), [data, filter]);",
+        "",
+        "  if (loading) return <div className=\"p-4 text-gray-500\">読み込み中...</div>;",
+        "  if (error) return <div className=\"p-4 text-red-500\">エラーが発生しました</div>;",
+        "",
+        "  return (",
+        "    <div className=\"rounded-lg bg-white p-4 shadow\">",
+        f"      <h2 className=\"text-lg font-bold text-[#00c4cc]\">{name}</h2>",
+        "      <input aria-label=\"filter\" value={filter} onChange={(e) => setFilter(e.target.value)} />",
+        "      <ul>",
+        "        {rows.map((row) => (",
+        "          <li key={row.id} onClick={() => setSelected(row.id)}>{row.name}</li>",
+        "        ))}",
+        "      </ul>",
+        "      <button className=\"rounded bg-[#00c4cc] px-4 py-2 text-white hover:opacity-80\" onClick={onClose}>閉じる</button>",
+        "    </div>",
+        "  );",
+        "}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def _hook(rng: random.Random, name: str, target_lines: int) -> str:
+    lines = [
+        "import { useState, useEffect, useCallback } from 'react';",
+        "import { supabase } from '@/lib/supabase';",
+        "import type { Facility, Staff, Child } from '@/types';",
+        "",
+        f"export function {name}(facilityId: string) {{",
+        "  const [data, setData] = useState<any[]>([]);",
+        "  const [loading, setLoading] = useState(true);",
+        "  const [error, setError] = useState<Error | null>(null);",
+        "",
+    ]
+    i = 0
+    while len(lines) < target_lines:
+        table = rng.choice(TABLES)
+        lines += [
+            f"  // {table} を取得する（マスターデータ未設定時は空配列）",
+            f"  const fetch{_camel(table)}{i} = useCallback(async () => {{",
+            f"    const {{ data: rows, error }} = await supabase.from('{table}').select('*').eq('facility_id', facilityId);",
+            "    if (error) {",
+            "      setError(error);",
+            "      return [];",
+            "    }",
+            "    for (const row of rows ?? []) {",
+            "      if (row.deleted_at) {",
+            "        continue;",
+            "      }",
+            "    }",
+            "    return rows ?? [];",
+            "  }, [facilityId]);",
+            "",
+        ]
+        i += 1
+    lines += [
+        "  useEffect(() => {",
+        "    setLoading(false);",
+        "  }, [facilityId]);",
+        "",
+        "  return { data, loading, error };",
+        "}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def _types(rng: random.Random, target_lines: int) -> str:
+    lines = ["// 共通型定義", ""]
+    i = 0
+    while len(lines) < target_lines:
+        table = TABLES[i % len(TABLES)]
+        suffix = '' if i < len(TABLES) else str(i)
+        lines += [f"export interface {_camel(table)}{suffix} {{", "  id: string;", "  facility_id: string;"]
+        for j in range(rng.randint(5, 25)):
+            lines.append(f"  field_{j}: {rng.choice(['string', 'number', 'boolean', 'string | null'])};")
+        lines += ["  created_at: string;", "}", ""]
+        i += 1
+    return "\n".join(lines) + "\n"
+
+
+def _migration(rng: random.Random, index: int) -> str:
+    table = TABLES[index % len(TABLES)]
+    if index >= len(TABLES):
+        table = f"{table}_{index}"
+    columns = ",\n".join(
+        f"  col_{j} {rng.choice(['text', 'integer', 'boolean', 'timestamptz', 'jsonb'])}"
+        for j in range(rng.randint(3, 20))
+    )
+    return (
+        f"-- migration {index}\n"
+        f"CREATE TABLE IF NOT EXISTS public.{table} (\n"
+        f"  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),\n"
+        f"  facility_id uuid REFERENCES facilities(id),\n"
+        f"{columns},\n"
+        f"  created_at timestamptz DEFAULT now()\n"
+        f");\n\n"
+        f"ALTER TABLE public.{table} ENABLE ROW LEVEL SECURITY;\n\n"
+        f"CREATE POLICY \"{table}_select\" ON public.{table}\n"
+        f"  FOR SELECT USING (facility_id IN (SELECT facility_id FROM users WHERE id = auth.uid()));\n"
+    )
+
+
+def _route(rng: random.Random, name: str) -> str:
+    table = rng.choice(TABLES)
+    return (
+        "import { NextResponse } from 'next/server';\n"
+        "import { supabase } from '@/lib/supabase';\n\n"
+        "export async function GET(request: Request) {\n"
+        f"  const {{ data, error }} = await supabase.from('{table}').select('*');\n"
+        "  if (error) {\n"
+        "    return NextResponse.json({ error: error.message }, { status: 500 });\n"
+        "  }\n"
+        f"  return NextResponse.json({{ {name.replace('-', '_')}: data }});\n"
+        "}\n"
+    )
+
+
+def _write(path: str, content: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def generate_repo(root: str, scale: int = 1, seed: int = 0) -> dict:
+    """root に scale 倍の合成リポジトリを生成し、ファイル数の内訳を返す。"""
+    rng = random.Random(f"{seed}:{scale}")
+    counts = {'components': 0, 'hooks': 0, 'pages': 0, 'api_routes': 0,
+              'lib': 0, 'migrations': 0, 'docs': 0}
+
+    for copy in range(scale):
+        suffix = '' if copy == 0 else f"_{copy}"
+        for domain in DOMAINS:
+            for i in range(COMPONENTS_PER_DOMAIN):
+                name = f"{_camel(domain)}Panel{i}"
+                _write(os.path.join(root, 'src', 'components', f"{domain}{suffix}", f"{name}.tsx"),
+                       _component(rng, name, domain))
+                counts['components'] += 1
+
+        for i in range(BIG_HOOKS):
+            name = f"{HOOK_NAMES[i % len(HOOK_NAMES)]}{suffix}"
+            _write(os.path.join(root, 'src', 'hooks', f"{name}.ts"),
+                   _hook(rng, name, rng.randint(2000, 2700)))
+            counts['hooks'] += 1
+        for i in range(SMALL_HOOKS):
+            name = f"useFeature{i}{suffix}"
+            _write(os.path.join(root, 'src', 'hooks', f"{name}.ts"),
+                   _hook(rng, name, rng.randint(80, 500)))
+            counts['hooks'] += 1
+
+        for i in range(PAGES):
+            domain = DOMAINS[i % len(DOMAINS)]
+            _write(os.path.join(root, 'src', 'app', f"{domain}{suffix}", f"page{i}", 'page.tsx'),
+                   _component(rng, f"Page{i}", domain))
+            counts['pages'] += 1
+        for i in range(API_ROUTES):
+            name = f"{DOMAINS[i % len(DOMAINS)]}-{i}{suffix}"
+            _write(os.path.join(root, 'src', 'app', 'api', name, 'route.ts'), _route(rng, name))
+            counts['api_routes'] += 1
+
+        for i in range(LIB_FILES):
+            _write(os.path.join(root, 'src', 'utils', f"util{i}{suffix}.ts"),
+                   _hook(rng, f"helper{i}", rng.randint(40, 200)))
+            counts['lib'] += 1
+
+        for i in range(MIGRATIONS):
+            index = copy * MIGRATIONS + i
+            _write(os.path.join(root, 'supabase', 'migrations', f"{20240101000000 + index}_m{index}.sql"),
+                   _migration(rng, index))
+            counts['migrations'] += 1
+
+        for i in range(DOCS):
+            _write(os.path.join(root, 'docs', f"doc{i}{suffix}.md"),
+                   f"# 仕様書 {i}\n\n" + "\n".join(f"- 要件 {j}: {rng.choice(TABLES)} を管理する" for j in range(200)))
+            counts['docs'] += 1
+
+    _write(os.path.join(root, 'src', 'types', 'index.ts'), _types(rng, 2000 * scale))
+    _write(os.path.join(root, 'src', 'lib', 'supabase.ts'),
+           "import { createClient } from '@supabase/supabase-js';\n"
+           "export const supabase = createClient(process.env.NEXT_PUBLIC_SUPABASE_URL!, process.env.NEXT_PUBLIC_SUPABASE_ANON_KEY!);\n")
+    _write(os.path.join(root, 'package.json'), json.dumps({
+        'name': 'kidos-synthetic', 'private': True,
+        'dependencies': {'next': '14.2.0', 'react': '18.2.0', '@supabase/supabase-js': '2.39.0'},
+    }, indent=2))
+    _write(os.path.join(root, 'tsconfig.json'), json.dumps({
+        'compilerOptions': {'baseUrl': '.', 'paths': {'@/*': ['./src/*']}},
+    }, indent=2))
+    return counts
+
+
+def ensure_repo(base_dir: str, scale: int, seed: int = 0) -> str:
+    """base_dir/<scale>x に合成リポジトリを用意する（生成済みで同じバージョンなら再利用）。"""
+    root = os.path.join(base_dir, f"{scale}x")
+    marker = os.path.join(root, '.synthetic.json')
+    expected = {'version': GENERATOR_VERSION, 'scale': scale, 'seed': seed}
+    try:
+        with open(marker, 'r', encoding='utf-8') as f:
+            if json.load(f).get('params') == expected:
+                return root
+    except (OSError, ValueError):
+        pass
+
+    if os.path.exists(root):
+        shutil.rmtree(root)
+    counts = generate_repo(root, scale, seed)
+    _write(marker, json.dumps({'params': expected, 'counts': counts}, indent=2))
+    return root
@@ -0,0 +1,118 @@
+import functools
+import glob
+import hashlib
+import os
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from crewai import Task
+from crewai.tasks.task_output import TaskOutput
+
+from roots.state import load_json, project_key, save_json, state_path
+
+# 保存形式やフィンガープリントの計算方法を変えたら上げる
+CHECKPOINT_VERSION = 1
+
+CHECKPOINT_DIR = 'checkpoint'
+TOOL_CACHE_FILE = 'tool_cache.json'
+
+
+@functools.lru_cache(maxsize=None)
+def code_hash() -> str:
+    """roots パッケージのソースと設定（*.py, *.yaml）のハッシュ。コードを変えたら再開しない。"""
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for pattern in ('**/*.py', '**/*.yaml'):
+        for path in sorted(glob.glob(os.path.join(package_dir, pattern), recursive=True)):
+            digest.update(os.path.relpath(path, package_dir).encode())
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def task_fingerprints(tasks: List[Task], deps: Dict[str, List[str]], agent_for: Callable,
+                      base: str, reused: Dict[str, TaskOutput],
+                      notes: Dict[str, str]) -> Dict[str, str]:
+    """
+    タスクごとの入力のフィンガープリント。
+
+    補間済みのタスク説明・期待する出力・エージェント設定・モデル・追加コンテキスト、
+    上流タスクのフィンガープリント、base（コード・プロジェクト・コミット）から計算する。
+    再利用する出力を渡されたタスクはその内容から計算する。
+    """
+    fingerprints: Dict[str, str] = {}
+    for task in tasks:
+        digest = hashlib.sha256(base.encode())
+        if task.name in reused:
+            digest.update(b'reused\0' + reused[task.name].raw.encode())
+        else:
+            agent = agent_for(task)
+            parts = [task.name, task.description, task.expected_output, notes.get(task.name, '')]
+            if agent is not None:
+                parts += [agent.role, agent.goal, agent.backstory, str(getattr(agent.llm, 'model', ''))]
+            parts += [fingerprints[u] for u in deps[task.name]]
+            for part in parts:
+                digest.update(part.encode() + b'\0')
+        fingerprints[task.name] = digest.hexdigest()
+    return fingerprints
+
+
+class CheckpointStore:
+    """
+    タスクが終わるたびに、その出力とツールキャッシュの状態をプロジェクトごとのディレクトリに保存する。
+
+    --resume で再実行すると、入力（フィンガープリント）が変わっていないタスクは
+    保存済みの出力を使い、途中で失敗したタスク以降だけを実行する。
+    """
+
+    def __init__(self, project_root: str, commit: Optional[str], directory: Optional[str] = None):
+        self.directory = directory or os.path.dirname(state_path(CHECKPOINT_DIR, project_key(project_root), 'x'))
+        os.makedirs(self.directory, exist_ok=True)
+        self.base = f"v{CHECKPOINT_VERSION}\0{code_hash()}\0{os.path.realpath(project_root)}\0{commit or ''}"
+        self.resume = False
+        self.resumed: List[str] = []
+
+    def _task_path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.json")
+
+    def reset(self):
+        """このプロジェクトの前回のチェックポイントを消す（--resume なしの実行の開始時）。"""
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            os.remove(path)
+
+    def load(self, task: Task, fingerprint: str) -> Optional[TaskOutput]:
+        """入力が変わっていなければ保存済みの出力を返す。"""
+        record = load_json(self._task_path(task.name), default=None)
+        if not isinstance(record, dict) or record.get('fingerprint') != fingerprint:
+            return None
+        self.resumed.append(task.name)
+        return TaskOutput(
+            name=task.name,
+            description=task.description,
+            expected_output=task.expected_output,
+            raw=record['raw'],
+            agent=record['agent'],
+        )
+
+    def save(self, task: Task, output: TaskOutput, fingerprint: str):
+        from roots.tools.cache import TOOL_CACHE
+
+        save_json(self._task_path(task.name), {
+            'fingerprint': fingerprint,
+            'raw': output.raw,
+            'agent': output.agent,
+            'completed_at': datetime.now().isoformat(timespec='seconds'),
+        })
+        save_json(os.path.join(self.directory, TOOL_CACHE_FILE), {
+            'base': self.base,
+            'entries': TOOL_CACHE.export_entries(),
+        })
+
+    def restore_tool_cache(self) -> int:
+        """保存済みのツールキャッシュを読み込む（ファイルが変わったエントリは使うときに破棄される）。"""
+        from roots.tools.cache import TOOL_CACHE
+
+        saved = load_json(os.path.join(self.directory, TOOL_CACHE_FILE), default=None)
+        if not isinstance(saved, dict) or saved.get('base') != self.base:
+            return 0
+        return TOOL_CACHE.import_entries(saved.get('entries') or [])
@@ -0,0 +1,225 @@
+import os
+import re
+import subprocess
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from roots.history import IGNORED_PREFIXES, git_head
+from roots.state import cache_path, load_json, project_key, save_json
+
+# 保存する形式を変えたら上げる（古い索引は作り直す）
+CHURN_VERSION = 1
+# これより多くのファイルを変えたコミット（一括置換・フォーマット等）は同時変更の組に数えない
+MAX_COCHANGE_FILES = 30
+MAX_SUBJECT_CHARS = 100
+GIT_LOG_TIMEOUT = 600
+
+_RECORD = '\x1e'
+_FIELD = '\x1f'
+# numstat のリネーム表記: src/{old => new}/x.ts または old.ts => new.ts
+_BRACE_RENAME = re.compile(r'^(.*)\{(.*) => (.*)\}(.*)$')
+
+
+def _rename(path: str) -> Tuple[Optional[str], str]:
+    """numstat のパス欄を (リネーム前, 後) にする（リネームでなければ前は None）。"""
+    match = _BRACE_RENAME.match(path)
+    if match:
+        prefix, old, new, suffix = match.groups()
+        return (os.path.normpath(prefix + old + suffix).replace(os.sep, '/'),
+                os.path.normpath(prefix + new + suffix).replace(os.sep, '/'))
+    if ' => ' in path:
+        old, new = path.split(' => ', 1)
+        return old, new
+    return None, path
+
+
+def _git_log(project_root: str, revisions: str) -> Iterator[dict]:
+    """
+    git log を古い順に 1 コミットずつ読む（出力全体をメモリに載せない）。
+    各コミットは {'hash', 'author', 'time', 'subject', 'files': [[パス, 追加行, 削除行, リネーム前]]}。
+    """
+    # --relative: プロジェクトがリポジトリのサブディレクトリでも、パスはプロジェクトからの相対になる
+    command = ['git', '-c', 'core.quotepath=off', 'log', '--reverse', '--no-merges', '-M',
+               '--numstat', '--relative', f'--format={_RECORD}%H{_FIELD}%an{_FIELD}%at{_FIELD}%s',
+               revisions, '--']
+    process = subprocess.Popen(command, cwd=project_root, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                               text=True, encoding='utf-8', errors='replace')
+    started = time.monotonic()
+    commit = None
+    try:
+        for line in process.stdout:
+            if time.monotonic() - started > GIT_LOG_TIMEOUT:
+                raise subprocess.TimeoutExpired(command, GIT_LOG_TIMEOUT)
+            line = line.rstrip('\n')
+            if line.startswith(_RECORD):
+                if commit is not None:
+                    yield commit
+                sha, author, timestamp, subject = (line[1:].split(_FIELD) + ['', '', '0', ''])[:4]
+                commit = {'hash': sha, 'author': author, 'time': int(timestamp or 0),
+                          'subject': subject[:MAX_SUBJECT_CHARS], 'files': []}
+            elif line and commit is not None:
+                parts = line.split('\t', 2)
+                if len(parts) != 3:
+                    continue
+                old, path = _rename(parts[2])
+                if path.startswith(IGNORED_PREFIXES):
+                    continue
+                # バイナリファイルは '-'
+                added = int(parts[0]) if parts[0].isdigit() else 0
+                deleted = int(parts[1]) if parts[1].isdigit() else 0
+                commit['files'].append([path, added, deleted, old])
+        if commit is not None:
+            yield commit
+    finally:
+        process.stdout.close()
+        process.kill()
+        process.wait()
+
+
+def _is_ancestor(project_root: str, commit: str, head: str) -> bool:
+    try:
+        result = subprocess.run(['git', 'merge-base', '--is-ancestor', commit, head],
+                                cwd=project_root, capture_output=True, timeout=60)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return result.returncode == 0
+
+
+class ChurnIndex:
+    """
+    git の履歴から作る、ファイルごとの変更回数・変更行数・作者・最終変更日と同時変更の索引。
+
+    - コミットの一覧（ファイルごとの追加・削除行数つき）を cache_dir() の churn/ に保存し、
+      HEAD が進んだら前回の HEAD からの git log だけを読んで末尾に足す
+      （前回の HEAD が祖先でなくなった＝履歴が書き換えられたときだけ全体を読み直す）
+    - 集計は問い合わせのたびにコミットの一覧から行うので、期間（since_days）で絞り込める
+    - リネームは新しい名前に寄せて数える
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # project_root -> (HEAD, 索引)
+        self._loaded: Dict[str, Tuple[str, dict]] = {}
+
+    @staticmethod
+    def _index_path(project_root: str) -> str:
+        return cache_path('churn', f"{project_key(project_root)}.json")
+
+    def _update(self, project_root: str) -> Optional[dict]:
+        """HEAD までの履歴を反映した索引（git 管理外なら None）。"""
+        head = git_head(project_root)
+        if head is None:
+            return None
+        loaded = self._loaded.get(project_root)
+        if loaded is not None and loaded[0] == head:
+            return loaded[1]
+
+        path = self._index_path(project_root)
+        index = loaded[1] if loaded is not None else load_json(path, default=None)
+        if not (isinstance(index, dict) and index.get('version') == CHURN_VERSION
+                and index.get('head') and _is_ancestor(project_root, index['head'], head)):
+            index = {'version': CHURN_VERSION, 'head': None, 'authors': [], 'commits': []}
+        if index['head'] != head:
+            revisions = f"{index['head']}..{head}" if index['head'] else head
+            authors = {name: i for i, name in enumerate(index['authors'])}
+            for commit in _git_log(project_root, revisions):
+                if commit['author'] not in authors:
+                    authors[commit['author']] = len(index['authors'])
+                    index['authors'].append(commit['author'])
+                index['commits'].append([commit['hash'][:12], authors[commit['author']], commit['time'],
+                                         commit['subject'], commit['files']])
+            index['head'] = head
+            save_json(path, index)
+        self._loaded[project_root] = (head, index)
+        return index
+
+    def _commits(self, index: dict, since_days: int) -> Iterator[Tuple[list, List[Tuple[str, int, int]]]]:
+        """
+        新しい順に (コミット, [(現在の名前, 追加行, 削除行)]) を返す。
+        新しい側から読み、リネーム前の名前を後のリネーム先に置き換える。
+        """
+        cutoff = time.time() - since_days * 86400 if since_days else 0
+        renamed: Dict[str, str] = {}
+        for commit in reversed(index['commits']):
+            files = []
+            for path, added, deleted, old in commit[4]:
+                current = renamed.get(path, path)
+                files.append((current, added, deleted))
+                if old is not None:
+                    renamed[old] = current
+            if commit[2] >= cutoff:
+                yield commit, files
+
+    def file_stats(self, project_root: str, since_days: int = 0) -> Optional[Dict[str, dict]]:
+        """
+        ファイル -> {'commits', 'added', 'deleted', 'authors': Counter, 'first', 'last'}
+        （git 管理外なら None）。時刻は UNIX 時間。
+        """
+        with self._lock:
+            index = self._update(project_root)
+            if index is None:
+                return None
+            stats: Dict[str, dict] = {}
+            for commit, files in self._commits(index, since_days):
+                author = index['authors'][commit[1]]
+                for path, added, deleted in files:
+                    entry = stats.get(path)
+                    if entry is None:
+                        entry = stats[path] = {'commits': 0, 'added': 0, 'deleted': 0, 'authors': Counter(),
+                                               'first': commit[2], 'last': commit[2]}
+                    entry['commits'] += 1
+                    entry['added'] += added
+                    entry['deleted'] += deleted
+                    entry['authors'][author] += 1
+                    entry['first'] = min(entry['first'], commit[2])
+                    entry['last'] = max(entry['last'], commit[2])
+            return stats
+
+    def co_changes(self, project_root: str, since_days: int = 0,
+                   path: Optional[str] = None) -> Optional[Counter]:
+        """
+        一緒に変更された回数。path を指定するとそのファイルと一緒に変わったファイル -> 回数、
+        しなければ (ファイル, ファイル) の組 -> 回数。
+        """
+        with self._lock:
+            index = self._update(project_root)
+            if index is None:
+                return None
+            pairs: Counter = Counter()
+            for _, files in self._commits(index, since_days):
+                names = sorted({name for name, _, _ in files})
+                if len(names) < 2 or len(names) > MAX_COCHANGE_FILES:
+                    continue
+                if path is not None:
+                    if path in names:
+                        pairs.update(name for name in names if name != path)
+                    continue
+                pairs.update((a, b) for i, a in enumerate(names) for b in names[i + 1:])
+            return pairs
+
+    def file_commits(self, project_root: str, path: str, limit: int,
+                     since_days: int = 0) -> List[Tuple[str, str, int, str]]:
+        """path を変えたコミット（since_days 日以内）の (ハッシュ, 作者, 時刻, 件名) を新しい順に limit 件。"""
+        with self._lock:
+            index = self._update(project_root)
+            if index is None:
+                return []
+            commits = []
+            for commit, files in self._commits(index, since_days):
+                if any(name == path for name, _, _ in files):
+                    commits.append((commit[0], index['authors'][commit[1]], commit[2], commit[3]))
+                    if len(commits) >= limit:
+                        break
+            return commits
+
+    def stats(self, project_root: str) -> Dict[str, int]:
+        with self._lock:
+            index = self._update(project_root)
+            if index is None:
+                return {'commits': 0, 'authors': 0}
+            return {'commits': len(index['commits']), 'authors': len(index['authors'])}
+
+
+CHURN_INDEX = ChurnIndex()
@@ -0,0 +1,383 @@
+import bisect
+import hashlib
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from roots.state import cache_path, load_json, save_json
+
+# 解析の仕方を変えたら上げる（古いキャッシュを使わないため）
+COMPLEXITY_VERSION = 1
+COMPLEXITY_EXTENSIONS = {'.ts', '.tsx', '.js', '.jsx', '.mjs'}
+# これより短く、分岐も少ない関数（onClick={() => ...} など）は一覧に載せない
+MIN_FUNCTION_LINES = 3
+MIN_FUNCTION_COMPLEXITY = 3
+# 解析していないファイルがこれだけあるときは、プロセスを分けて並列に解析する
+PARALLEL_MIN_FILES = 200
+MAX_WORKERS = 8
+METRICS = ('complexity', 'length', 'nesting', 'hooks')
+
+_TOKEN = re.compile(
+    r"(?P<comment>//[^\n]*|/\*.*?\*/)"
+    r"|(?P<string>'(?:\\.|[^'\\\n])*'|\"(?:\\.|[^\"\\\n])*\"|`(?:\\.|[^`\\])*`)"
+    r"|(?P<word>[A-Za-z_$][\w$]*)"
+    r"|(?P<number>\d[\w.]*)"
+    r"|(?P<op>=>|&&|\|\||\?\?|\?\.|[{}()\[\];,?:=<>.*])",
+    re.DOTALL,
+)
+# 条件の括弧が続くときだけ分岐として数える（JSX のテキスト中の単語を数えないため）
+_BRANCHES = {'if', 'for', 'while', 'catch'}
+_CONTROL = {'if', 'for', 'while', 'switch', 'else', 'do', 'try', 'catch', 'finally'}
+_KEYWORDS = _CONTROL | {'function', 'return', 'typeof', 'new', 'await', 'yield', 'case', 'throw'}
+# メソッド名の直前に来るもの（class 本体・オブジェクトリテラルの中）
+_METHOD_PREFIX = {'{', '}', ';', ',', 'async', 'static', 'get', 'set', 'public', 'private',
+                  'protected', 'override', '*'}
+_ASSIGNED_WRAPPERS = 12
+
+
+def _tokens(content: str) -> Tuple[List[str], List[int]]:
+    """コメントを除いたトークンと、その開始位置。"""
+    texts, offsets = [], []
+    for match in _TOKEN.finditer(content):
+        kind = match.lastgroup
+        if kind == 'comment':
+            continue
+        # 文字列は中身を捨てて 1 つの記号にする（a ? 'x' : 'y' の ? を三項演算子と分かるように）
+        texts.append('""' if kind == 'string' else match.group(kind))
+        offsets.append(match.start())
+    return texts, offsets
+
+
+def _is_word(text: str) -> bool:
+    return bool(text) and (text[0].isalpha() or text[0] in '_$')
+
+
+def _kind(name: str, ext: str, method: bool) -> str:
+    if name.startswith('use') and name[3:4].isupper():
+        return 'hook'
+    if method:
+        return 'method'
+    if name[:1].isupper() and ext in ('.tsx', '.jsx'):
+        return 'component'
+    return 'function'
+
+
+class _Analyzer:
+    """トークン列を 1 回なめて、関数ごとの長さ・ネスト・循環的複雑度・フック呼び出し数を数える。"""
+
+    def __init__(self, content: str, ext: str):
+        self.ext = ext
+        self.texts, self.offsets = _tokens(content)
+        # 行番号は関数の始まりと終わりでだけ要るので、改行の位置から二分探索で求める
+        self.newlines = [m.start() for m in re.finditer('\n', content)]
+        # (閉じ括弧, 種類 'function' / 'class' / 'control' / 'block', 開いた位置, 関数・クラス)
+        self.stack: List[Tuple[str, str, int, Optional[dict]]] = []
+        self.frames: List[dict] = []
+        self.functions: List[dict] = []
+        self.parens = 0
+        self.matching: Dict[int, int] = {}
+
+    def _line(self, i: int) -> int:
+        return bisect.bisect_left(self.newlines, self.offsets[i]) + 1
+
+    def _text(self, i: int) -> str:
+        return self.texts[i] if 0 <= i < len(self.texts) else ''
+
+    def _assigned_name(self, j: int) -> Optional[str]:
+        """j が '=' のとき、const X = / X = の X。"""
+        for k in range(j - 1, max(j - _ASSIGNED_WRAPPERS, -1), -1):
+            if self.texts[k] in ('const', 'let', 'var') and _is_word(self._text(k + 1)):
+                return self.texts[k + 1]
+            if self.texts[k] in (';', '{', '}'):
+                break
+        previous = self._text(j - 1)
+        return previous if _is_word(previous) else None
+
+    def _name(self, start: int) -> Tuple[str, bool]:
+        """start から始まる関数式の名前と、それが呼び出しの引数（コールバック）か。"""
+        j = start - 1
+        if self._text(j) == 'async':
+            j -= 1
+        before = self._text(j)
+        if before == '=':
+            return self._assigned_name(j) or '(anonymous)', False
+        if before == ':' and _is_word(self._text(j - 1)):
+            return self.texts[j - 1], False
+        if before in ('(', ','):
+            # 呼び出しの引数: const fetchX = useCallback(...) は fetchX、useEffect(...) は useEffect
+            opener = next((entry[2] for entry in reversed(self.stack) if entry[0] == ')'), None)
+            if opener is not None and _is_word(self._text(opener - 1)):
+                callee = self.texts[opener - 1]
+                k = opener - 2
+                while self._text(k) == '.' and _is_word(self._text(k - 1)):
+                    k -= 2
+                if self._text(k) == '=':
+                    name = self._assigned_name(k)
+                    if name:
+                        return name, False
+                return (callee if callee.startswith('use') else f"{callee} callback"), True
+        return '(anonymous)', False
+
+    def _arrow_start(self, i: int) -> int:
+        """i の '=>' の引数部分の先頭の位置。"""
+        previous = self._text(i - 1)
+        if previous == ')':
+            return self.matching.get(i - 1, i - 1)
+        # 戻り値の型注釈 (): Promise<void> => の場合
+        for k in range(i - 1, max(i - 30, 0), -1):
+            if self.texts[k] == ')' and self._text(k + 1) == ':':
+                return self.matching.get(k, k)
+        return i - 1
+
+    def _open_function(self, i: int, closer: str, name: str, callback: bool, method: bool = False):
+        parent = self.frames[-1] if self.frames else None
+        if method:
+            # class Store { load() {} } のメソッドは Store.load
+            owner = next((entry for entry in reversed(self.stack) if entry[1] in ('class', 'function')), None)
+            if owner is not None and owner[1] == 'class':
+                name = f"{owner[3]['name']}.{name}"
+        title = f"{parent['title']} > {name}" if parent else name
+        frame = {'title': title, 'kind': 'callback' if callback else _kind(name, self.ext, method),
+                 'line': self._line(i), 'complexity': 1, 'depth': 0, 'nesting': 0, 'hooks': 0}
+        self.frames.append(frame)
+        self.stack.append((closer, 'function', i, frame))
+        if closer == ')':
+            self.parens += 1
+
+    def _close(self, i: int):
+        closer, kind, opened, frame = self.stack.pop()
+        if closer == ')':
+            self.parens -= 1
+            self.matching[i] = opened
+        if kind == 'control' and self.frames:
+            self.frames[-1]['depth'] -= 1
+        if kind == 'function':
+            self.frames.pop()
+            frame['end'] = self._line(i)
+            self.functions.append(frame)
+
+    def run(self) -> List[dict]:
+        texts = self.texts
+        pending_function: Optional[Tuple[int, str, bool]] = None
+        pending_method: Optional[str] = None
+        pending_control: Optional[int] = None
+        pending_arrow: Optional[Tuple[str, bool]] = None
+        pending_class: Optional[str] = None
+        for i, text in enumerate(texts):
+            frame = self.frames[-1] if self.frames else None
+            following = texts[i + 1] if i + 1 < len(texts) else ''
+
+            if pending_arrow is not None:
+                name, callback = pending_arrow
+                pending_arrow = None
+                if text in ('{', '('):
+                    self._open_function(i, '}' if text == '{' else ')', name, callback)
+                    continue
+
+            if text in ('{', '(', '['):
+                if text == '{' and pending_function is not None and pending_function[0] == self.parens:
+                    self._open_function(i, '}', pending_function[1], pending_function[2])
+                    pending_function = None
+                elif text == '{' and pending_class is not None:
+                    self.stack.append(('}', 'class', i, {'name': pending_class}))
+                    pending_class = None
+                elif text == '{' and pending_method is not None:
+                    self._open_function(i, '}', pending_method, False, method=True)
+                elif text == '{' and pending_control is not None and pending_control == self.parens:
+                    self.stack.append(('}', 'control', i, None))
+                    if frame is not None:
+                        frame['depth'] += 1
+                        frame['nesting'] = max(frame['nesting'], frame['depth'])
+                    pending_control = None
+                else:
+                    self.stack.append(({'{': '}', '(': ')', '[': ']'}[text], 'block', i, None))
+                    if text == '(':
+                        self.parens += 1
+                pending_method = None
+                continue
+            pending_method = None
+
+            if text in ('}', ')', ']'):
+                # 正規表現リテラルなどで括弧が崩れても、積んだものを一つずつ閉じて続ける
+                if self.stack:
+                    self._close(i)
+                if text == ')' and following == '{':
+                    opener = self.matching.get(i, i)
+                    name = self._text(opener - 1)
+                    if _is_word(name) and name not in _KEYWORDS and self._text(opener - 2) in _METHOD_PREFIX:
+                        pending_method = name
+                continue
+
+            if text == ';' and pending_control == self.parens:
+                pending_control = None
+            elif text == '=>':
+                pending_arrow = self._name(self._arrow_start(i))
+            elif text == 'class' and _is_word(following):
+                pending_class = following
+            elif text == 'function':
+                name = following if _is_word(following) else None
+                if name is None:
+                    name, callback = self._name(i)
+                else:
+                    callback = False
+                pending_function = (self.parens, name, callback)
+            elif frame is None:
+                continue
+            elif text in ('&&', '||', '??'):
+                frame['complexity'] += 1
+            elif text == '?' and following not in (':', ')', ',', '.', '='):
+                frame['complexity'] += 1
+            elif text == 'case' or (text in _BRANCHES and following in ('(', '{', 'await')):
+                frame['complexity'] += 1
+            if text in _CONTROL and (text not in _BRANCHES or following in ('(', '{', 'await')):
+                pending_control = self.parens
+            elif (frame is not None and text.startswith('use') and text[3:4].isupper()
+                  and following in ('(', '<') and self._text(i - 1) != 'function'):
+                frame['hooks'] += 1
+
+        while self.stack:
+            self._close(len(self.texts) - 1)
+        return self.functions
+
+
+def analyze_source(content: str, ext: str) -> dict:
+    """ファイルの行数と、関数ごとの指標（長さ・ネストの深さ・循環的複雑度・フック呼び出し数）。"""
+    functions = []
+    for frame in _Analyzer(content, ext).run():
+        length = frame['end'] - frame['line'] + 1
+        if length < MIN_FUNCTION_LINES and frame['complexity'] < MIN_FUNCTION_COMPLEXITY:
+            continue
+        functions.append({'title': frame['title'], 'kind': frame['kind'], 'line': frame['line'],
+                          'end': frame['end'], 'length': length, 'complexity': frame['complexity'],
+                          'nesting': frame['nesting'], 'hooks': frame['hooks']})
+    functions.sort(key=lambda f: f['line'])
+    return {'lines': content.count('\n') + (0 if content.endswith('\n') or not content else 1),
+            'functions': functions}
+
+
+def _analyze_job(job: Tuple[str, str]) -> dict:
+    """ワーカープロセスで実行する（引数と戻り値は pickle できるもの）。"""
+    return analyze_source(*job)
+
+
+def file_summary(path: str, metrics: dict) -> dict:
+    """ファイル単位の集計（関数の複雑度の合計・最大、最深のネスト、フック呼び出しの合計）。"""
+    functions = metrics['functions']
+    return {
+        'path': path,
+        'lines': metrics['lines'],
+        'functions': len(functions),
+        'complexity': sum(f['complexity'] for f in functions),
+        'max_complexity': max((f['complexity'] for f in functions), default=0),
+        'nesting': max((f['nesting'] for f in functions), default=0),
+        'hooks': sum(f['hooks'] for f in functions),
+    }
+
+
+class ComplexityIndex:
+    """
+    TS/TSX/JS ファイルの関数ごとの複雑さの指標を保持する索引。
+
+    - 指標はファイル内容のハッシュごとに cache_dir() の index/complexity/ にキャッシュし、
+      問い合わせのたびに mtime とサイズが変わったファイルだけ計算し直す
+    - キャッシュのないファイルが多いとき（初回）は、spawn したプロセスで並列に解析する
+    - ランキングは集計済みの数値だけで作るので、ソースを LLM に渡さずに済む
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._files: Dict[str, dict] = {}
+
+    def refresh(self, paths: List[str]) -> bool:
+        """索引を paths の現在の内容に合わせる。変わったものがあれば True。"""
+        changed = False
+        current = set(paths)
+        for path in list(self._files):
+            if path not in current:
+                del self._files[path]
+                changed = True
+
+        pending: List[Tuple[str, tuple, str, str, str]] = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature = (stat.st_mtime_ns, stat.st_size)
+            entry = self._files.get(path)
+            if entry is not None and entry['signature'] == signature:
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    content = f.read()
+            except OSError:
+                continue
+            digest = hashlib.sha1(content.encode('utf-8')).hexdigest()
+            if entry is not None and entry['digest'] == digest:
+                entry['signature'] = signature
+                continue
+            ext = os.path.splitext(path)[1].lower()
+            cached = load_json(cache_path('index', 'complexity', f"{digest}{ext}.json"), default=None)
+            if isinstance(cached, dict) and cached.get('version') == COMPLEXITY_VERSION:
+                self._files[path] = {'signature': signature, 'digest': digest, 'metrics': cached['metrics']}
+                changed = True
+                continue
+            pending.append((path, signature, digest, ext, content))
+
+        for (path, signature, digest, ext, _), metrics in zip(pending, self._analyze(pending)):
+            save_json(cache_path('index', 'complexity', f"{digest}{ext}.json"),
+                      {'version': COMPLEXITY_VERSION, 'metrics': metrics})
+            self._files[path] = {'signature': signature, 'digest': digest, 'metrics': metrics}
+            changed = True
+        return changed
+
+    @staticmethod
+    def _analyze(pending: List[tuple]) -> List[dict]:
+        jobs = [(content, ext) for _, _, _, ext, content in pending]
+        workers = min(os.cpu_count() or 1, MAX_WORKERS)
+        if len(jobs) < PARALLEL_MIN_FILES or workers < 2:
+            return [_analyze_job(job) for job in jobs]
+
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # crewAI はスレッドを使うので fork ではなく spawn でワーカーを起動する
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            return list(pool.map(_analyze_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+    def file_metrics(self, paths: List[str], path: str) -> Optional[dict]:
+        with self._lock:
+            self.refresh(paths)
+            entry = self._files.get(path)
+            return entry['metrics'] if entry is not None else None
+
+    def files(self, paths: List[str]) -> List[dict]:
+        """ファイル単位の集計（file_summary）のリスト。"""
+        with self._lock:
+            self.refresh(paths)
+            return [file_summary(path, self._files[path]['metrics']) for path in sorted(self._files)]
+
+    def functions(self, paths: List[str]) -> List[Tuple[str, dict]]:
+        """すべての関数の (ファイル, 指標)。"""
+        with self._lock:
+            self.refresh(paths)
+            return [(path, function) for path in sorted(self._files)
+                    for function in self._files[path]['metrics']['functions']]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'files': len(self._files),
+                    'functions': sum(len(e['metrics']['functions']) for e in self._files.values())}
+
+
+def source_files(project_root: str) -> List[str]:
+    """解析するファイル（コード検索と同じ範囲の TS/TSX/JS）。"""
+    from roots.tools.code_search import code_files
+
+    return [path for path in code_files(project_root)
+            if os.path.splitext(path)[1].lower() in COMPLEXITY_EXTENSIONS]
+
+
+COMPLEXITY_INDEX = ComplexityIndex()
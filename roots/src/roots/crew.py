@@ -1,7 +1,12 @@
+import functools
+
 from crewai import Agent, Crew, Process, Task
-from crewai.project import CrewBase, agent, crew, task
+from crewai.project import CrewBase, agent, before_kickoff, crew, task
 from crewai.agents.agent_builder.base_agent import BaseAgent
-from typing import List
+from crewai.llms.base_llm import BaseLLM
+from crewai.tools import BaseTool
+from crewai.utilities.llm_utils import create_llm
+from typing import List, Optional, Type
 
 from roots.tools.file_reader import FileReaderTool
 from roots.tools.file_writer import FileWriterTool
@@ -9,6 +14,41 @@ from roots.tools.directory_explorer import DirectoryExplorerTool
 from roots.tools.shell_runner import ShellRunnerTool
 from roots.tools.grep_search import GrepSearchTool
 from roots.tools.supabase_query import SupabaseSchemaExplorerTool
+from roots.tools.knowledge_search import KnowledgeSearchTool
+from roots.tools.code_search import CodeChunkSearchTool
+from roots.tools.spreadsheet_reader import SpreadsheetReaderTool
+from roots.tools.pdf_reader import PdfReaderTool
+from roots.tools.duplicate_code import DuplicateCodeTool
+from roots.tools.import_graph import ImportGraphTool
+from roots.tools.complexity_report import ComplexityReportTool
+from roots.tools.git_history import GitHistoryTool
+from roots.tools.past_findings import PastFindingsTool
+from roots.dag import DagCrew, DEFAULT_MAX_CONCURRENCY, upstream_closure
+from roots.digest import project_digest
+
+
+# 全エージェントの backstory に {agent_guidance} として入れる、ツールの使い方の指示。
+# 直後に {project_digest} が続く（YAML の折り返しと同じく文の間は半角スペース）
+AGENT_GUIDANCE = (
+    "監査対象プロジェクトの概要（コミットごとに自動生成）は以下のとおり。 "
+    "ディレクトリ構成や依存パッケージを調べる前に、まずこの概要を参照すること。 "
+    "ファイルを調べ直す前に Search Past Findings で過去の監査の指摘を確認し、 "
+    "変わっていない指摘はそのまま活用すること。 "
+    "実装箇所を探すときは、正規表現を何度も試す前に Search Code Chunks に自然文で聞くこと。"
+)
+
+
+@functools.lru_cache(maxsize=None)
+def shared_tool(tool_class: Type[BaseTool]) -> BaseTool:
+    """
+    ツールは 1 種類につき 1 つのインスタンスを全エージェント・全スレッドで共有する。
+
+    インスタンスが持つ状態は crewAI の BaseTool の使用回数（current_usage_count）だけで、
+    共有すると全エージェントの合計になる（ロックなしで加算されるので並列時は概数）。
+    回数で呼び出しを止める max_usage_count はどのツールにも設定しないこと。
+    索引やキャッシュはインスタンスではなくモジュールのシングルトンに置いている。
+    """
+    return tool_class()
 
 
 @CrewBase
@@ -18,13 +58,56 @@ class Roots():
     agents: List[BaseAgent]
     tasks: List[Task]
 
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 llm: Optional[BaseLLM] = None,
+                 task_names: Optional[List[str]] = None,
+                 map_reduce: bool = True):
+        # 同時に実行するタスク数の上限（1 で従来の sequential 実行）
+        self.max_concurrency = max_concurrency
+        # 全エージェント共通の LLM（None なら環境変数 MODEL の既定モデル）。
+        # LLM 応答の記録・再生（roots.llm_replay）で差し替える
+        self.llm = llm
+        # 実行するタスク（None なら全タスク）。上流タスクは自動的に含まれる
+        self.task_names = task_names
+        # 統合レポートに上流タスクの出力全文ではなく、要約して重複をまとめた指摘を渡す
+        self.map_reduce = map_reduce
+
+    def shared_llm(self) -> BaseLLM:
+        """
+        全エージェントで 1 つの LLM を共有する。
+        エージェントごとに既定モデルを作ると、そのたびに HTTP クライアントと
+        SSL コンテキストが初期化され、起動が 1 エージェントあたり約 0.1 秒遅くなる。
+        """
+        if self.llm is None:
+            self.llm = create_llm(None)
+        return self.llm
+
+    @before_kickoff
+    def add_project_digest(self, inputs):
+        """全エージェントの backstory に埋め込む共通の指示とプロジェクト概要（コミットごとにキャッシュ）。"""
+        if inputs is not None:
+            inputs.setdefault('agent_guidance', AGENT_GUIDANCE)
+            if 'project_digest' not in inputs:
+                inputs['project_digest'] = project_digest(inputs['project_root'])
+        return inputs
+
     # === Agents ===
 
     @agent
     def project_manager(self) -> Agent:
         return Agent(
             config=self.agents_config['project_manager'],
-            tools=[FileReaderTool(), DirectoryExplorerTool(), GrepSearchTool()],
+            llm=self.shared_llm(),
+            tools=[
+                shared_tool(FileReaderTool),
+                shared_tool(DirectoryExplorerTool),
+                shared_tool(GrepSearchTool),
+                shared_tool(CodeChunkSearchTool),
+                shared_tool(ImportGraphTool),
+                shared_tool(ComplexityReportTool),
+                shared_tool(GitHistoryTool),
+                shared_tool(PastFindingsTool)
+            ],
             verbose=True,
             allow_delegation=True
         )
@@ -33,11 +116,18 @@ class Roots():
     def frontend_developer(self) -> Agent:
         return Agent(
             config=self.agents_config['frontend_developer'],
+            llm=self.shared_llm(),
             tools=[
-                FileReaderTool(),
-                FileWriterTool(),
-                DirectoryExplorerTool(),
-                GrepSearchTool()
+                shared_tool(FileReaderTool),
+                shared_tool(FileWriterTool),
+                shared_tool(DirectoryExplorerTool),
+                shared_tool(GrepSearchTool),
+                shared_tool(CodeChunkSearchTool),
+                shared_tool(DuplicateCodeTool),
+                shared_tool(ImportGraphTool),
+                shared_tool(ComplexityReportTool),
+                shared_tool(GitHistoryTool),
+                shared_tool(PastFindingsTool)
             ],
             verbose=True
         )
@@ -46,11 +136,17 @@ class Roots():
     def backend_developer(self) -> Agent:
         return Agent(
             config=self.agents_config['backend_developer'],
+            llm=self.shared_llm(),
             tools=[
-                FileReaderTool(),
-                FileWriterTool(),
-                ShellRunnerTool(),
-                SupabaseSchemaExplorerTool()
+                shared_tool(FileReaderTool),
+                shared_tool(FileWriterTool),
+                shared_tool(ShellRunnerTool),
+                shared_tool(SupabaseSchemaExplorerTool),
+                shared_tool(CodeChunkSearchTool),
+                shared_tool(ImportGraphTool),
+                shared_tool(ComplexityReportTool),
+                shared_tool(GitHistoryTool),
+                shared_tool(PastFindingsTool)
             ],
             verbose=True
         )
@@ -59,7 +155,15 @@ class Roots():
     def design_reviewer(self) -> Agent:
         return Agent(
             config=self.agents_config['design_reviewer'],
-            tools=[FileReaderTool(), GrepSearchTool(), DirectoryExplorerTool()],
+            llm=self.shared_llm(),
+            tools=[
+                shared_tool(FileReaderTool),
+                shared_tool(GrepSearchTool),
+                shared_tool(DirectoryExplorerTool),
+                shared_tool(CodeChunkSearchTool),
+                shared_tool(DuplicateCodeTool),
+                shared_tool(PastFindingsTool)
+            ],
             verbose=True
         )
 
@@ -67,7 +171,17 @@ class Roots():
     def manual_checker(self) -> Agent:
         return Agent(
             config=self.agents_config['manual_checker'],
-            tools=[FileReaderTool(), GrepSearchTool(), DirectoryExplorerTool()],
+            llm=self.shared_llm(),
+            tools=[
+                shared_tool(FileReaderTool),
+                shared_tool(GrepSearchTool),
+                shared_tool(DirectoryExplorerTool),
+                shared_tool(KnowledgeSearchTool),
+                shared_tool(SpreadsheetReaderTool),
+                shared_tool(PdfReaderTool),
+                shared_tool(CodeChunkSearchTool),
+                shared_tool(PastFindingsTool)
+            ],
             verbose=True
         )
 
@@ -75,7 +189,16 @@ class Roots():
     def compliance_officer(self) -> Agent:
         return Agent(
             config=self.agents_config['compliance_officer'],
-            tools=[FileReaderTool(), GrepSearchTool()],
+            llm=self.shared_llm(),
+            tools=[
+                shared_tool(FileReaderTool),
+                shared_tool(GrepSearchTool),
+                shared_tool(KnowledgeSearchTool),
+                shared_tool(SpreadsheetReaderTool),
+                shared_tool(PdfReaderTool),
+                shared_tool(CodeChunkSearchTool),
+                shared_tool(PastFindingsTool)
+            ],
             verbose=True
         )
 
@@ -83,7 +206,14 @@ class Roots():
     def qa_engineer(self) -> Agent:
         return Agent(
             config=self.agents_config['qa_engineer'],
-            tools=[ShellRunnerTool(), FileReaderTool(), GrepSearchTool()],
+            llm=self.shared_llm(),
+            tools=[
+                shared_tool(ShellRunnerTool),
+                shared_tool(FileReaderTool),
+                shared_tool(GrepSearchTool),
+                shared_tool(CodeChunkSearchTool),
+                shared_tool(PastFindingsTool)
+            ],
             verbose=True
         )
 
@@ -137,10 +267,24 @@ class Roots():
     @crew
     def crew(self) -> Crew:
         """Creates the Roots autonomous development team"""
-        return Crew(
-            agents=self.agents,
-            tasks=self.tasks,
+        tasks = self.tasks
+        if self.task_names:
+            tasks = upstream_closure(tasks, self.task_names)
+        # 選択されたタスクを担当するエージェントだけで crew を組む
+        roles = {task.agent.role for task in tasks if task.agent is not None}
+        agents = [a for a in self.agents if a.role in roles]
+
+        return DagCrew(
+            agents=agents,
+            tasks=tasks,
             process=Process.sequential,
             verbose=True,
+            # crewAI's memory needs an embedding service; past findings are kept
+            # in roots.memory instead and searched with the Search Past Findings tool.
             memory=False,
+            # crewAI's own tool cache never expires; the read-only tools are
+            # memoized in roots.tools.cache with write-aware invalidation.
+            cache=False,
+            max_concurrency=self.max_concurrency,
+            synthesis_tasks=['synthesis_report'] if self.map_reduce else [],
         )
@@ -0,0 +1,291 @@
+import contextvars
+import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from crewai import Crew, Task
+from crewai.crews.crew_output import CrewOutput
+from crewai.crews.utils import prepare_task_execution
+from crewai.llms.base_llm import BaseLLM
+from crewai.tasks.task_output import TaskOutput
+from crewai.types.usage_metrics import UsageMetrics
+from pydantic import Field
+
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+def task_dependencies(tasks: List[Task]) -> Dict[str, List[str]]:
+    """
+    各タスクが依存する上流タスク名を返す。
+
+    tasks.yaml の `context` が指定されていればそれに従い、
+    未指定のタスクは従来の sequential と同じく、それ以前の全タスクに依存する。
+    """
+    deps: Dict[str, List[str]] = {}
+    seen: List[str] = []
+    for task in tasks:
+        if isinstance(task.context, list):
+            deps[task.name] = [t.name for t in task.context]
+        else:
+            deps[task.name] = list(seen)
+        seen.append(task.name)
+
+    for name, upstream in deps.items():
+        unknown = [u for u in upstream if u not in deps]
+        if unknown:
+            raise ValueError(f"Task '{name}' depends on unknown tasks: {unknown}")
+    return deps
+
+
+def upstream_closure(tasks: List[Task], names: List[str]) -> List[Task]:
+    """names のタスクと、その上流タスクすべてを宣言順に返す。"""
+    deps = task_dependencies(tasks)
+    unknown = [n for n in names if n not in deps]
+    if unknown:
+        raise ValueError(f"Unknown tasks: {unknown} (available: {list(deps)})")
+
+    selected: Set[str] = set()
+    pending = list(names)
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending.extend(deps[name])
+    return [t for t in tasks if t.name in selected]
+
+
+def critical_path(tasks: List[Task]) -> Dict[str, int]:
+    """
+    各タスクから最終タスクまでの最長の依存チェーンの長さ（自身を含むタスク数）。
+    値が大きいタスクほど全体の完了時間を左右するので、先に実行する。
+    """
+    deps = task_dependencies(tasks)
+    dependents: Dict[str, List[str]] = {name: [] for name in deps}
+    for name, upstream in deps.items():
+        for u in upstream:
+            dependents[u].append(name)
+
+    lengths: Dict[str, int] = {}
+
+    def length(name: str) -> int:
+        if name not in lengths:
+            lengths[name] = 1 + max((length(d) for d in dependents[name]), default=0)
+        return lengths[name]
+
+    return {task.name: length(task.name) for task in tasks}
+
+
+class DagCrew(Crew):
+    """
+    タスクの依存関係 (DAG) に従い、独立したタスクを並列実行する Crew。
+
+    max_concurrency が 1 以下で再利用・追加コンテキスト・チェックポイント・
+    統合タスクの指定もない場合は crewAI 標準の sequential 実行になる。
+    同じエージェントを使うタスクは同時には実行しない。
+
+    synthesis_tasks のタスクには、上流タスクの出力全文ではなく、各出力を構造化した指摘に
+    要約し（上流タスクが終わるたびに並列に実行）、重複をまとめた一覧を渡す。
+    findings_memory を指定すると、統合タスク以外の全タスクの指摘を要約して記録する。
+    """
+
+    max_concurrency: int = Field(
+        default=DEFAULT_MAX_CONCURRENCY,
+        description="Maximum number of tasks executed at the same time"
+    )
+    reuse_outputs: Dict[str, TaskOutput] = Field(
+        default_factory=dict,
+        description="Outputs of tasks that are not executed again, by task name"
+    )
+    task_notes: Dict[str, str] = Field(
+        default_factory=dict,
+        description="Extra context prepended to a task's context, by task name"
+    )
+    checkpoint: Optional[Any] = Field(
+        default=None,
+        description="CheckpointStore that saves each finished task and restores them on resume"
+    )
+    synthesis_tasks: List[str] = Field(
+        default_factory=list,
+        description="Tasks that receive the merged findings of their upstream tasks instead of their full outputs"
+    )
+    findings_memory: Optional[Any] = Field(
+        default=None,
+        description="FindingsMemory that records the findings extracted from each task's output"
+    )
+
+    def _run_sequential_process(self) -> CrewOutput:
+        if (self.max_concurrency <= 1 and not self.reuse_outputs and not self.task_notes
+                and self.checkpoint is None and not self.synthesis_tasks
+                and self.findings_memory is None):
+            return super()._run_sequential_process()
+        return self._execute_dag()
+
+    def calculate_usage_metrics(self) -> UsageMetrics:
+        """
+        crewAI 標準はエージェントごとに agent.llm の使用量を足すが、Roots は全エージェントで
+        1 つの LLM を共有する（Roots.shared_llm）ので、同じ LLM オブジェクトは 1 回だけ数える。
+        """
+        total = UsageMetrics()
+        counted: Set[int] = set()
+        agents = list(self.agents) + ([self.manager_agent] if self.manager_agent else [])
+        for agent in agents:
+            llm = getattr(agent, 'llm', None)
+            if isinstance(llm, BaseLLM):
+                if id(llm) not in counted:
+                    counted.add(id(llm))
+                    total.add_usage_metrics(llm.get_token_usage_summary())
+            elif hasattr(agent, '_token_process'):
+                total.add_usage_metrics(agent._token_process.get_summary())
+        return total
+
+    def _execute_dag(self) -> CrewOutput:
+        deps = task_dependencies(self.tasks)
+        outputs: Dict[str, TaskOutput] = {}
+        for task in self.tasks:
+            if task.name in self.reuse_outputs:
+                task.output = self.reuse_outputs[task.name]
+                outputs[task.name] = task.output
+
+        fingerprints: Dict[str, str] = {}
+        if self.checkpoint is not None:
+            from roots.checkpoint import task_fingerprints
+
+            # 入力の補間後に計算する（kickoff の inputs もフィンガープリントに含まれる）
+            fingerprints = task_fingerprints(
+                self.tasks, deps, self._get_agent_to_use, self.checkpoint.base,
+                self.reuse_outputs, self.task_notes
+            )
+            if self.checkpoint.resume:
+                for task in self.tasks:
+                    if task.name in outputs:
+                        continue
+                    restored = self.checkpoint.load(task, fingerprints[task.name])
+                    if restored is not None:
+                        task.output = restored
+                        outputs[task.name] = restored
+        # 実行可能なタスクが複数あればクリティカルパスの長いものから始める
+        remaining = critical_path(self.tasks)
+        pending: List[Task] = sorted(
+            (t for t in self.tasks if t.name not in outputs), key=lambda t: -remaining[t.name]
+        )
+        # 実行中のタスクと、その実行のために busy_agents に入れたエージェントの role
+        running: Dict[Future, Tuple[Task, str]] = {}
+        busy_agents: Set[str] = set()
+
+        # 統合タスクの上流タスクは、終わるたびに指摘の要約（map）を始める
+        synthesis = [t for t in self.tasks if t.name in self.synthesis_tasks
+                     and self._get_agent_to_use(t) is not None]
+        synthesis_names = {t.name for t in synthesis}
+        summarized = {u for t in synthesis for u in deps[t.name]}
+        if self.findings_memory is not None:
+            summarized |= {t.name for t in self.tasks if t.name not in synthesis_names}
+        extractor = None
+        if summarized:
+            from roots.findings import FindingsExtractor
+
+            # 要約には統合タスク（なければ最初の要約対象のタスク）のエージェントの LLM を使う
+            owner = synthesis[0] if synthesis else next(t for t in self.tasks if t.name in summarized)
+            extractor = FindingsExtractor(self._get_agent_to_use(owner).llm)
+        summaries: Dict[str, Future] = {}
+
+        with ThreadPoolExecutor(max_workers=max(self.max_concurrency, 1),
+                                thread_name_prefix="roots-task") as pool, \
+                ThreadPoolExecutor(max_workers=max(len(summarized), 1),
+                                   thread_name_prefix="roots-findings") as map_pool:
+
+            def extract(task: Task, output: TaskOutput, record: bool) -> dict:
+                result = extractor.extract(task, output)
+                if record and self.findings_memory is not None:
+                    # 長期記憶は補助なので、記録に失敗しても監査は止めない
+                    try:
+                        self.findings_memory.record(task.name, result)
+                    except Exception as e:
+                        print(f"長期記憶への記録に失敗しました（{task.name}）: {e}", file=sys.stderr)
+                return result
+
+            def summarize(task: Task, output: TaskOutput, record: bool = True):
+                if task.name in summarized and task.name not in summaries:
+                    summaries[task.name] = map_pool.submit(
+                        contextvars.copy_context().run, extract, task, output, record
+                    )
+
+            # 再利用した出力は以前のファイル内容に対するものなので、記憶には記録し直さない
+            for task in self.tasks:
+                if task.name in outputs:
+                    summarize(task, outputs[task.name], record=False)
+
+            failure: Optional[BaseException] = None
+            while (pending and failure is None) or running:
+                for task in list(pending) if failure is None else []:
+                    if len(running) >= max(self.max_concurrency, 1):
+                        break
+                    if any(u not in outputs for u in deps[task.name]):
+                        continue
+                    if task.name in synthesis_names and any(
+                            not summaries[u].done() for u in deps[task.name]):
+                        continue
+                    agent = self._get_agent_to_use(task)
+                    if agent is not None and agent.role in busy_agents:
+                        continue
+
+                    index = self.tasks.index(task)
+                    exec_data, _, _ = prepare_task_execution(
+                        self, task, index, 0, [], None
+                    )
+                    if task.name in synthesis_names:
+                        context = self._merged_findings(
+                            {u: summaries[u].result() for u in deps[task.name]}
+                        )
+                    else:
+                        context = self._get_context(
+                            task, [outputs[u] for u in deps[task.name]]
+                        )
+                    note = self.task_notes.get(task.name)
+                    if note:
+                        context = f"{note}\n\n{context}" if context else note
+                    # 各タスクに呼び出し元のコンテキスト（crewAI のイベントスコープ等）を引き継ぐ
+                    future = pool.submit(
+                        contextvars.copy_context().run,
+                        task.execute_sync,
+                        agent=exec_data.agent,
+                        context=context,
+                        tools=exec_data.tools,
+                    )
+                    running[future] = (task, exec_data.agent.role)
+                    busy_agents.add(exec_data.agent.role)
+                    pending.remove(task)
+
+                mapping = {f for f in summaries.values() if not f.done()} if failure is None else set()
+                if not running and not mapping:
+                    names = [t.name for t in pending]
+                    raise ValueError(f"Unresolvable task dependencies: {names}")
+
+                done, _ = wait(set(running) | mapping, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future not in running:
+                        continue
+                    task, role = running.pop(future)
+                    busy_agents.discard(role)
+                    try:
+                        output = future.result()
+                    except Exception as e:
+                        # 新しいタスクは始めず、実行中のタスクは完了を待って結果を残す
+                        failure = failure or e
+                        continue
+                    outputs[task.name] = output
+                    self._process_task_result(task, output)
+                    self._store_execution_log(task, output, self.tasks.index(task))
+                    if self.checkpoint is not None:
+                        self.checkpoint.save(task, output, fingerprints[task.name])
+                    summarize(task, output)
+
+        if failure is not None:
+            raise failure
+        return self._create_crew_output([outputs[t.name] for t in self.tasks])
+
+    @staticmethod
+    def _merged_findings(per_task: Dict[str, dict]) -> str:
+        """上流タスクの指摘をまとめ（reduce）、統合タスクのコンテキストにする。"""
+        from roots.findings import merge_findings, render_findings
+
+        return render_findings(per_task, merge_findings(per_task))
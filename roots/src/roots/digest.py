@@ -0,0 +1,215 @@
+import hashlib
+import os
+import re
+import subprocess
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from roots.history import git_head
+from roots.state import cache_path, load_json, save_json
+
+# 生成ロジックを変えたら上げる（古いキャッシュを使わないため）
+DIGEST_VERSION = 1
+
+SKIP_DIRS = {'node_modules', '.git', '.next', 'dist', 'build', 'coverage',
+             '.agent_backups', '.roots', '__pycache__', '.venv', '.turbo', '.vercel'}
+# プロジェクト直下でも監査対象外のディレクトリ（Roots 自身）
+SKIP_TOP_LEVEL = {'roots'}
+LINE_COUNT_EXTENSIONS = {'.ts', '.tsx', '.js', '.jsx', '.mjs', '.sql', '.md', '.css',
+                         '.json', '.py', '.yaml', '.yml', '.sh'}
+
+MAX_DIR_DEPTH = 3
+MAX_DIR_ENTRIES = 80
+MAX_LARGEST_FILES = 15
+MAX_RECENT_COMMITS = 15
+MAX_ROUTES = 150
+
+_CREATE_TABLE = re.compile(
+    r'create\s+table\s+(?:if\s+not\s+exists\s+)?(?:public\.)?"?(\w+)"?', re.IGNORECASE)
+_DROP_TABLE = re.compile(
+    r'drop\s+table\s+(?:if\s+exists\s+)?(?:public\.)?"?(\w+)"?', re.IGNORECASE)
+
+
+def _scan(project_root: str) -> List[dict]:
+    """プロジェクト内のファイル（相対パス・サイズ・行数）を列挙する。"""
+    files = []
+    for root, dirs, names in os.walk(project_root):
+        rel_root = os.path.relpath(root, project_root)
+        dirs[:] = sorted(
+            d for d in dirs
+            if d not in SKIP_DIRS and not (rel_root == '.' and d in SKIP_TOP_LEVEL)
+        )
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            lines = 0
+            if os.path.splitext(name)[1] in LINE_COUNT_EXTENSIONS:
+                try:
+                    with open(path, 'rb') as f:
+                        lines = sum(1 for _ in f)
+                except OSError:
+                    pass
+            rel = os.path.normpath(os.path.join(rel_root, name))
+            files.append({'path': rel.replace(os.sep, '/'), 'size': size, 'lines': lines})
+    return files
+
+
+def _format_size(size: int) -> str:
+    if size >= 1024 * 1024:
+        return f"{size / 1024 / 1024:.1f} MB"
+    return f"{size / 1024:.0f} KB"
+
+
+def _directory_map(files: List[dict]) -> List[str]:
+    totals: Dict[str, List[int]] = defaultdict(lambda: [0, 0, 0])
+    for f in files:
+        parts = f['path'].split('/')[:-1]
+        for depth in range(1, min(len(parts), MAX_DIR_DEPTH) + 1):
+            t = totals['/'.join(parts[:depth])]
+            t[0] += 1
+            t[1] += f['lines']
+            t[2] += f['size']
+
+    lines = []
+    for path in sorted(totals)[:MAX_DIR_ENTRIES]:
+        count, line_count, size = totals[path]
+        indent = "  " * path.count('/')
+        lines.append(f"{indent}{path}/  {count} files, {line_count:,} lines, {_format_size(size)}")
+    if len(totals) > MAX_DIR_ENTRIES:
+        lines.append(f"（他 {len(totals) - MAX_DIR_ENTRIES} ディレクトリ）")
+    return lines
+
+
+def _dependencies(project_root: str) -> List[str]:
+    package = load_json(os.path.join(project_root, 'package.json'), default=None)
+    if not isinstance(package, dict):
+        return ["（package.json なし）"]
+    lines = []
+    for key in ('dependencies', 'devDependencies'):
+        deps = package.get(key) or {}
+        if deps:
+            lines.append(f"{key}: " + ", ".join(f"{name}@{version}" for name, version in sorted(deps.items())))
+    scripts = package.get('scripts') or {}
+    if scripts:
+        lines.append("scripts: " + ", ".join(sorted(scripts)))
+    return lines or ["（依存パッケージなし）"]
+
+
+def _recent_commits(project_root: str) -> List[str]:
+    try:
+        result = subprocess.run(
+            ['git', 'log', f'-{MAX_RECENT_COMMITS}', '--date=short', '--format=%h %ad %s', '--', '.'],
+            cwd=project_root, capture_output=True, text=True, timeout=30
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return ["（git 履歴なし）"]
+    if result.returncode != 0:
+        return ["（git 履歴なし）"]
+    return result.stdout.splitlines() or ["（コミットなし）"]
+
+
+def _largest_files(files: List[dict]) -> List[str]:
+    source = [f for f in files if f['lines'] and not f['path'].endswith(('.json', '.md'))]
+    ranked = sorted(source, key=lambda f: -f['lines'])[:MAX_LARGEST_FILES]
+    return [f"{f['path']}  {f['lines']:,} lines" for f in ranked]
+
+
+def _route_path(parts: List[str]) -> str:
+    # (group) はURLに現れない
+    return '/' + '/'.join(p for p in parts if not (p.startswith('(') and p.endswith(')')))
+
+
+def _routes(files: List[dict]) -> List[str]:
+    pages, apis = [], []
+    for f in files:
+        parts = f['path'].split('/')
+        if 'app' not in parts[:2]:
+            continue
+        inner = parts[parts.index('app') + 1:]
+        name = os.path.splitext(inner[-1])[0]
+        if name == 'page':
+            pages.append(_route_path(inner[:-1]))
+        elif name == 'route':
+            apis.append(_route_path(inner[:-1]))
+
+    lines = []
+    for label, routes in (('pages', pages), ('api', apis)):
+        routes = sorted(set(routes))
+        shown = routes[:MAX_ROUTES]
+        more = f" （他 {len(routes) - len(shown)} 件）" if len(routes) > len(shown) else ""
+        lines.append(f"{label} ({len(routes)}): " + ", ".join(shown) + more)
+    return lines
+
+
+def _schema_tables(project_root: str, files: List[dict]) -> List[str]:
+    migrations = sorted(
+        f['path'] for f in files
+        if f['path'].endswith('.sql') and '/migrations/' in f"/{f['path']}"
+    )
+    tables = set()
+    for path in migrations:
+        try:
+            with open(os.path.join(project_root, path), 'r', encoding='utf-8', errors='ignore') as fh:
+                sql = fh.read()
+        except OSError:
+            continue
+        tables.update(m.lower() for m in _CREATE_TABLE.findall(sql))
+        tables.difference_update(m.lower() for m in _DROP_TABLE.findall(sql))
+    if not migrations:
+        return ["（マイグレーションなし）"]
+    return [f"{len(migrations)} migrations, {len(tables)} tables: " + ", ".join(sorted(tables))]
+
+
+def build_digest(project_root: str, commit: Optional[str] = None) -> str:
+    """プロジェクトの概要（ディレクトリ構成・依存・最近のコミット・大きいファイル・ルート・テーブル）。"""
+    files = _scan(project_root)
+    label = f"コミット {commit[:10]} 時点" if commit else "git 管理外"
+    sections = [
+        (f"ディレクトリ構成（{len(files)} files）", _directory_map(files)),
+        ("依存パッケージ", _dependencies(project_root)),
+        ("最近のコミット", _recent_commits(project_root)),
+        ("行数の多いファイル", _largest_files(files)),
+        ("ルート（src/app）", _routes(files)),
+        ("DB テーブル（マイグレーションから抽出）", _schema_tables(project_root, files)),
+    ]
+    lines = [f"## プロジェクト概要（{label}、自動生成）"]
+    for title, body in sections:
+        lines += ["", f"### {title}", *body]
+    return "\n".join(lines)
+
+
+def _repo_prefix(project_root: str) -> str:
+    """リポジトリのルートから見たプロジェクトのディレクトリ（ルートなら空文字）。"""
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', '--show-prefix'],
+            cwd=project_root, capture_output=True, text=True, timeout=30
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return ''
+    return result.stdout.strip() if result.returncode == 0 else ''
+
+
+def project_digest(project_root: str) -> str:
+    """
+    コミットごとに一度だけ build_digest を実行し、結果を cache_dir() の digest/ にキャッシュする。
+    キーはコミットとリポジトリ内でのプロジェクトの位置だけで、チェックアウトの場所は含めないので、
+    同じコミットの別のチェックアウト（batch の各リポジトリ等）とも共有する。
+    未コミットの変更は反映しない。git 管理外のプロジェクトでは毎回生成する。
+    """
+    commit = git_head(project_root)
+    if commit is None:
+        return build_digest(project_root)
+
+    key = hashlib.sha1(f"{commit}:{_repo_prefix(project_root)}".encode()).hexdigest()
+    path = cache_path('digest', f"{key}.json")
+    cached = load_json(path, default=None)
+    if isinstance(cached, dict) and cached.get('version') == DIGEST_VERSION:
+        return cached['digest']
+
+    digest = build_digest(project_root, commit)
+    save_json(path, {'version': DIGEST_VERSION, 'commit': commit, 'digest': digest})
+    return digest
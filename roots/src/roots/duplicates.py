@@ -0,0 +1,242 @@
+import hashlib
+import os
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from roots.state import cache_path, load_json, save_json
+from roots.tools.code_search import chunk_source, code_files
+
+# トークン化・シングル・ハッシュを変えたら上げる（古い署名を使わないため）
+DUPLICATES_VERSION = 1
+SHINGLE_SIZE = 5
+NUM_PERMUTATIONS = 128
+# 32 バンド × 4 行: 類似度 0.5 のペアの約 87%、0.7 以上のペアはほぼすべてが候補になる
+LSH_BANDS = 32
+# これより短い関数は定型コードばかりなので比べない
+MIN_TOKENS = 40
+# 1 つのバケットで代表を選び直す回数の上限
+MAX_BUCKET_ROUNDS = 16
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_MIN_LINES = 8
+UNIT_KINDS = {'function', 'component', 'hook', 'class'}
+
+_TOKEN = re.compile(
+    r"(?P<comment>//[^\n]*|/\*.*?\*/)"
+    r"|(?P<string>'(?:\\.|[^'\\\n])*'|\"(?:\\.|[^\"\\\n])*\"|`(?:\\.|[^`\\])*`)"
+    r"|(?P<number>\d[\d_]*(?:\.\d+)?)"
+    r"|(?P<word>[A-Za-z_$][\w$]*)"
+    r"|(?P<text>[^\x00-\x7f]+)"
+    r"|(?P<other>\S)",
+    re.DOTALL,
+)
+_LITERALS = {'string': 'S', 'number': 'N', 'text': 'T'}
+
+# MinHash の置換（multiply-shift ハッシュ）。シードを固定して、キャッシュした署名をプロセス間で比べられるようにする
+_RNG = np.random.default_rng(20240601)
+_A = _RNG.integers(1, 2 ** 62, NUM_PERMUTATIONS, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_B = _RNG.integers(0, 2 ** 62, NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def normalized_tokens(text: str) -> List[str]:
+    """コメントと空白を除き、文字列・数値・日本語のテキストを記号にしたトークン列。識別子は残す。"""
+    tokens = []
+    for match in _TOKEN.finditer(text):
+        kind = match.lastgroup
+        if kind == 'comment':
+            continue
+        tokens.append(_LITERALS.get(kind) or match.group(kind))
+    return tokens
+
+
+def signature(tokens: List[str]) -> Optional[List[int]]:
+    """SHINGLE_SIZE トークンのシングルの集合の MinHash 署名（短すぎれば None）。"""
+    if len(tokens) < max(MIN_TOKENS, SHINGLE_SIZE):
+        return None
+    hashes = np.unique(np.fromiter(
+        (zlib.crc32('\x1f'.join(tokens[i:i + SHINGLE_SIZE]).encode('utf-8'))
+         for i in range(len(tokens) - SHINGLE_SIZE + 1)),
+        dtype=np.uint64,
+    ))
+    values = (_A[:, None] * hashes[None, :] + _B[:, None]) >> np.uint64(32)
+    return values.min(axis=1).astype(np.uint32).tolist()
+
+
+def file_units(path: str, digest: str, content: str) -> List[dict]:
+    """ファイル内の関数・コンポーネントごとの署名（内容のハッシュで cache_dir() にキャッシュする）。"""
+    ext = os.path.splitext(path)[1].lower()
+    index_file = cache_path('index', 'minhash', f"{digest}{ext}.json")
+    cached = load_json(index_file, default=None)
+    if isinstance(cached, dict) and cached.get('version') == DUPLICATES_VERSION:
+        return cached['units']
+
+    units = []
+    for chunk in chunk_source(content, ext):
+        if chunk['kind'] not in UNIT_KINDS:
+            continue
+        tokens = normalized_tokens(chunk['text'])
+        sig = signature(tokens)
+        if sig is None:
+            continue
+        units.append({'title': chunk['title'], 'kind': chunk['kind'], 'line': chunk['line'],
+                      'end': chunk['end'], 'tokens': len(tokens), 'signature': sig})
+    save_json(index_file, {'version': DUPLICATES_VERSION, 'units': units})
+    return units
+
+
+def source_files(project_root: str) -> List[str]:
+    """比べる対象のファイル（コード検索と同じ範囲の TS/TSX/JS）。"""
+    return [path for path in code_files(project_root) if not path.endswith('.sql')]
+
+
+class DuplicateIndex:
+    """
+    関数・コンポーネント単位の MinHash 署名を保持し、LSH で似たもの同士を探す索引。
+
+    - 単位はコード検索（roots.tools.code_search.chunk_source）のチャンクと同じ
+      （長いフックは useCallback ごとに分かれる）
+    - 署名はファイル内容のハッシュごとにディスクにキャッシュし、検索のたびに
+      mtime とサイズが変わったファイルだけ計算し直す
+    - LSH の同じバケットに入ったものだけを署名で比べるので、全ペアを比べずに済む
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._files: Dict[str, dict] = {}
+        self._units: List[Tuple[str, dict]] = []
+        self._signatures = np.zeros((0, NUM_PERMUTATIONS), dtype=np.uint32)
+
+    def refresh(self, paths: List[str]) -> bool:
+        """索引を paths の現在の内容に合わせる。変わったものがあれば True。"""
+        changed = False
+        current = set(paths)
+        for path in list(self._files):
+            if path not in current:
+                del self._files[path]
+                changed = True
+
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            file_signature = (stat.st_mtime_ns, stat.st_size)
+            entry = self._files.get(path)
+            if entry is not None and entry['signature'] == file_signature:
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    content = f.read()
+            except OSError:
+                continue
+            digest = hashlib.sha1(content.encode('utf-8')).hexdigest()
+            if entry is None or entry['digest'] != digest:
+                entry = {'digest': digest, 'units': file_units(path, digest, content)}
+                changed = True
+            entry['signature'] = file_signature
+            self._files[path] = entry
+
+        if changed:
+            self._units = [(path, unit) for path in sorted(self._files)
+                           for unit in self._files[path]['units']]
+            self._signatures = np.array([unit['signature'] for _, unit in self._units],
+                                        dtype=np.uint32).reshape(-1, NUM_PERMUTATIONS)
+        return changed
+
+    def _similar_pairs(self, candidates: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+        """LSH のバケットごとに、署名の一致率が threshold 以上のペア（単位の番号の配列 2 つ）を返す。"""
+        rows = NUM_PERMUTATIONS // LSH_BANDS
+        signatures = self._signatures[candidates]
+        heads, others = [], []
+        for band in range(LSH_BANDS):
+            keys = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+            _, inverse, counts = np.unique(keys.view(np.dtype((np.void, rows * 4))).ravel(),
+                                           return_inverse=True, return_counts=True)
+            if counts.max(initial=0) < 2:
+                continue
+            order = np.argsort(inverse, kind='stable')
+            bounds = np.cumsum(counts)
+            for group in np.nonzero(counts > 1)[0]:
+                remaining = order[bounds[group] - counts[group]:bounds[group]]
+                # バケットの先頭と比べ、似ていなかったものの中でまた先頭と比べる。
+                # 定型コードの巨大なバケットで比較が 2 乗に増えないよう回数を区切る
+                # （残りは別のバンドのバケットで拾われる）
+                for _ in range(MAX_BUCKET_ROUNDS):
+                    if len(remaining) < 2:
+                        break
+                    head, rest = remaining[0], remaining[1:]
+                    similar = (signatures[rest] == signatures[head]).mean(axis=1) >= threshold
+                    heads.append(np.full(int(similar.sum()), head))
+                    others.append(rest[similar])
+                    remaining = rest[~similar]
+        if not heads:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return candidates[np.concatenate(heads)], candidates[np.concatenate(others)]
+
+    @staticmethod
+    def _components(size: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """ペアでつながった単位に同じラベル（最小の番号）を付ける（ラベル伝播とポインタジャンプ）。"""
+        labels = np.arange(size)
+        while True:
+            low = np.minimum(labels[a], labels[b])
+            updated = labels.copy()
+            np.minimum.at(updated, a, low)
+            np.minimum.at(updated, b, low)
+            updated = updated[updated]
+            if np.array_equal(updated, labels):
+                return labels
+            labels = updated
+
+    def _in_scope(self, index: int, scope: str) -> bool:
+        path = self._units[index][0]
+        return not scope or path == scope or path.startswith(scope.rstrip(os.sep) + os.sep)
+
+    def find(self, paths: List[str], threshold: float = DEFAULT_THRESHOLD, scope: str = "",
+             min_lines: int = DEFAULT_MIN_LINES) -> List[dict]:
+        """
+        似た関数・コンポーネントのまとまり（クラスタ）を、重複している行数の多い順に返す。
+        scope を指定すると、そのディレクトリのものを含むクラスタだけを返す。
+        """
+        with self._lock:
+            self.refresh(paths)
+            lines = np.array([unit['end'] - unit['line'] + 1 for _, unit in self._units], dtype=np.int64)
+            candidates = np.nonzero(lines >= min_lines)[0]
+            if len(candidates) < 2:
+                return []
+            a, b = self._similar_pairs(candidates, threshold)
+            labels = self._components(len(self._units), a, b)
+            linked = np.unique(np.concatenate([a, b]))
+            groups: Dict[int, List[int]] = {}
+            for i, label in zip(linked.tolist(), labels[linked].tolist()):
+                groups.setdefault(label, []).append(i)
+
+            clusters = []
+            for members in groups.values():
+                if len(members) < 2:
+                    continue
+                if scope and not any(self._in_scope(i, scope) for i in members):
+                    continue
+                # 一番長いものを代表にし、各メンバーの代表との類似度を示す（scope 内のものを先に並べる）
+                members.sort(key=lambda i: (-lines[i], self._units[i][0], self._units[i][1]['line']))
+                head = members[0]
+                members = [head] + sorted(members[1:], key=lambda i: not self._in_scope(i, scope))
+                similarity = (self._signatures[members] == self._signatures[head]).mean(axis=1)
+                clusters.append({
+                    'members': [(self._units[i][0], self._units[i][1], float(s))
+                                for i, s in zip(members, similarity)],
+                    'lines': int(lines[members].sum()),
+                    'duplicated_lines': int(lines[members].sum() - lines[head]),
+                    'min_similarity': float(similarity[1:].min()),
+                })
+            clusters.sort(key=lambda c: (-c['duplicated_lines'], c['members'][0][0]))
+            return clusters
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'files': len(self._files), 'units': len(self._units)}
+
+
+DUPLICATE_INDEX = DuplicateIndex()
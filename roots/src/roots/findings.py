@@ -0,0 +1,220 @@
+import hashlib
+import json
+import re
+import threading
+import unicodedata
+from typing import Dict, List, Optional
+
+from crewai import Task
+from crewai.llms.base_llm import BaseLLM
+from crewai.tasks.task_output import TaskOutput
+
+from roots.state import cache_path, load_json, save_json
+from roots.tools.knowledge_search import tokenize
+
+# 抽出のプロンプトや形式を変えたら上げる（キャッシュを無効にする）
+FINDINGS_VERSION = 1
+
+SEVERITIES = ('P0', 'P1', 'P2', 'P3')
+CATEGORIES = ('security', 'compliance', 'spec', 'code_quality', 'design', 'build',
+              'performance', 'data', 'other')
+
+# 1 タスクの出力のうち抽出に渡す長さ（これを超える部分は切り捨てる）
+MAX_INPUT_CHARS = 60000
+MAX_FINDINGS_PER_TASK = 40
+MAX_DETAIL_CHARS = 300
+MAX_SUMMARY_CHARS = 600
+# 抽出に失敗したタスクは出力の先頭だけを渡す
+MAX_FALLBACK_CHARS = 4000
+# 統合レポートに渡す指摘の上限（重要度の高い順）。監査が大きくなっても入力を一定に保つ
+MAX_MERGED_FINDINGS = 150
+# 同じファイルでタイトルの語の重なり（Jaccard）がこれ以上なら同じ指摘とみなす
+SIMILARITY_THRESHOLD = 0.6
+
+EXTRACT_PROMPT = """あなたは監査レポートを構造化データに変換する担当です。
+次の「{task_name}」タスクのレポートから、指摘事項（問題点・リスク・改善点）をすべて抜き出し、
+JSON だけを出力してください（説明文やコードブロックは不要）。
+
+形式:
+{{"summary": "この領域の総合評価（{summary_chars} 文字以内、評価・重要な数値を含める）",
+  "findings": [
+    {{"severity": "P0|P1|P2|P3", "category": "{categories}",
+      "file": "関連ファイルのパス（不明なら空文字）", "title": "指摘の要約（1 行）",
+      "detail": "根拠と推奨対応（{detail_chars} 文字以内）"}}
+  ]}}
+
+重要度: P0=今すぐ対応（障害・セキュリティ・法令違反）、P1=1 週間以内、P2=1 か月以内、P3=長期的な改善。
+指摘は最大 {max_findings} 件、重要度の高いものを優先してください。
+
+レポート:
+{report}"""
+
+_LINE_SUFFIX = re.compile(r'(:\d+(-\d+)?|#L\d+(-L?\d+)?)$')
+
+
+def normalize_file(path: str) -> str:
+    """指摘のファイルパスを比較用に正規化する（行番号・先頭の ./ を除く）。"""
+    path = (path or '').strip().strip('`"\'').replace('\\', '/')
+    path = _LINE_SUFFIX.sub('', path)
+    while path.startswith('./'):
+        path = path[2:]
+    return path
+
+
+def _clip(value, limit: int) -> str:
+    text = unicodedata.normalize('NFKC', str(value or '')).strip()
+    return text if len(text) <= limit else text[:limit - 1] + '…'
+
+
+def parse_findings(text: str) -> Optional[dict]:
+    """抽出結果の JSON を読み、値を正規化する。JSON でなければ None。"""
+    start, end = text.find('{'), text.rfind('}')
+    if start < 0 or end <= start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get('findings'), list):
+        return None
+
+    findings = []
+    for item in data['findings'][:MAX_FINDINGS_PER_TASK]:
+        if not isinstance(item, dict) or not item.get('title'):
+            continue
+        severity = str(item.get('severity', '')).strip().upper()
+        category = str(item.get('category', '')).strip().lower()
+        findings.append({
+            'severity': severity if severity in SEVERITIES else 'P2',
+            'category': category if category in CATEGORIES else 'other',
+            'file': normalize_file(str(item.get('file') or '')),
+            'title': _clip(item['title'], 200),
+            'detail': _clip(item.get('detail'), MAX_DETAIL_CHARS),
+        })
+    return {'summary': _clip(data.get('summary'), MAX_SUMMARY_CHARS), 'findings': findings}
+
+
+class FindingsExtractor:
+    """
+    タスクの出力を構造化された指摘（重要度・ファイル・分類）に要約する（map の段階）。
+
+    結果はモデルと出力内容のハッシュで cache_dir() にキャッシュするので、
+    差分監査やチェックポイントで再利用した出力は LLM を呼ばずに要約できる。
+    """
+
+    def __init__(self, llm: BaseLLM):
+        self.llm = llm
+        self.cached = 0
+        self.extracted = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def extract(self, task: Task, output: TaskOutput) -> dict:
+        raw = output.raw or ''
+        key = hashlib.sha256(
+            f"v{FINDINGS_VERSION}\0{self.llm.model}\0{task.name}\0{raw}".encode('utf-8')
+        ).hexdigest()
+        path = cache_path('findings', f"{key}.json")
+        cached = load_json(path, default=None)
+        if isinstance(cached, dict) and 'findings' in cached:
+            self._count('cached')
+            return cached
+
+        prompt = EXTRACT_PROMPT.format(
+            task_name=task.name, categories='|'.join(CATEGORIES), summary_chars=MAX_SUMMARY_CHARS,
+            detail_chars=MAX_DETAIL_CHARS, max_findings=MAX_FINDINGS_PER_TASK,
+            report=raw[:MAX_INPUT_CHARS],
+        )
+        try:
+            # 要約した出力のタスクとして呼ぶ（スケジューラの優先度・LLM の記録と再生の対応付け）
+            response = self.llm.call([{'role': 'user', 'content': prompt}], from_task=task)
+            parsed = parse_findings(str(response))
+        except Exception:
+            parsed = None
+        if parsed is None:
+            # 抽出できなければ出力の先頭をそのまま渡す（指摘を黙って落とさない）
+            self._count('failed')
+            return {'summary': '', 'findings': [], 'raw': _clip(raw, MAX_FALLBACK_CHARS)}
+        self._count('extracted')
+        save_json(path, parsed)
+        return parsed
+
+
+def merge_findings(per_task: Dict[str, dict]) -> List[dict]:
+    """
+    タスクをまたいで重複する指摘をまとめる（reduce の段階）。
+
+    同じファイル（どちらもファイルなしを含む）でタイトルが似ている指摘は 1 つにし、
+    重要度は最も高いもの、出典のタスクと分類はすべて残す。
+    """
+    items = [
+        dict(finding, sources=[name])
+        for name, result in per_task.items() for finding in result.get('findings', [])
+    ]
+    items.sort(key=lambda f: SEVERITIES.index(f['severity']))
+
+    merged: List[dict] = []
+    by_file: Dict[str, List[dict]] = {}
+    for item in items:
+        terms = set(tokenize(item['title']))
+        match = None
+        for candidate in by_file.get(item['file'], []):
+            union = terms | candidate['_terms']
+            if union and len(terms & candidate['_terms']) / len(union) >= SIMILARITY_THRESHOLD:
+                match = candidate
+                break
+        if match is None:
+            entry = dict(item, categories=[item['category']], count=1, _terms=terms)
+            merged.append(entry)
+            by_file.setdefault(item['file'], []).append(entry)
+            continue
+        # items は重要度順なので、先に入った指摘の重要度・説明を残す
+        match['count'] += 1
+        for source in item['sources']:
+            if source not in match['sources']:
+                match['sources'].append(source)
+        if item['category'] not in match['categories']:
+            match['categories'].append(item['category'])
+
+    for entry in merged:
+        del entry['_terms']
+    merged.sort(key=lambda f: (SEVERITIES.index(f['severity']), -len(f['sources'])))
+    return merged
+
+
+def render_findings(per_task: Dict[str, dict], merged: List[dict]) -> str:
+    """統合レポートのタスクに渡すコンテキスト（各領域の評価と、重複をまとめた指摘の一覧）。"""
+    total = sum(len(r.get('findings', [])) for r in per_task.values())
+    lines = [
+        "各チームメンバーのレポートを構造化した指摘事項です（タスクをまたいで重複する指摘はまとめてあります）。",
+        f"指摘 {total} 件 → 重複をまとめて {len(merged)} 件。",
+        "",
+        "## 各領域の評価",
+    ]
+    for name, result in per_task.items():
+        lines.append(f"- {name}: {result.get('summary') or '（要約なし）'}")
+
+    shown = merged[:MAX_MERGED_FINDINGS]
+    for severity in SEVERITIES:
+        group = [f for f in shown if f['severity'] == severity]
+        if not group:
+            continue
+        lines += ["", f"## {severity}（{len(group)} 件）"]
+        for f in group:
+            location = f" `{f['file']}`" if f['file'] else ''
+            detail = f" — {f['detail']}" if f['detail'] else ''
+            lines.append(
+                f"- [{'/'.join(f['categories'])}]{location} {f['title']}{detail}"
+                f"（出典: {', '.join(f['sources'])}）"
+            )
+    if len(merged) > len(shown):
+        lines += ["", f"（重要度の低い {len(merged) - len(shown)} 件は省略）"]
+
+    unparsed = [(name, r['raw']) for name, r in per_task.items() if r.get('raw')]
+    for name, raw in unparsed:
+        lines += ["", f"## {name} のレポート（構造化できなかったため原文の先頭）", raw]
+    return "\n".join(lines)
@@ -0,0 +1,172 @@
+import os
+import subprocess
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from crewai import Task
+from crewai.tasks.task_output import TaskOutput
+
+from roots.dag import task_dependencies
+from roots.state import load_json, project_key, save_json, state_path
+
+HISTORY_DIR = 'history'
+
+# これ以上のファイルが変更されていたら差分監査ではなく全体監査に切り替える
+MAX_INCREMENTAL_FILES = 300
+
+# 変更があっても監査対象から外すパス
+IGNORED_PREFIXES = ('.agent_backups/', 'roots/')
+
+
+def git_head(project_root: str) -> Optional[str]:
+    """プロジェクトの現在の HEAD コミット（git 管理外なら None）。"""
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=project_root, capture_output=True, text=True, timeout=30
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip()
+
+
+def changed_files(project_root: str, since: str) -> Optional[List[str]]:
+    """
+    コミット `since` 以降に変更されたファイル（未コミット・未追跡を含む）。
+    差分が取れない場合（コミットが存在しない等）は None。
+    """
+    commands = [
+        ['git', 'diff', '--name-only', since],
+        ['git', 'ls-files', '--others', '--exclude-standard'],
+    ]
+    files = set()
+    for command in commands:
+        try:
+            result = subprocess.run(
+                command, cwd=project_root, capture_output=True, text=True, timeout=60
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if result.returncode != 0:
+            return None
+        files.update(line.strip() for line in result.stdout.splitlines() if line.strip())
+
+    return sorted(f for f in files if not f.startswith(IGNORED_PREFIXES))
+
+
+def history_path(project_root: str, directory: Optional[str] = None) -> str:
+    """
+    プロジェクトのタスク履歴のファイル。別のプロジェクトの履歴を上書きしないようパスで分ける。
+    directory を指定すると state_dir() ではなくその状態ディレクトリの中（バッチの他のリポジトリ用）。
+    """
+    name = f"{project_key(project_root)}.json"
+    if directory is not None:
+        return os.path.join(directory, HISTORY_DIR, name)
+    return state_path(HISTORY_DIR, name)
+
+
+class TaskHistory:
+    """プロジェクトごとに、タスクの最新の出力とその実行時のコミットを保存する。"""
+
+    def __init__(self, project_root: str, path: Optional[str] = None):
+        self.path = path or history_path(project_root)
+        self.records: Dict[str, dict] = load_json(self.path, default={}) or {}
+
+    def get(self, task_name: str) -> Optional[dict]:
+        return self.records.get(task_name)
+
+    def output_for(self, task: Task) -> Optional[TaskOutput]:
+        """保存済みの出力を TaskOutput として返す。"""
+        record = self.get(task.name)
+        if record is None:
+            return None
+        return TaskOutput(
+            name=task.name,
+            description=task.description,
+            expected_output=task.expected_output,
+            raw=record['raw'],
+            agent=record['agent'],
+        )
+
+    def record(self, outputs: List[TaskOutput], commit: Optional[str]):
+        now = datetime.now().isoformat(timespec='seconds')
+        for output in outputs:
+            if not output.name:
+                continue
+            self.records[output.name] = {
+                'commit': commit,
+                'raw': output.raw,
+                'agent': output.agent,
+                'completed_at': now,
+            }
+        save_json(self.path, self.records)
+
+
+def plan_incremental(tasks: List[Task], history: TaskHistory,
+                     project_root: str) -> Tuple[Dict[str, TaskOutput], Dict[str, str]]:
+    """
+    差分監査の実行計画を立てる。
+
+    戻り値は (再利用する出力, タスクに追加するコンテキスト)。
+    - 前回以降に変更がなく、上流タスクもすべて再利用されるタスクは前回の出力をそのまま使う
+    - 変更があるタスクには、変更ファイル一覧と前回の結果を渡して差分だけを監査させる
+    - 前回の結果がない・差分が取れない・変更が多すぎるタスクは通常どおり全体を監査する
+    """
+    deps = task_dependencies(tasks)
+    reuse: Dict[str, TaskOutput] = {}
+    notes: Dict[str, str] = {}
+
+    for task in tasks:
+        record = history.get(task.name)
+        if record is None or not record.get('commit'):
+            continue
+
+        changed = changed_files(project_root, record['commit'])
+        if changed is None or len(changed) > MAX_INCREMENTAL_FILES:
+            continue
+
+        if not changed and all(u in reuse for u in deps[task.name]):
+            reuse[task.name] = history.output_for(task)
+            continue
+
+        notes[task.name] = _incremental_note(record, changed)
+
+    return reuse, notes
+
+
+def plan_focused(tasks: List[Task], targets: List[str],
+                 history: TaskHistory) -> Dict[str, TaskOutput]:
+    """
+    対象タスクだけを実行する場合に、上流タスクの前回の出力を再利用する計画を立てる。
+    前回の結果がない上流タスクは通常どおり実行する。
+    """
+    reuse: Dict[str, TaskOutput] = {}
+    for task in tasks:
+        if task.name in targets:
+            continue
+        output = history.output_for(task)
+        if output is not None:
+            reuse[task.name] = output
+    return reuse
+
+
+def _incremental_note(record: dict, changed: List[str]) -> str:
+    commit = record['commit'][:10]
+    if changed:
+        file_list = "\n".join(f"- {f}" for f in changed)
+    else:
+        file_list = "（ファイルの変更なし。上流タスクの結果のみ更新されています）"
+
+    return (
+        f"## 差分監査モード\n"
+        f"前回の実行（コミット {commit}、{record.get('completed_at', '不明')}）以降に"
+        f"変更されたファイルに絞って監査してください。\n\n"
+        f"### 変更ファイル（{len(changed)}件）\n{file_list}\n\n"
+        f"### 前回の結果\n{record['raw']}\n\n"
+        f"### 出力方法\n"
+        f"前回の結果のうち変更ファイルに関係しない指摘はそのまま引き継ぎ、"
+        f"変更ファイルに関する指摘は再検証して更新・追加・削除し、"
+        f"前回の結果と統合した完全なレポートとして出力してください。"
+    )
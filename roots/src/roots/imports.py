@@ -0,0 +1,471 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from roots.state import cache_path, load_json, save_json
+from roots.tools.code_search import code_files
+
+# 抽出する import の形式を変えたら上げる（古いキャッシュを使わないため）
+IMPORTS_VERSION = 1
+# 拡張子なしの import を解決するときに試す順（TypeScript と同じく .ts を先に）
+RESOLVE_EXTENSIONS = ('.ts', '.tsx', '.d.ts', '.js', '.jsx', '.mjs')
+SOURCE_EXTENSIONS = {'.ts', '.tsx', '.js', '.jsx', '.mjs'}
+CONFIG_FILES = ('tsconfig.json', 'jsconfig.json')
+MAX_EXTENDS = 5
+
+# コメント・文字列を読み飛ばしながら import / export ... from / require / import() を拾う
+_IMPORT = re.compile(
+    r"(?P<comment>//[^\n]*|/\*.*?\*/)"
+    r"|\b(?:import|export)\s+(?P<clause>[\w$*{}\s,]*?)\s*\bfrom\s*(?P<q1>['\"])(?P<from>[^'\"\n]+)(?P=q1)"
+    r"|\bimport\s*(?P<q2>['\"])(?P<bare>[^'\"\n]+)(?P=q2)"
+    r"|\b(?:import|require)\s*\(\s*(?P<q3>['\"])(?P<call>[^'\"\n]+)(?P=q3)\s*\)"
+    r"|(?P<string>'(?:\\.|[^'\\\n])*'|\"(?:\\.|[^\"\\\n])*\"|`(?:\\.|[^`\\])*`)",
+    re.DOTALL,
+)
+_JSONC = re.compile(r'("(?:\\.|[^"\\])*")|//[^\n]*|/\*.*?\*/|,(?=\s*[}\]])', re.DOTALL)
+
+
+def _type_only(clause: str) -> bool:
+    """import type { A } / import { type A, type B } のように型だけを読み込むか。"""
+    clause = clause.strip()
+    if clause.startswith('type ') or clause.startswith('type{'):
+        return True
+    if not clause.startswith('{') or not clause.endswith('}'):
+        return False
+    names = [name.strip() for name in clause[1:-1].split(',') if name.strip()]
+    return bool(names) and all(name.startswith('type ') for name in names)
+
+
+def parse_imports(content: str) -> List[list]:
+    """ファイル内の import の [指定子, 行番号, 型だけか] のリスト。"""
+    imports = []
+    line = 1
+    position = 0
+    for match in _IMPORT.finditer(content):
+        kind = match.lastgroup
+        if kind in ('comment', 'string'):
+            continue
+        line += content.count('\n', position, match.start())
+        position = match.start()
+        if match.group('from') is not None:
+            imports.append([match.group('from'), line, _type_only(match.group('clause'))])
+        else:
+            imports.append([match.group('bare') or match.group('call'), line, False])
+    return imports
+
+
+def _file_imports(path: str, digest: str, content: str) -> List[list]:
+    """parse_imports の結果（内容のハッシュで cache_dir() にキャッシュする）。"""
+    ext = os.path.splitext(path)[1].lower()
+    index_file = cache_path('index', 'imports', f"{digest}{ext}.json")
+    cached = load_json(index_file, default=None)
+    if isinstance(cached, dict) and cached.get('version') == IMPORTS_VERSION:
+        return cached['imports']
+    imports = parse_imports(content)
+    save_json(index_file, {'version': IMPORTS_VERSION, 'imports': imports})
+    return imports
+
+
+def _load_jsonc(path: str) -> Optional[dict]:
+    """コメントと末尾のカンマを許す tsconfig.json を読む。"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+    except OSError:
+        return None
+    try:
+        data = json.loads(_JSONC.sub(lambda m: m.group(1) or '', text))
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def load_aliases(project_root: str) -> Tuple[Optional[str], List[Tuple[str, List[str]]], List[str]]:
+    """
+    tsconfig.json（なければ jsconfig.json）の baseUrl と paths を読む。
+    戻り値は (baseUrl の絶対パス, [(パターン, [置き換え先の絶対パス...])...], 読んだ設定ファイル)。
+    extends は相対パスのものだけたどる。
+    """
+    base_url: Optional[str] = None
+    paths: Optional[Tuple[str, dict]] = None
+    read: List[str] = []
+    config_file = next((os.path.join(project_root, name) for name in CONFIG_FILES
+                        if os.path.isfile(os.path.join(project_root, name))), None)
+    # 子の設定が優先なので、最初に見つかったものを残す
+    for _ in range(MAX_EXTENDS):
+        if config_file is None:
+            break
+        config = _load_jsonc(config_file)
+        if config is None:
+            break
+        read.append(config_file)
+        directory = os.path.dirname(config_file)
+        options = config.get('compilerOptions') or {}
+        if base_url is None and isinstance(options.get('baseUrl'), str):
+            base_url = os.path.normpath(os.path.join(directory, options['baseUrl']))
+        if paths is None and isinstance(options.get('paths'), dict):
+            paths = (directory, options['paths'])
+        parent = config.get('extends')
+        if not isinstance(parent, str) or not parent.startswith('.'):
+            break
+        config_file = os.path.normpath(os.path.join(directory, parent))
+        if not config_file.endswith('.json') and not os.path.isfile(config_file):
+            config_file += '.json'
+
+    aliases = []
+    if paths is not None:
+        # paths は baseUrl から（なければ paths を書いた設定ファイルから）の相対
+        root = base_url or paths[0]
+        for pattern, targets in paths[1].items():
+            if isinstance(targets, list):
+                aliases.append((pattern, [os.path.normpath(os.path.join(root, t))
+                                          for t in targets if isinstance(t, str)]))
+    return base_url, aliases, read
+
+
+def _match_alias(pattern: str, spec: str) -> Optional[str]:
+    """'@/*' に '@/hooks/x' が合えば '*' の部分（'hooks/x'）を、合わなければ None を返す。"""
+    if '*' not in pattern:
+        return '' if spec == pattern else None
+    prefix, suffix = pattern.split('*', 1)
+    if spec.startswith(prefix) and spec.endswith(suffix) and len(spec) >= len(prefix) + len(suffix):
+        return spec[len(prefix):len(spec) - len(suffix)]
+    return None
+
+
+class ImportGraph:
+    """
+    プロジェクトの TS/TSX/JS ファイル間の import のグラフ。
+
+    - 各ファイルの import 文は内容のハッシュごとにディスクにキャッシュし、問い合わせのたびに
+      mtime とサイズが変わったファイルだけ読み直す
+    - '@/...' などの別名は tsconfig.json の baseUrl / paths で解決する。ファイルの追加・削除や
+      tsconfig の変更で解決先が変わりうるときだけ、全ファイルの import を（キャッシュから）解決し直す
+    - 型だけの import（import type）は辺に印を付け、循環参照の検出では既定で除く
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._files: Dict[str, dict] = {}
+        self._config: Optional[tuple] = None
+        self._base_url: Optional[str] = None
+        self._aliases: List[Tuple[str, List[str]]] = []
+        self._config_files: List[str] = []
+        self._known: Set[str] = set()
+        self._resolved: Dict[Tuple[str, str], Optional[str]] = {}
+        # path -> [(依存先, 行番号, 型だけか)]、依存先 -> [(依存元, 行番号, 型だけか)]
+        self._edges: Dict[str, List[Tuple[str, int, bool]]] = {}
+        self._reverse: Dict[str, List[Tuple[str, int, bool]]] = {}
+        self._missing: Dict[str, List[Tuple[str, int]]] = {}
+
+    def _config_signature(self, project_root: str) -> tuple:
+        signature = []
+        for path in [os.path.join(project_root, name) for name in CONFIG_FILES] + self._config_files:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def refresh(self, project_root: str, paths: List[str]) -> bool:
+        """グラフを paths の現在の内容に合わせる。変わったものがあれば True。"""
+        config = self._config_signature(project_root)
+        relink = config != self._config
+        if relink:
+            self._base_url, self._aliases, self._config_files = load_aliases(project_root)
+            self._config = self._config_signature(project_root)
+
+        current = set(paths)
+        if current != self._known:
+            relink = True
+            for path in list(self._files):
+                if path not in current:
+                    del self._files[path]
+            self._known = current
+
+        changed = set()
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature = (stat.st_mtime_ns, stat.st_size)
+            entry = self._files.get(path)
+            if entry is not None and entry['signature'] == signature:
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    content = f.read()
+            except OSError:
+                continue
+            digest = hashlib.sha1(content.encode('utf-8')).hexdigest()
+            if entry is None or entry['digest'] != digest:
+                entry = {'digest': digest, 'imports': _file_imports(path, digest, content)}
+                changed.add(path)
+            entry['signature'] = signature
+            self._files[path] = entry
+
+        if relink:
+            self._resolved = {}
+            changed = set(self._files)
+            self._edges = {path: self._edges[path] for path in self._edges if path in self._files}
+            self._missing = {}
+        if not changed:
+            return False
+        for path in changed:
+            self._link(path)
+        self._reverse = {}
+        for source in sorted(self._edges):
+            for target, line, type_only in self._edges[source]:
+                self._reverse.setdefault(target, []).append((source, line, type_only))
+        return True
+
+    def _link(self, path: str):
+        edges, missing = [], []
+        seen = set()
+        for spec, line, type_only in self._files[path]['imports']:
+            local = spec.startswith('.') or spec.startswith('/')
+            key = (os.path.dirname(path) if local else '', spec)
+            if key not in self._resolved:
+                self._resolved[key] = self._resolve(key[0], spec)
+            target = self._resolved[key]
+            if target is None:
+                if self._is_missing(spec, local):
+                    missing.append((spec, line))
+            elif target != path and target not in seen:
+                seen.add(target)
+                edges.append((target, line, type_only))
+        self._edges[path] = edges
+        if missing:
+            self._missing[path] = missing
+        else:
+            self._missing.pop(path, None)
+
+    def _resolve(self, directory: str, spec: str) -> Optional[str]:
+        """import の指定子を索引内のファイルに解決する（外部パッケージや画像などは None）。"""
+        spec = spec.split('?', 1)[0]
+        if spec.startswith('.'):
+            return self._resolve_file(os.path.normpath(os.path.join(directory, spec)))
+        # TypeScript と同じく、一番長い接頭辞で合う paths のパターンを使う
+        matches = [(pattern, targets, rest) for pattern, targets in self._aliases
+                   for rest in [_match_alias(pattern, spec)] if rest is not None]
+        matches.sort(key=lambda m: -len(m[0].split('*', 1)[0]))
+        for _, targets, rest in matches:
+            for target in targets:
+                resolved = self._resolve_file(os.path.normpath(target.replace('*', rest, 1)))
+                if resolved is not None:
+                    return resolved
+        if self._base_url is not None:
+            return self._resolve_file(os.path.normpath(os.path.join(self._base_url, spec)))
+        return None
+
+    def _resolve_file(self, base: str) -> Optional[str]:
+        if base in self._known:
+            return base
+        stem, ext = os.path.splitext(base)
+        # ESM 形式の './x.js' は x.ts を指す
+        if ext in ('.js', '.jsx', '.mjs'):
+            for candidate in (stem + '.ts', stem + '.tsx'):
+                if candidate in self._known:
+                    return candidate
+        for candidate in [base + e for e in RESOLVE_EXTENSIONS] + \
+                [os.path.join(base, 'index' + e) for e in RESOLVE_EXTENSIONS]:
+            if candidate in self._known:
+                return candidate
+        return None
+
+    def _is_missing(self, spec: str, local: bool) -> bool:
+        """解決できなかった相対パス・別名の import のうち、コードを指すもの（画像や CSS は除く）。"""
+        ext = os.path.splitext(spec)[1].lower()
+        if ext and ext not in SOURCE_EXTENSIONS:
+            return False
+        return local or any(_match_alias(pattern, spec) is not None for pattern, _ in self._aliases)
+
+    def lookup(self, project_root: str, paths: List[str], target: str) -> List[str]:
+        """
+        ファイル・ディレクトリ（プロジェクト直下からの相対パス、拡張子は省略可）または
+        '@/hooks/useFacilityData' のような import の指定子に当たるファイル。
+        """
+        with self._lock:
+            self.refresh(project_root, paths)
+            target = target.strip().rstrip('/')
+            path = os.path.normpath(os.path.join(project_root, target))
+            if path not in self._known and os.path.isdir(path):
+                prefix = path + os.sep
+                return sorted(p for p in self._files if p.startswith(prefix))
+            resolved = self._resolve_file(path)
+            if resolved is None and not target.startswith('.'):
+                resolved = self._resolve('', target)
+            return [resolved] if resolved is not None else []
+
+    def _walk(self, start: Iterable[str], graph: Dict[str, List[Tuple[str, int, bool]]],
+              depth: int) -> Dict[str, int]:
+        """start からの幅優先探索（start 自身は除く）。ファイル -> 何段目で届いたか。"""
+        start = set(start)
+        found: Dict[str, int] = {}
+        queue = deque((path, 0) for path in sorted(start))
+        while queue:
+            path, level = queue.popleft()
+            if depth and level >= depth:
+                continue
+            for neighbor, _, _ in graph.get(path, ()):
+                if neighbor in start or neighbor in found:
+                    continue
+                found[neighbor] = level + 1
+                queue.append((neighbor, level + 1))
+        return found
+
+    def dependents(self, project_root: str, paths: List[str], targets: List[str],
+                   depth: int = 0) -> Tuple[Dict[str, int], Dict[str, List[Tuple[str, int, bool]]]]:
+        """targets を（間接的にでも）import するファイル -> 段数と、直接の import 元 -> [(対象, 行, 型だけか)]。"""
+        with self._lock:
+            self.refresh(project_root, paths)
+            found = self._walk(targets, self._reverse, depth)
+            direct: Dict[str, List[Tuple[str, int, bool]]] = {}
+            for target in targets:
+                for source, line, type_only in self._reverse.get(target, ()):
+                    if source in found:
+                        direct.setdefault(source, []).append((target, line, type_only))
+            return found, direct
+
+    def dependencies(self, project_root: str, paths: List[str], targets: List[str],
+                     depth: int = 0) -> Tuple[Dict[str, int], Dict[str, List[Tuple[str, int, bool]]]]:
+        """targets が（間接的にでも）import するファイル。戻り値は dependents と同じ形。"""
+        with self._lock:
+            self.refresh(project_root, paths)
+            found = self._walk(targets, self._edges, depth)
+            direct: Dict[str, List[Tuple[str, int, bool]]] = {}
+            for source in targets:
+                for target, line, type_only in self._edges.get(source, ()):
+                    if target in found:
+                        direct.setdefault(target, []).append((source, line, type_only))
+            return found, direct
+
+    def cycles(self, project_root: str, paths: List[str], include_types: bool = False) -> List[dict]:
+        """
+        循環参照（2 ファイル以上の強連結成分）を大きい順に返す。
+        cycle は成分内の最短の循環（先頭のファイルに戻って閉じる）、members は成分の全ファイル。
+        """
+        with self._lock:
+            self.refresh(project_root, paths)
+            graph = {path: [t for t, _, type_only in edges if include_types or not type_only]
+                     for path, edges in self._edges.items()}
+            components = []
+            for component in _strongly_connected(graph):
+                if len(component) < 2:
+                    continue
+                members = set(component)
+                start = min(component)
+                cycle = _shortest_cycle(graph, start, members)
+                components.append({'cycle': cycle, 'members': sorted(members)})
+            components.sort(key=lambda c: (-len(c['members']), c['cycle'][0]))
+            return components
+
+    def fan(self, project_root: str, paths: List[str], direction: str) -> List[Tuple[str, int, int]]:
+        """
+        ファイルごとの直接の依存元（direction='in'）または依存先（'out'）の数と、
+        型だけの import を除いた数を多い順に返す。
+        """
+        with self._lock:
+            self.refresh(project_root, paths)
+            graph = self._reverse if direction == 'in' else self._edges
+            ranking = []
+            for path in self._files:
+                edges = graph.get(path, ())
+                if edges:
+                    ranking.append((path, len(edges), sum(1 for e in edges if not e[2])))
+            ranking.sort(key=lambda r: (-r[1], r[0]))
+            return ranking
+
+    def missing(self, project_root: str, paths: List[str]) -> Dict[str, List[Tuple[str, int]]]:
+        """解決できなかった相対パス・別名の import（ファイル -> [(指定子, 行)]）。"""
+        with self._lock:
+            self.refresh(project_root, paths)
+            return {path: list(items) for path, items in sorted(self._missing.items())}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'files': len(self._files),
+                    'imports': sum(len(edges) for edges in self._edges.values())}
+
+
+def _strongly_connected(graph: Dict[str, List[str]]) -> List[List[str]]:
+    """Tarjan の強連結成分分解（再帰の深さに制限されないよう、スタックで書いたもの）。"""
+    index: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    on_stack: Set[str] = set()
+    stack: List[str] = []
+    components = []
+    counter = 0
+    for root in sorted(graph):
+        if root in index:
+            continue
+        work = [(root, iter(graph.get(root, ())))]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, neighbors = work[-1]
+            advanced = False
+            for neighbor in neighbors:
+                if neighbor not in index:
+                    index[neighbor] = low[neighbor] = counter
+                    counter += 1
+                    stack.append(neighbor)
+                    on_stack.add(neighbor)
+                    work.append((neighbor, iter(graph.get(neighbor, ()))))
+                    advanced = True
+                    break
+                if neighbor in on_stack:
+                    low[node] = min(low[node], index[neighbor])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+    return components
+
+
+def _shortest_cycle(graph: Dict[str, List[str]], start: str, members: Set[str]) -> List[str]:
+    """members の中で start から start に戻る最短の経路（start で始まり start で終わる）。"""
+    previous: Dict[str, str] = {}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        for neighbor in graph.get(node, ()):
+            if neighbor not in members:
+                continue
+            if neighbor == start:
+                path = [node]
+                while path[-1] != start:
+                    path.append(previous[path[-1]])
+                return path[::-1] + [start]
+            if neighbor not in previous:
+                previous[neighbor] = node
+                queue.append(neighbor)
+    return [start]
+
+
+def source_files(project_root: str) -> List[str]:
+    """グラフに入れるファイル（コード検索と同じ範囲の TS/TSX/JS）。"""
+    return [path for path in code_files(project_root)
+            if os.path.splitext(path)[1].lower() in SOURCE_EXTENSIONS]
+
+
+IMPORT_GRAPH = ImportGraph()
@@ -0,0 +1,99 @@
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from crewai import Crew
+from crewai.events.event_bus import crewai_event_bus
+from crewai.events.types.crew_events import CrewTestResultEvent
+from crewai.llms.base_llm import BaseLLM
+from crewai.tasks.task_output import TaskOutput
+from crewai.utilities.evaluators.crew_evaluator_handler import (
+    CrewEvaluator,
+    TaskEvaluationPydanticOutput,
+)
+
+
+class OrderedCrewEvaluator(CrewEvaluator):
+    """
+    タスクのスコアを完了順ではなく crew.tasks の順に記録する CrewEvaluator。
+
+    crewAI の CrewEvaluator は完了した順にスコアを追加するので、DagCrew で
+    タスクが並列に終わると表の行とスコアがずれる。採点（評価用 LLM の呼び出し）は
+    ロックの外で行い、並列に終わったタスクを同時に採点する。
+    """
+
+    def __init__(self, crew: Crew, eval_llm: BaseLLM):
+        super().__init__(crew, eval_llm)
+        self._lock = threading.Lock()
+        # iteration -> タスクの番号 -> スコア
+        self.scores_by_task: Dict[int, Dict[int, float]] = defaultdict(dict)
+
+    def _task_index(self, task_output: TaskOutput) -> Optional[int]:
+        for index, task in enumerate(self.crew.tasks):
+            if task.description == task_output.description:
+                return index
+        return None
+
+    def record(self, iteration: int, index: int, score: float, duration: Optional[float]):
+        """iteration 回目のタスク index のスコアと実行時間を記録する。"""
+        with self._lock:
+            scores = self.scores_by_task[iteration]
+            scores[index] = score
+            self.tasks_scores[iteration] = [scores[i] for i in sorted(scores)]
+            if duration is not None:
+                self.run_execution_times[iteration].append(duration)
+
+    def evaluate(self, task_output: TaskOutput) -> None:
+        index = self._task_index(task_output) if task_output else None
+        if index is None:
+            raise ValueError("Task to evaluate and task output are required for evaluation")
+        task = self.crew.tasks[index]
+        iteration = self.iteration
+
+        evaluation = self._evaluation_task(
+            self._evaluator_agent(), task, task_output.raw
+        ).execute_sync()
+        if not isinstance(evaluation.pydantic, TaskEvaluationPydanticOutput):
+            raise ValueError("Evaluation result is not in the expected format")
+        score = evaluation.pydantic.quality
+        if score is None:
+            raise ValueError("Evaluation quality score cannot be None")
+
+        crewai_event_bus.emit(
+            self.crew,
+            CrewTestResultEvent(
+                quality=score,
+                execution_duration=task.execution_duration,
+                model=self.llm.model,
+                crew_name=self.crew.name,
+                crew=self.crew,
+            ),
+        )
+        self.record(iteration, index, score, task.execution_duration)
+
+    def export_iteration(self, iteration: int) -> Dict[str, Any]:
+        """1 回分の結果（別プロセスから親へ返す。pickle できる値だけ）。"""
+        with self._lock:
+            return {
+                'scores': dict(self.scores_by_task.get(iteration, {})),
+                'execution_times': list(self.run_execution_times.get(iteration, [])),
+                'agents': {i: sorted(task.processed_by_agents) for i, task in enumerate(self.crew.tasks)},
+            }
+
+    def import_iteration(self, iteration: int, result: Dict[str, Any]):
+        """export_iteration の結果を iteration 回目として取り込む。"""
+        with self._lock:
+            self.scores_by_task[iteration] = dict(result['scores'])
+            scores = self.scores_by_task[iteration]
+            self.tasks_scores[iteration] = [scores[i] for i in sorted(scores)]
+            self.run_execution_times[iteration] = list(result['execution_times'])
+            for index, agents in result['agents'].items():
+                self.crew.tasks[index].processed_by_agents.update(agents)
+
+    def missing_tasks(self) -> List[str]:
+        """採点されなかったタスク（失敗した回があると表の行がずれるので事前に確認する）。"""
+        expected = set(range(len(self.crew.tasks)))
+        return sorted({
+            self.crew.tasks[i].name or f"Task {i + 1}"
+            for scores in self.scores_by_task.values() for i in expected - set(scores)
+        })
@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from crewai.llms.base_llm import BaseLLM
+
+from roots.llm_replay import _canonical, _decode_response, _encode_response, prompt_key
+from roots.state import state_path
+from roots.usage import add as add_usage, measure
+
+DEFAULT_CACHE_FILE = 'llm_cache.sqlite'
+DEFAULT_MAX_MB = 512
+DEFAULT_TTL_HOURS = 24 * 7
+# 上限を超えたら、この割合まで古い（最後に使われたのが古い）順に消す
+EVICT_TO = 0.9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+"""
+
+
+def default_cache_path() -> str:
+    return state_path(DEFAULT_CACHE_FILE)
+
+
+def request_key(model: str, params: Dict[str, Any], messages: Any, tools: Any = None) -> str:
+    """モデル・パラメータ・プロンプトのハッシュから応答キャッシュのキーを作る。"""
+    payload = json.dumps(
+        {'prompt': prompt_key(model, messages, tools), 'params': _canonical(params)},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    LLM の応答を SQLite に保存する永続キャッシュ（train / test の繰り返しの高速化用）。
+
+    - キーはモデル名・パラメータ（temperature 等）・プロンプトのハッシュ
+    - ttl_hours より古い応答は使わずに消す
+    - ファイルサイズ（応答の合計）が max_mb を超えたら、最後に使われたのが古い順に消す
+    """
+
+    def __init__(self, path: Optional[str] = None, max_mb: float = DEFAULT_MAX_MB,
+                 ttl_hours: float = DEFAULT_TTL_HOURS):
+        self.path = path or default_cache_path()
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.ttl = ttl_hours * 3600
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # エージェントは別スレッドで動くので接続を共有し、ロックで直列化する
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._expire()
+
+    def _expire(self):
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+            self.evicted += cursor.rowcount
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] < now - self.ttl:
+                self.misses += 1
+                return None
+            self._db.execute(
+                "UPDATE responses SET accessed = ?, hits = hits + 1 WHERE key = ?", (now, key)
+            )
+            self.hits += 1
+        return _decode_response(json.loads(row[0]))
+
+    def put(self, key: str, model: str, response: Any):
+        data = json.dumps(_encode_response(response), ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created, accessed, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (key, model, data, len(data.encode('utf-8')), now, now)
+            )
+            self._evict()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = total - int(self.max_bytes * EVICT_TO)
+        removed = 0
+        for key, size in self._db.execute(
+                "SELECT key, size FROM responses ORDER BY accessed").fetchall():
+            if removed >= target:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            removed += size
+            self.evicted += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {'hits': self.hits, 'misses': self.misses, 'bypassed': self.bypassed,
+                'evicted': self.evicted, 'entries': entries, 'bytes': size}
+
+    def report(self) -> str:
+        s = self.stats()
+        lookups = s['hits'] + s['misses']
+        rate = s['hits'] / lookups if lookups else 0.0
+        return (
+            f"LLM response cache ({self.path}): {s['hits']} hits, {s['misses']} misses "
+            f"({rate:.1%} hit rate), {s['bypassed']} bypassed, {s['evicted']} evicted, "
+            f"{s['entries']} entries, {s['bytes'] / 1024 / 1024:.1f} MB"
+        )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class CachedLLM(BaseLLM):
+    """
+    LLM をラップし、同じリクエストには LLMResponseCache の応答を返す。
+
+    strict=True のときは temperature が 0 のリクエストだけをキャッシュする
+    （サンプリングするリクエストは毎回モデルを呼ぶ）。
+    """
+
+    def __init__(self, inner: BaseLLM, cache: LLMResponseCache, strict: bool = False):
+        self.inner = inner
+        stop = list(inner.stop)
+        super().__init__(model=inner.model, temperature=getattr(inner, 'temperature', None))
+        self.stop = stop
+        self.cache = cache
+        self.strict = strict
+        self._lock = threading.Lock()
+
+    # crewAI のエグゼキュータは llm.stop に停止語を追加するので、ラップ先に転送する
+    @property
+    def stop(self) -> List[str]:
+        return self.inner.stop
+
+    @stop.setter
+    def stop(self, value: List[str]):
+        self.inner.stop = value
+
+    def _params(self, response_model) -> Dict[str, Any]:
+        params = {
+            name: getattr(self.inner, name, None)
+            for name in ('temperature', 'top_p', 'max_tokens', 'max_completion_tokens', 'seed')
+        }
+        params['stop'] = sorted(self.inner.stop or [])
+        params['function_calling'] = self.inner.supports_function_calling()
+        if response_model is not None:
+            params['response_model'] = json.dumps(response_model.model_json_schema(), sort_keys=True)
+        return params
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None):
+        def call_inner():
+            return self.inner.call(
+                messages, tools=tools, callbacks=callbacks, available_functions=available_functions,
+                from_task=from_task, from_agent=from_agent, response_model=response_model
+            )
+
+        temperature = getattr(self.inner, 'temperature', None)
+        # available_functions がある場合、モデル側でツールが実行されるので応答だけを再利用できない
+        if (self.strict and temperature != 0) or available_functions:
+            with self._lock:
+                self.cache.bypassed += 1
+            return self._forward_usage(call_inner)
+
+        key = request_key(self.model, self._params(response_model), messages, tools)
+        cached = self.cache.get(key)
+        if cached is not None:
+            if response_model is not None and isinstance(cached, str):
+                return response_model.model_validate_json(cached)
+            return cached
+
+        response = self._forward_usage(call_inner)
+        self.cache.put(key, self.model, response)
+        return response
+
+    def _forward_usage(self, call_inner):
+        # ラップ先は並列タスクで共有されるので、この呼び出しの使用量だけを足す
+        with measure(self.inner) as usage:
+            response = call_inner()
+        add_usage(self, usage)
+        return response
+
+    def supports_function_calling(self) -> bool:
+        return self.inner.supports_function_calling()
+
+    def supports_stop_words(self) -> bool:
+        return self.inner.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self.inner.get_context_window_size()
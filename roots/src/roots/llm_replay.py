@@ -0,0 +1,312 @@
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from crewai.llms.base_llm import BaseLLM
+from crewai.utilities.agent_utils import extract_tool_call_info
+from pydantic import BaseModel
+
+from roots.state import state_path
+from roots.usage import add as add_usage, measure
+
+# ハッシュ計算時に無視するキー（ツール呼び出し ID は実行ごとに変わる）
+_VOLATILE_KEYS = frozenset({'id', 'tool_call_id'})
+
+
+class ReplayMissError(RuntimeError):
+    """記録にない LLM リクエストが来た（strict モード、またはスタブ未指定時）。"""
+
+
+def default_recording_path() -> str:
+    return state_path('llm_recordings', f"recording-{datetime.now().strftime('%Y%m%d-%H%M%S')}.jsonl")
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in sorted(value.items()) if k not in _VOLATILE_KEYS}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, BaseModel):
+        return _canonical(value.model_dump())
+    return value
+
+
+def prompt_key(model: str, messages: Any, tools: Any = None) -> str:
+    """モデル名・メッセージ・ツール定義から LLM リクエストのキーを作る。"""
+    payload = json.dumps(
+        {'model': model, 'messages': _canonical(messages), 'tools': _canonical(tools)},
+        ensure_ascii=False, sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _task_name(task) -> str:
+    return getattr(task, 'name', None) or 'unknown'
+
+
+def _encode_response(response: Any) -> dict:
+    """LLM の応答を JSON で保存できる形にする。"""
+    if isinstance(response, list) and response:
+        calls = []
+        for call in response:
+            info = extract_tool_call_info(call)
+            if info is None:
+                break
+            call_id, name, arguments = info
+            if not isinstance(arguments, str):
+                arguments = json.dumps(arguments, ensure_ascii=False)
+            calls.append({'id': call_id, 'name': name, 'arguments': arguments})
+        else:
+            return {'tool_calls': calls}
+    if isinstance(response, BaseModel):
+        return {'text': response.model_dump_json()}
+    return {'text': response if isinstance(response, str) else str(response)}
+
+
+def _decode_response(data: dict) -> Any:
+    if 'tool_calls' in data:
+        return [
+            {
+                'id': call['id'],
+                'type': 'function',
+                'function': {'name': call['name'], 'arguments': call['arguments']},
+            }
+            for call in data['tool_calls']
+        ]
+    return data['text']
+
+
+class _StepCounter:
+    """タスクごとの LLM 呼び出し回数（記録と再生で同じ順番を対応付ける）。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = defaultdict(int)
+
+    def next(self, task_name: str) -> int:
+        with self._lock:
+            step = self._counts[task_name]
+            self._counts[task_name] += 1
+            return step
+
+
+class LLMRecordingStore:
+    """
+    LLM のリクエストと応答の組を JSONL ファイルに保存する。
+
+    各レコードはプロンプトのハッシュに加えて (タスク名, 何回目の呼び出しか) を持つ。
+    再生時はまずハッシュで引き、プロンプトが変わっていれば
+    （ツールの出力が違う等）タスク内の順番で引く。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.records: List[dict] = []
+        self._by_key: Dict[str, deque] = defaultdict(deque)
+        self._by_step: Dict[tuple, dict] = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        self._index(json.loads(line))
+        except FileNotFoundError:
+            pass
+
+    def _index(self, record: dict):
+        self.records.append(record)
+        self._by_key[record['key']].append(record)
+        self._by_step[(record['task'], record['step'])] = record
+
+    def append(self, record: dict):
+        with self._lock:
+            self._index(record)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def lookup(self, key: str, task_name: str, step: int, strict: bool) -> tuple:
+        """(レコード, 'exact' | 'sequence') を返す。見つからなければ (None, None)。"""
+        with self._lock:
+            queue = self._by_key.get(key)
+            if queue:
+                # 同じプロンプトが複数回記録されていれば記録順に返し、最後の 1 件は使い回す
+                record = queue.popleft() if len(queue) > 1 else queue[0]
+                return record, 'exact'
+            if not strict:
+                record = self._by_step.get((task_name, step))
+                if record is not None:
+                    return record, 'sequence'
+        return None, None
+
+    @property
+    def function_calling(self) -> bool:
+        """記録時のモデルがネイティブのツール呼び出しを使っていたか。"""
+        return any(r.get('function_calling') for r in self.records)
+
+    @property
+    def model(self) -> str:
+        return self.records[0]['model'] if self.records else 'replay'
+
+
+class RecordingLLM(BaseLLM):
+    """実際の LLM をラップし、すべてのリクエストと応答を LLMRecordingStore に記録する。"""
+
+    def __init__(self, inner: BaseLLM, store: LLMRecordingStore):
+        self.inner = inner
+        stop = list(inner.stop)
+        super().__init__(model=inner.model, temperature=getattr(inner, 'temperature', None))
+        self.stop = stop
+        self.store = store
+        self._steps = _StepCounter()
+
+    # crewAI のエグゼキュータは llm.stop に停止語を追加するので、ラップ先に転送する
+    @property
+    def stop(self) -> List[str]:
+        return self.inner.stop
+
+    @stop.setter
+    def stop(self, value: List[str]):
+        self.inner.stop = value
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None):
+        task_name = _task_name(from_task)
+        step = self._steps.next(task_name)
+        start = time.perf_counter()
+        # ラップ先は並列タスクで共有されるので、この呼び出しの使用量だけを記録する
+        with measure(self.inner) as usage:
+            response = self.inner.call(
+                messages, tools=tools, callbacks=callbacks, available_functions=available_functions,
+                from_task=from_task, from_agent=from_agent, response_model=response_model
+            )
+        latency_ms = (time.perf_counter() - start) * 1000
+        add_usage(self, usage)
+
+        self.store.append({
+            'key': prompt_key(self.model, messages, tools),
+            'task': task_name,
+            'agent': getattr(from_agent, 'role', '').strip() if from_agent else '',
+            'step': step,
+            'model': self.model,
+            'function_calling': self.supports_function_calling(),
+            'latency_ms': round(latency_ms, 1),
+            'usage': usage,
+            'response': _encode_response(response),
+        })
+        return response
+
+    def supports_function_calling(self) -> bool:
+        return self.inner.supports_function_calling()
+
+    def supports_stop_words(self) -> bool:
+        return self.inner.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self.inner.get_context_window_size()
+
+
+class StubLLM(BaseLLM):
+    """
+    ネットワークを使わない決定的なスタブモデル。
+
+    各タスクで script のツール呼び出し（(ツール名, 引数) の列）を ReAct 形式で順に行い、
+    最後にタスク名とプロンプトのハッシュから作った最終回答を返す。
+    """
+
+    def __init__(self, delay: float = 0.0, script: Optional[List[tuple]] = None):
+        super().__init__(model='roots-stub')
+        self.delay = delay
+        self.script = list(script or [])
+        self._steps = _StepCounter()
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None):
+        if self.delay:
+            time.sleep(self.delay)
+        task_name = _task_name(from_task)
+        step = self._steps.next(task_name)
+        if step < len(self.script):
+            tool_name, arguments = self.script[step]
+            return (
+                f"Thought: I need more information\n"
+                f"Action: {tool_name}\n"
+                f"Action Input: {json.dumps(arguments, ensure_ascii=False)}"
+            )
+        key = prompt_key(self.model, messages)[:12]
+        return (
+            "Thought: I now know the final answer\n"
+            f"Final Answer: stub output for {task_name} ({key})"
+        )
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+
+class ReplayLLM(BaseLLM):
+    """
+    LLMRecordingStore に記録された応答を返す LLM。
+
+    latency_scale が 0 より大きければ、記録時のレイテンシにその倍率を掛けた時間だけ待つ
+    （並列実行時のオーケストレーションを実際に近い条件で測るため）。
+    記録にないリクエストは fallback（StubLLM 等）に回し、fallback がなければ ReplayMissError。
+    strict=True ではプロンプトが完全一致したものだけを返す。
+    """
+
+    def __init__(self, store: LLMRecordingStore, latency_scale: float = 0.0,
+                 strict: bool = False, fallback: Optional[BaseLLM] = None):
+        super().__init__(model=store.model)
+        self.store = store
+        self.latency_scale = latency_scale
+        self.strict = strict
+        self.fallback = fallback
+        self._steps = _StepCounter()
+        self._lock = threading.Lock()
+        self.counts = {'exact': 0, 'sequence': 0, 'fallback': 0}
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None):
+        task_name = _task_name(from_task)
+        step = self._steps.next(task_name)
+        record, match = self.store.lookup(
+            prompt_key(self.model, messages, tools), task_name, step, self.strict
+        )
+
+        if record is None:
+            if self.fallback is None:
+                raise ReplayMissError(
+                    f"No recorded LLM response for task '{task_name}' step {step} "
+                    f"in {self.store.path}"
+                )
+            with self._lock:
+                self.counts['fallback'] += 1
+            return self.fallback.call(
+                messages, tools=tools, callbacks=callbacks,
+                available_functions=available_functions,
+                from_task=from_task, from_agent=from_agent, response_model=response_model
+            )
+
+        if self.latency_scale > 0:
+            time.sleep(record.get('latency_ms', 0) / 1000 * self.latency_scale)
+        with self._lock:
+            self.counts[match] += 1
+        # 実際の LLM と同じ経路で数える（roots.usage の呼び出しごとの計測にも入る）
+        if record.get('usage'):
+            self._track_token_usage_internal(record['usage'])
+        return _decode_response(record['response'])
+
+    def supports_function_calling(self) -> bool:
+        return self.store.function_calling
+
+    def report(self) -> str:
+        c = self.counts
+        return (
+            f"LLM replay: {c['exact']} exact, {c['sequence']} by task order, "
+            f"{c['fallback']} fallback ({self.store.path})"
+        )
@@ -1,50 +1,607 @@
 #!/usr/bin/env python
+import argparse
+import os
+import shutil
+import subprocess
 import sys
+import time
 import warnings
 
 from datetime import datetime
 
-from roots.crew import Roots
+# crewAI の import だけで数秒かかるため、重いモジュールは使う関数の中で import する
+# （--help や --profile-startup は crewAI を読み込まずに応答する）
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
-PROJECT_ROOT = "/Users/inu/Desktop/kidos"
+# フォーカスエリアごとに実行するタスク（上流タスクは自動的に含まれる。None は全タスク）
+FOCUS_AREAS = {
+    'full_audit': None,
+    'code_quality': ['code_audit'],
+    'spec': ['spec_verification'],
+    'compliance': ['compliance_review'],
+    'design': ['design_consistency_check'],
+    'build': ['build_verification'],
+}
+
+
+def _add_llm_cache_args(parser):
+    """LLM 応答キャッシュのオプション（run / train / test 共通、既定値は環境変数）。"""
+    parser.add_argument(
+        "--llm-cache", nargs="?", const="", default=os.environ.get('ROOTS_LLM_CACHE'), metavar="PATH",
+        help="LLM の応答を SQLite にキャッシュし、同じリクエストには保存済みの応答を返す"
+             "（既定: .roots/llm_cache.sqlite、環境変数 ROOTS_LLM_CACHE でも有効化）"
+    )
+    parser.add_argument(
+        "--llm-cache-strict", action="store_true",
+        default=os.environ.get('ROOTS_LLM_CACHE_STRICT', '') not in ('', '0'),
+        help="temperature が 0 のリクエストだけをキャッシュする"
+    )
+    parser.add_argument(
+        "--llm-cache-max-mb", type=float, default=float(os.environ.get('ROOTS_LLM_CACHE_MAX_MB') or 512),
+        help="キャッシュの上限（MB、超えたら最後に使われたのが古い応答から消す。既定 512）"
+    )
+    parser.add_argument(
+        "--llm-cache-ttl-hours", type=float,
+        default=float(os.environ.get('ROOTS_LLM_CACHE_TTL_HOURS') or 24 * 7),
+        help="キャッシュした応答の有効期間（時間、既定 168）"
+    )
+
+
+def _add_profile_args(parser):
+    """サンプリングプロファイラのオプション（run / batch / train / test 共通）。"""
+    parser.add_argument(
+        "--profile", nargs="?", const="", default=None, metavar="PATH",
+        help="実行全体をサンプリングプロファイラで計測し、flamegraph 用の PATH.folded と"
+             "ホットスポットの表 PATH.txt を書く（既定: .roots/profiles/profile-<日時>）"
+    )
+    parser.add_argument(
+        "--profile-interval", type=float, default=5.0, metavar="MS",
+        help="サンプリング間隔（ミリ秒、既定 5）"
+    )
+    parser.add_argument(
+        "--profile-top", type=int, default=25, metavar="N",
+        help="ホットスポットの表に出す関数の数（既定 25）"
+    )
+
+
+def _start_profiler(args):
+    if args.profile is None:
+        return None
+    from roots.profiler import SamplingProfiler
+    return SamplingProfiler(args.profile_interval).start()
+
+
+def _finish_profiler(profiler, args):
+    """プロファイラを止めて結果を保存し、表を表示する。"""
+    if profiler is None:
+        return
+    from roots.profiler import default_profile_path
+
+    profiler.stop()
+    base = args.profile or default_profile_path()
+    if base.endswith(('.folded', '.txt')):
+        base = os.path.splitext(base)[0]
+    print(f"\n{profiler.save(base, args.profile_top)}")
+
+
+def _llm_cache(args):
+    """--llm-cache が指定されていれば LLMResponseCache を開く。"""
+    if args.llm_cache is None or args.llm_cache == '0':
+        return None
+    from roots.llm_cache import LLMResponseCache
+    path = args.llm_cache if args.llm_cache not in ('', '1') else None
+    return LLMResponseCache(path, max_mb=args.llm_cache_max_mb, ttl_hours=args.llm_cache_ttl_hours)
+
+
+def _run_parser(prog: str = "roots", description: str = "Roots 自律開発チーム"):
+    parser = argparse.ArgumentParser(prog=prog, description=description)
+    parser.add_argument(
+        "--max-concurrency", type=int, default=None,
+        help="同時に実行するタスク数の上限（既定 4、1 で全タスクを順次実行）"
+    )
+    focus = parser.add_mutually_exclusive_group()
+    focus.add_argument(
+        "--task", action="append", default=None, metavar="NAME",
+        help="指定したタスク（複数指定可）とその上流タスクだけを実行する（例: build_verification）"
+    )
+    focus.add_argument(
+        "--focus", choices=sorted(FOCUS_AREAS), default=None,
+        help="フォーカスエリアのタスクとその上流タスクだけを実行する"
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="前回の実行以降に変更されたファイルだけを監査し、前回の結果と統合する"
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="前回の実行のチェックポイントから再開する（入力とコードが同じで完了済みのタスクは実行しない）"
+    )
+    parser.add_argument(
+        "--full-synthesis", action="store_true",
+        help="統合レポートに各タスクの出力全文を渡す（既定では構造化した指摘の要約を重複をまとめて渡す）"
+    )
+    parser.add_argument(
+        "--no-memory", action="store_true",
+        help="今回の指摘を長期記憶（.roots/memory.sqlite）に記録しない（過去の指摘の検索はできる）"
+    )
+    parser.add_argument(
+        "--trace-file", default=None,
+        help="スパンを書き出す JSONL ファイル（既定: .roots/traces/trace-<日時>.jsonl）"
+    )
+    parser.add_argument(
+        "--no-trace", action="store_true",
+        help="タスク・ツール・LLM 呼び出しのトレースを記録しない"
+    )
+    llm_mode = parser.add_mutually_exclusive_group()
+    llm_mode.add_argument(
+        "--record-llm", nargs="?", const="", default=None, metavar="PATH",
+        help="LLM のリクエストと応答を記録する（既定: .roots/llm_recordings/recording-<日時>.jsonl）"
+    )
+    llm_mode.add_argument(
+        "--replay-llm", default=None, metavar="PATH",
+        help="記録済みの LLM 応答を再生し、ネットワークなしで実行する"
+    )
+    llm_mode.add_argument(
+        "--stub-llm", action="store_true",
+        help="決定的なスタブモデルで実行する（LLM を呼ばずにオーケストレーションだけを確認）"
+    )
+    parser.add_argument(
+        "--llm-rpm", type=float, default=None, metavar="N",
+        help="LLM へのリクエスト数の上限（1 分あたり、既定: 環境変数 ROOTS_LLM_RPM、未設定なら無制限）"
+    )
+    parser.add_argument(
+        "--llm-tpm", type=float, default=None, metavar="N",
+        help="LLM のトークン数の上限（1 分あたり、既定: 環境変数 ROOTS_LLM_TPM、未設定なら無制限）"
+    )
+    _add_llm_cache_args(parser)
+    _add_profile_args(parser)
+    parser.add_argument(
+        "--profile-startup", action="store_true",
+        help="import と crew 構築にかかる時間の内訳を表示して終了する"
+    )
+    return parser
+
+
+def _parse_run_args(argv):
+    parser = _run_parser()
+    parser.add_argument(
+        "--project-root", default=None, metavar="PATH",
+        help="監査対象のプロジェクト（既定: 環境変数 ROOTS_PROJECT_ROOT、なければ /Users/inu/Desktop/kidos）"
+    )
+    return parser.parse_args(argv)
+
+
+def _select_llm(args, scheduler, cache=None):
+    """
+    --record-llm / --replay-llm / --stub-llm に応じた LLM。
+    実際のモデルへの呼び出しはすべて scheduler を通す（記録時の遅延には待ち時間を含めない）。
+    cache があれば、キャッシュに応答があるリクエストはモデルもスケジューラも通さない。
+    """
+    from crewai.utilities.llm_utils import create_llm
+    from roots.llm_replay import (
+        LLMRecordingStore, RecordingLLM, ReplayLLM, StubLLM, default_recording_path,
+    )
+    from roots.scheduler import ScheduledLLM
+
+    if args.replay_llm is not None:
+        if not os.path.exists(args.replay_llm):
+            raise FileNotFoundError(f"LLM の記録が見つかりません: {args.replay_llm}")
+        return ReplayLLM(LLMRecordingStore(args.replay_llm), fallback=StubLLM())
+    if args.stub_llm:
+        return StubLLM()
+
+    llm = ScheduledLLM(create_llm(None), scheduler)
+    if cache is not None:
+        from roots.llm_cache import CachedLLM
+        llm = CachedLLM(llm, cache, strict=args.llm_cache_strict)
+    if args.record_llm is not None:
+        store = LLMRecordingStore(args.record_llm or default_recording_path())
+        print(f"LLM の応答を記録します: {store.path}")
+        return RecordingLLM(llm, store)
+    return llm
 
 
 def run():
     """
-    フル監査モード: 全エージェントが順次タスクを実行し、統合レポートを出力。
+    フル監査モード: タスクの依存関係に従い、独立したタスクを並列実行して統合レポートを出力。
     """
+    args = _parse_run_args(sys.argv[1:])
+    if args.profile_startup:
+        from roots.startup import profile_startup
+        print(profile_startup())
+        return
+    _audit(args)
+
+
+def _audit(args):
+    """1 つのプロジェクトを監査する（run とバッチモードの各ワーカーから呼ばれる）。"""
+    from roots.checkpoint import CheckpointStore
+    from roots.crew import Roots
+    from roots.dag import DEFAULT_MAX_CONCURRENCY, critical_path
+    from roots.history import TaskHistory, git_head, plan_focused, plan_incremental
+    from roots.llm_replay import ReplayLLM
+    from roots.memory import open_memory
+    from roots.project import get_project_root, set_project_root
+    from roots.scheduler import LLMScheduler
+    from roots.tools.cache import TOOL_CACHE
+    from roots.tracing import Tracer
+
+    project_root = set_project_root(args.project_root) if args.project_root else get_project_root()
+    targets = args.task or FOCUS_AREAS.get(args.focus)
+    if args.task:
+        focus_area = ', '.join(args.task)
+    else:
+        focus_area = args.focus or 'full_audit'
     inputs = {
-        'project_root': PROJECT_ROOT,
+        'project_root': project_root,
         'current_phase': '1',
-        'focus_area': 'full_audit',
+        'focus_area': focus_area,
         'current_year': str(datetime.now().year)
     }
 
+    tracer = None if args.no_trace else Tracer(args.trace_file).start()
+    profiler = _start_profiler(args)
     try:
-        result = Roots().crew().kickoff(inputs=inputs)
+        scheduler = LLMScheduler.from_env(args.llm_rpm, args.llm_tpm)
+        cache = _llm_cache(args)
+        llm = _select_llm(args, scheduler, cache)
+        max_concurrency = args.max_concurrency
+        if max_concurrency is None:
+            max_concurrency = DEFAULT_MAX_CONCURRENCY
+        crew = Roots(max_concurrency=max_concurrency, llm=llm, task_names=targets,
+                     map_reduce=not args.full_synthesis).crew()
+        scheduler.priorities = critical_path(crew.tasks)
+        commit = git_head(project_root)
+        history = TaskHistory(project_root)
+        # 各タスクの完了時に出力とツールキャッシュを保存し、--resume ではそこから再開する
+        crew.checkpoint = CheckpointStore(project_root, commit)
+        if args.resume:
+            crew.checkpoint.resume = True
+            restored = crew.checkpoint.restore_tool_cache()
+            print(f"チェックポイントから再開します（ツールキャッシュ {restored} 件を復元）")
+        else:
+            crew.checkpoint.reset()
+        # 過去の指摘のうち、ファイルが変わったものは記録し直されるまで忘れる
+        memory = open_memory(project_root)
+        forgotten = memory.prune()
+        if not args.no_memory:
+            memory.commit = commit
+            crew.findings_memory = memory
+        if forgotten:
+            print(f"長期記憶: ファイルが変更された過去の指摘 {forgotten} 件を削除しました")
+        if args.incremental:
+            crew.reuse_outputs, crew.task_notes = plan_incremental(crew.tasks, history, project_root)
+            print(
+                f"差分監査モード: {len(crew.reuse_outputs)} タスクは前回の結果を再利用、"
+                f"{len(crew.task_notes)} タスクは変更ファイルのみ監査"
+            )
+
+        # 上流タスクは前回の出力があれば再利用する（差分監査で再実行が決まったものは除く）
+        upstream_reuse = {}
+        if targets:
+            upstream_reuse = {
+                name: output
+                for name, output in plan_focused(crew.tasks, targets, history).items()
+                if name not in crew.reuse_outputs and name not in crew.task_notes
+            }
+            crew.reuse_outputs.update(upstream_reuse)
+            print(
+                f"対象タスク: {', '.join(t.name for t in crew.tasks if t.name not in crew.reuse_outputs)}"
+                f"（前回の結果を再利用: {', '.join(crew.reuse_outputs) or 'なし'}）"
+            )
+
+        result = crew.kickoff(inputs=inputs)
+        if crew.checkpoint.resumed:
+            print(f"チェックポイントの結果を使用: {', '.join(crew.checkpoint.resumed)}")
+        # 前回の出力をそのまま使った上流タスクは、今回のコミットで記録し直さない
+        history.record([o for o in result.tasks_output if o.name not in upstream_reuse], commit)
         print("\n" + "=" * 60)
         print("Roots 自律開発チーム - 実行完了")
         print("=" * 60)
-        print(f"\n統合レポートが report.md に出力されました。")
+        if any(t.name == 'synthesis_report' for t in crew.tasks):
+            print(f"\n統合レポートが report.md に出力されました。")
         print(f"\n結果サマリー:\n{result}")
+        print(f"\n{TOOL_CACHE.report()}")
+        print(memory.report())
+        print(scheduler.report())
+        if cache is not None:
+            print(cache.report())
+        if isinstance(llm, ReplayLLM):
+            print(llm.report())
     except Exception as e:
         raise Exception(f"エージェントチーム実行中にエラーが発生しました: {e}")
+    finally:
+        if tracer is not None:
+            tracer.stop()
+            print(f"\n{tracer.summary()}")
+        _finish_profiler(profiler, args)
+
+
+def _parse_batch_args(argv):
+    parser = _run_parser(
+        prog="roots_batch",
+        description="複数のリポジトリ（フォーク・ブランチのチェックアウト）をプロセスプールで並列に監査する"
+    )
+    parser.add_argument(
+        "repositories", nargs="+", metavar="[LABEL=]PATH",
+        help="監査するリポジトリ（LABEL は結果ディレクトリ名。既定はディレクトリ名）"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="同時に監査するリポジトリ数（既定: リポジトリ数と 4 の小さい方）"
+    )
+    parser.add_argument(
+        "--output-dir", default=None, metavar="DIR",
+        help="リポジトリごとの結果（report.md、履歴、トレース、ログ）の保存先（既定: .roots/batch/）"
+    )
+    parser.add_argument(
+        "--baseline", action="store_true",
+        help="最初のリポジトリを先に監査し、他のリポジトリはその結果からの差分監査にする"
+    )
+    args = parser.parse_args(argv)
+    if args.profile_startup:
+        parser.error("--profile-startup はバッチモードでは使えません")
+    if args.trace_file or args.record_llm or args.profile:
+        parser.error("--trace-file / --record-llm PATH / --profile PATH はリポジトリごとに自動で決まるため指定できません")
+    return args
+
+
+def _worker_argv(args, workers: int) -> list:
+    """バッチの引数のうち、各リポジトリの監査にそのまま渡すもの。"""
+    argv = []
+    if args.max_concurrency is not None:
+        argv += ['--max-concurrency', str(args.max_concurrency)]
+    for name in args.task or []:
+        argv += ['--task', name]
+    if args.focus:
+        argv += ['--focus', args.focus]
+    if args.incremental:
+        argv.append('--incremental')
+    if args.resume:
+        argv.append('--resume')
+    if args.full_synthesis:
+        argv.append('--full-synthesis')
+    if args.no_memory:
+        argv.append('--no-memory')
+    if args.no_trace:
+        argv.append('--no-trace')
+    if args.record_llm is not None:
+        # 記録先は各リポジトリの結果ディレクトリ内（既定のパス）
+        argv.append('--record-llm')
+    if args.replay_llm is not None:
+        # ワーカーは結果ディレクトリに移動するので絶対パスにする
+        argv += ['--replay-llm', os.path.abspath(args.replay_llm)]
+    if args.stub_llm:
+        argv.append('--stub-llm')
+    if args.profile is not None:
+        # 各リポジトリの結果ディレクトリの profiles/ に書く
+        argv += ['--profile', '--profile-interval', str(args.profile_interval),
+                 '--profile-top', str(args.profile_top)]
+    if args.llm_cache is not None:
+        # SQLite の WAL モードで複数プロセスから同じキャッシュを共有できる
+        argv += ['--llm-cache', os.path.abspath(args.llm_cache) if args.llm_cache not in ('', '1') else '1']
+        if args.llm_cache_strict:
+            argv.append('--llm-cache-strict')
+        argv += ['--llm-cache-max-mb', str(args.llm_cache_max_mb),
+                 '--llm-cache-ttl-hours', str(args.llm_cache_ttl_hours)]
+    # レート制限はプロバイダ側で全ワーカー合計に掛かるので、ワーカー数で分ける
+    if args.llm_rpm:
+        argv += ['--llm-rpm', str(args.llm_rpm / workers)]
+    if args.llm_tpm:
+        argv += ['--llm-tpm', str(args.llm_tpm / workers)]
+    return argv
+
+
+def _batch_jobs(args, workers: int) -> list:
+    """リポジトリごとの監査ジョブ（ラベル・ルート・結果ディレクトリ・ワーカーに渡す引数）。"""
+    from roots.state import state_path
+
+    output_dir = os.path.abspath(args.output_dir or os.path.dirname(state_path('batch', 'x')))
+    jobs, labels = [], set()
+    for spec in args.repositories:
+        label, _, path = spec.rpartition('=')
+        root = os.path.realpath(path)
+        if not os.path.isdir(root):
+            raise FileNotFoundError(f"リポジトリが見つかりません: {path}")
+        label = label or os.path.basename(root)
+        unique, n = label, 2
+        while unique in labels:
+            unique, n = f"{label}-{n}", n + 1
+        labels.add(unique)
+        jobs.append({
+            'label': unique,
+            'root': root,
+            'state_dir': os.path.join(output_dir, unique),
+            'argv': _worker_argv(args, workers) + ['--project-root', root],
+            'content_key': _content_key(root),
+        })
+    return jobs
+
+
+def _content_key(project_root: str):
+    """
+    作業ツリーの内容を表すキー（git のツリーハッシュ）。
+    未コミットの変更がある、または git 管理外の場合は None（内容の一致を判定しない）。
+    """
+    try:
+        status = subprocess.run(['git', 'status', '--porcelain'], cwd=project_root,
+                                capture_output=True, text=True, timeout=60)
+        tree = subprocess.run(['git', 'rev-parse', 'HEAD^{tree}'], cwd=project_root,
+                              capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if status.returncode != 0 or status.stdout.strip() or tree.returncode != 0:
+        return None
+    return tree.stdout.strip()
+
+
+def _audit_worker(job: dict) -> dict:
+    """バッチモードの 1 リポジトリ分の監査（ワーカープロセスで実行）。"""
+    os.makedirs(job['state_dir'], exist_ok=True)
+    # 履歴・トレースはリポジトリごと、内容で引くキャッシュは全リポジトリで共有する
+    os.environ['ROOTS_STATE_DIR'] = job['state_dir']
+    os.environ['ROOTS_CACHE_DIR'] = job['cache_dir']
+    # synthesis_report の report.md はカレントディレクトリに書かれる
+    os.chdir(job['state_dir'])
+    seed = job.get('seed_history')
+    if seed:
+        from roots.history import history_path
+
+        target = history_path(job['root'])
+        if not os.path.exists(target):
+            shutil.copyfile(history_path(seed['root'], seed['state_dir']), target)
+
+    log_path = os.path.join(job['state_dir'], 'run.log')
+    with open(log_path, 'w', encoding='utf-8') as log:
+        # 並列に動く crew の出力が混ざらないよう、このプロセスの出力はすべてログへ
+        os.dup2(log.fileno(), 1)
+        os.dup2(log.fileno(), 2)
+        start = time.perf_counter()
+        error = None
+        try:
+            _audit(_parse_run_args(job['argv']))
+        except Exception as e:
+            error = str(e)
+        sys.stdout.flush()
+        sys.stderr.flush()
+    return {'label': job['label'], 'root': job['root'], 'seconds': time.perf_counter() - start,
+            'error': error, 'log': log_path}
+
+
+def batch():
+    """
+    複数のリポジトリを並列に監査する。
+
+    各リポジトリは別プロセスで監査し、結果は --output-dir/<LABEL>/ に保存する。
+    内容が同じリポジトリ（ツリーハッシュが一致）は一度だけ監査して結果をコピーし、
+    ファイル内容で引くキャッシュ（ナレッジ索引・プロジェクト概要）は全リポジトリで共有する。
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    from roots.state import cache_dir, save_json
+
+    args = _parse_batch_args(sys.argv[1:])
+    workers = max(args.workers or min(len(args.repositories), 4), 1)
+    jobs = _batch_jobs(args, workers)
+    shared_cache = cache_dir()
+    for job in jobs:
+        job['cache_dir'] = shared_cache
+
+    # 内容が同じリポジトリは代表の 1 つだけ監査する
+    representative = {}
+    audited, duplicates = [], []
+    for job in jobs:
+        key = job['content_key']
+        if key is not None and key in representative:
+            duplicates.append((job, representative[key]))
+            continue
+        if key is not None:
+            representative[key] = job
+        audited.append(job)
+
+    waves = [audited]
+    if args.baseline and len(audited) > 1:
+        baseline = audited[0]
+        for job in audited[1:]:
+            job['seed_history'] = {'root': baseline['root'], 'state_dir': baseline['state_dir']}
+            if '--incremental' not in job['argv']:
+                job['argv'].append('--incremental')
+        waves = [[baseline], audited[1:]]
+
+    print(f"{len(jobs)} リポジトリを監査します（ワーカー {workers}、"
+          f"内容が重複するため省略 {len(duplicates)}、結果: {os.path.dirname(jobs[0]['state_dir'])}）")
+    results = {}
+    started = time.perf_counter()
+    # crewAI はスレッドを使うので fork ではなく spawn でワーカーを起動する
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        for wave in waves:
+            futures = {pool.submit(_audit_worker, job): job for job in wave}
+            for future in as_completed(futures):
+                result = future.result()
+                results[result['label']] = result
+                status = f"失敗: {result['error']}" if result['error'] else "完了"
+                print(f"  {result['label']:<24} {status}（{result['seconds']:.1f} 秒、ログ: {result['log']}）")
+
+    for job, source in duplicates:
+        from roots.history import history_path
+
+        os.makedirs(job['state_dir'], exist_ok=True)
+        # 履歴はプロジェクトのパスで引くので、コピー先のリポジトリの名前で保存する
+        copies = [(os.path.join(source['state_dir'], 'report.md'), os.path.join(job['state_dir'], 'report.md')),
+                  (history_path(source['root'], source['state_dir']), history_path(job['root'], job['state_dir']))]
+        for path, target in copies:
+            if os.path.exists(path):
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copyfile(path, target)
+        results[job['label']] = {'label': job['label'], 'root': job['root'], 'seconds': 0.0,
+                                 'error': results[source['label']]['error'],
+                                 'same_content_as': source['label']}
+        print(f"  {job['label']:<24} {source['label']} と同じ内容のため結果をコピーしました")
+
+    summary_path = os.path.join(os.path.dirname(jobs[0]['state_dir']), 'batch_summary.json')
+    save_json(summary_path, {
+        'finished_at': datetime.now().isoformat(timespec='seconds'),
+        'wall_seconds': round(time.perf_counter() - started, 3),
+        'repositories': [results[job['label']] for job in jobs],
+    })
+    print(f"\nバッチ監査が完了しました（{time.perf_counter() - started:.1f} 秒）。サマリー: {summary_path}")
+    if any(r['error'] for r in results.values()):
+        sys.exit(1)
+
+
+def _parse_iteration_args(prog: str, argv, second: str, second_help: str, workers: bool = False):
+    parser = argparse.ArgumentParser(prog=prog)
+    parser.add_argument("n_iterations", type=int, help="繰り返し回数")
+    parser.add_argument(second, help=second_help)
+    if workers:
+        parser.add_argument(
+            "--workers", type=int, default=int(os.environ.get('ROOTS_ITERATION_WORKERS') or 1),
+            help="繰り返しを並列に実行するプロセス数（既定 1: 順に実行、環境変数 ROOTS_ITERATION_WORKERS）"
+        )
+    _add_llm_cache_args(parser)
+    _add_profile_args(parser)
+    return parser.parse_args(argv)
+
+
+def _iteration_llm(args):
+    """train / test で使う LLM（スケジューラ経由、--llm-cache があればキャッシュ付き）と、そのキャッシュ。"""
+    from crewai.utilities.llm_utils import create_llm
+    from roots.scheduler import LLMScheduler, ScheduledLLM
+
+    cache = _llm_cache(args)
+    llm = ScheduledLLM(create_llm(None), LLMScheduler.from_env())
+    if cache is not None:
+        from roots.llm_cache import CachedLLM
+        llm = CachedLLM(llm, cache, strict=args.llm_cache_strict)
+    return llm, cache
 
 
 def train():
     """
     Train the crew for a given number of iterations.
     """
+    from roots.crew import Roots
+    from roots.project import get_project_root
+
+    args = _parse_iteration_args("train", sys.argv[1:], "filename", "学習結果を保存するファイル")
     inputs = {
-        'project_root': PROJECT_ROOT,
+        'project_root': get_project_root(),
         'current_phase': '1',
         'focus_area': 'full_audit',
         'current_year': str(datetime.now().year)
     }
     try:
-        Roots().crew().train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=inputs)
+        llm, cache = _iteration_llm(args)
+        profiler = _start_profiler(args)
+        try:
+            Roots(llm=llm).crew().train(n_iterations=args.n_iterations, filename=args.filename, inputs=inputs)
+        finally:
+            _finish_profiler(profiler, args)
+        if cache is not None:
+            print(cache.report())
     except Exception as e:
         raise Exception(f"An error occurred while training the crew: {e}")
 
@@ -53,23 +610,178 @@ def replay():
     """
     Replay the crew execution from a specific task.
     """
+    from roots.crew import Roots
+
     try:
         Roots().crew().replay(task_id=sys.argv[1])
     except Exception as e:
         raise Exception(f"An error occurred while replaying the crew: {e}")
 
 
+def _eval_llm(args, cache):
+    """test の採点に使う LLM（--llm-cache があれば、同じ出力の採点も再利用する）。"""
+    from crewai.utilities.llm_utils import create_llm
+
+    eval_llm = create_llm(args.eval_llm)
+    if cache is not None:
+        from roots.llm_cache import CachedLLM
+        eval_llm = CachedLLM(eval_llm, cache, strict=args.llm_cache_strict)
+    return eval_llm
+
+
+def _test_iteration_worker(job: dict) -> dict:
+    """test の 1 回分（ワーカープロセスで実行）。crew はプロセスごとに作る。"""
+    from roots.crew import Roots
+    from roots.iterations import OrderedCrewEvaluator
+
+    os.makedirs(job['state_dir'], exist_ok=True)
+    # 履歴・report.md は回ごと、内容で引くキャッシュ（読み取り専用の索引）は全ワーカーで共有する
+    os.environ['ROOTS_STATE_DIR'] = job['state_dir']
+    os.environ['ROOTS_CACHE_DIR'] = job['cache_dir']
+    os.environ.update(job['env'])
+    os.chdir(job['state_dir'])
+
+    log_path = os.path.join(job['state_dir'], 'run.log')
+    with open(log_path, 'w', encoding='utf-8') as log:
+        os.dup2(log.fileno(), 1)
+        os.dup2(log.fileno(), 2)
+        start = time.perf_counter()
+        error, result, cache_stats = None, None, None
+        try:
+            args = _parse_iteration_args("test", job['argv'], "eval_llm", "評価に使うモデル", workers=True)
+            llm, cache = _iteration_llm(args)
+            crew = Roots(llm=llm).crew()
+            evaluator = OrderedCrewEvaluator(crew, _eval_llm(args, cache))
+            evaluator.set_iteration(job['iteration'])
+            profiler = _start_profiler(args)
+            try:
+                crew.kickoff(inputs=dict(job['inputs']))
+            finally:
+                _finish_profiler(profiler, args)
+            result = evaluator.export_iteration(job['iteration'])
+            if cache is not None:
+                cache_stats = cache.stats()
+                print(cache.report())
+        except Exception as e:
+            error = str(e)
+        sys.stdout.flush()
+        sys.stderr.flush()
+    return {'iteration': job['iteration'], 'seconds': time.perf_counter() - start,
+            'error': error, 'log': log_path, 'result': result, 'cache': cache_stats}
+
+
+def _parallel_test(args, inputs: dict, evaluator, cache):
+    """
+    test の各回を別プロセスで並列に実行し、結果を evaluator に集める。
+
+    ナレッジ・コード・重複検出・複雑度・git 履歴の索引、import グラフとプロジェクト概要は親で一度作っておき、
+    ワーカーは cache_dir() のキャッシュを読むだけにする。
+    レート制限（ROOTS_LLM_RPM / TPM）はワーカー数で分ける。
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    from roots.churn import CHURN_INDEX
+    from roots.complexity import COMPLEXITY_INDEX
+    from roots.digest import project_digest
+    from roots.duplicates import DUPLICATE_INDEX, source_files
+    from roots.imports import IMPORT_GRAPH
+    from roots.state import cache_dir, state_path
+    from roots.tools.code_search import CODE_INDEX, code_files
+    from roots.tools.knowledge_search import KNOWLEDGE_INDEX, corpus_files
+
+    workers = min(args.workers, args.n_iterations)
+    KNOWLEDGE_INDEX.refresh(corpus_files(inputs['project_root']))
+    CODE_INDEX.refresh(code_files(inputs['project_root']))
+    sources = source_files(inputs['project_root'])
+    DUPLICATE_INDEX.refresh(sources)
+    IMPORT_GRAPH.refresh(inputs['project_root'], sources)
+    COMPLEXITY_INDEX.refresh(sources)
+    CHURN_INDEX.stats(inputs['project_root'])
+    inputs['project_digest'] = project_digest(inputs['project_root'])
+
+    argv = [str(1), args.eval_llm, '--workers', '1',
+            '--llm-cache', cache.path if cache is not None else '0',
+            '--llm-cache-max-mb', str(args.llm_cache_max_mb),
+            '--llm-cache-ttl-hours', str(args.llm_cache_ttl_hours)]
+    if args.llm_cache_strict:
+        argv.append('--llm-cache-strict')
+    if args.profile is not None:
+        # 各回の結果ディレクトリの profiles/ に書く
+        argv += ['--profile', '--profile-interval', str(args.profile_interval),
+                 '--profile-top', str(args.profile_top)]
+    env = {
+        name: str(float(os.environ[name]) / workers)
+        for name in ('ROOTS_LLM_RPM', 'ROOTS_LLM_TPM') if os.environ.get(name)
+    }
+    jobs = [{
+        'iteration': i,
+        'argv': argv,
+        'env': env,
+        'inputs': inputs,
+        'state_dir': os.path.dirname(state_path('test', f"run-{i}", 'x')),
+        'cache_dir': cache_dir(),
+    } for i in range(1, args.n_iterations + 1)]
+
+    print(f"{args.n_iterations} 回のテストを {workers} プロセスで並列に実行します"
+          f"（結果: {os.path.dirname(jobs[0]['state_dir'])}）")
+    errors = []
+    # crewAI はスレッドを使うので fork ではなく spawn でワーカーを起動する
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [pool.submit(_test_iteration_worker, job) for job in jobs]
+        for future in as_completed(futures):
+            done = future.result()
+            status = f"失敗: {done['error']}" if done['error'] else "完了"
+            print(f"  Run {done['iteration']:<4} {status}（{done['seconds']:.1f} 秒、ログ: {done['log']}）")
+            if done['error']:
+                errors.append(done['iteration'])
+                continue
+            evaluator.import_iteration(done['iteration'], done['result'])
+            if cache is not None and done['cache']:
+                cache.hits += done['cache']['hits']
+                cache.misses += done['cache']['misses']
+                cache.bypassed += done['cache']['bypassed']
+                cache.evicted += done['cache']['evicted']
+    if errors:
+        raise RuntimeError(f"failed iterations: {sorted(errors)}")
+
+
 def test():
     """
     Test the crew execution and returns the results.
     """
+    from roots.crew import Roots
+    from roots.iterations import OrderedCrewEvaluator
+    from roots.project import get_project_root
+
+    args = _parse_iteration_args("test", sys.argv[1:], "eval_llm", "評価に使うモデル", workers=True)
     inputs = {
-        'project_root': PROJECT_ROOT,
+        'project_root': get_project_root(),
         'current_phase': '1',
         'focus_area': 'full_audit',
         'current_year': str(datetime.now().year)
     }
     try:
-        Roots().crew().test(n_iterations=int(sys.argv[1]), eval_llm=sys.argv[2], inputs=inputs)
+        llm, cache = _iteration_llm(args)
+        crew = Roots(llm=llm).crew()
+        # Crew.test の CrewEvaluator は完了順にスコアを並べるので、並列実行では表がずれる
+        evaluator = OrderedCrewEvaluator(crew, _eval_llm(args, cache))
+        if args.workers > 1 and args.n_iterations > 1:
+            _parallel_test(args, inputs, evaluator, cache)
+        else:
+            profiler = _start_profiler(args)
+            try:
+                for i in range(1, args.n_iterations + 1):
+                    evaluator.set_iteration(i)
+                    crew.kickoff(inputs=inputs)
+            finally:
+                _finish_profiler(profiler, args)
+        missing = evaluator.missing_tasks()
+        if missing:
+            raise RuntimeError(f"tasks without a score: {missing}")
+        evaluator.print_crew_evaluation_result()
+        if cache is not None:
+            print(cache.report())
     except Exception as e:
         raise Exception(f"An error occurred while testing the crew: {e}")
@@ -0,0 +1,255 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from roots.findings import SEVERITIES, normalize_file
+from roots.state import state_path
+from roots.tools.knowledge_search import tokenize
+
+DEFAULT_MEMORY_FILE = 'memory.sqlite'
+# ファイルに紐づかない指摘・領域の要約は、この日数を過ぎたら忘れる
+MAX_UNFILED_AGE_DAYS = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    project TEXT NOT NULL,
+    task TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    file TEXT NOT NULL,
+    file_hash TEXT,
+    title TEXT NOT NULL,
+    detail TEXT NOT NULL,
+    commit_id TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    seen INTEGER NOT NULL DEFAULT 1,
+    UNIQUE (project, task, kind, file, title)
+);
+CREATE INDEX IF NOT EXISTS entries_file ON entries (project, file);
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(terms);
+"""
+
+
+def file_hash(project_root: str, relative: str) -> Optional[str]:
+    """ファイル内容の SHA-1（ファイルがなければ None）。"""
+    if not relative:
+        return None
+    try:
+        with open(os.path.join(project_root, relative), 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+class FindingsMemory:
+    """
+    過去の監査の指摘（ファイル・分類ごと）と各領域の要約を SQLite FTS5 に保存する長期記憶。
+
+    - 指摘は記録時のファイル内容のハッシュを持ち、ファイルが変わったら消す
+    - ファイルに紐づかない指摘と要約は、同じタスクの次の記録で置き換える
+    - 検索は日本語を文字 bigram にして FTS5 の BM25 で順位付けする（埋め込みモデル不要）
+
+    crewAI 標準の memory は埋め込みサービスが必要なので使わず、
+    DagCrew がタスクの出力から抽出した指摘（roots.findings）をここに記録する。
+    """
+
+    def __init__(self, project_root: str, path: Optional[str] = None):
+        self.project_root = os.path.realpath(project_root)
+        self.path = path or state_path(DEFAULT_MEMORY_FILE)
+        # 記録する指摘の監査対象コミット（_audit で設定する）
+        self.commit: Optional[str] = None
+        self.recorded = 0
+        self.invalidated = 0
+        self.queries = 0
+        self._lock = threading.Lock()
+        self._hashes: Dict[str, Tuple[tuple, Optional[str]]] = {}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # エージェントは別スレッドで動くので接続を共有し、ロックで直列化する
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def _relative(self, path: str) -> str:
+        path = normalize_file(path)
+        if os.path.isabs(path) and path.startswith(self.project_root + os.sep):
+            path = os.path.relpath(path, self.project_root)
+        return path
+
+    def _current_hash(self, relative: str) -> Optional[str]:
+        """ファイルの現在のハッシュ（mtime とサイズが同じなら前回の値を使う）。"""
+        try:
+            stat = os.stat(os.path.join(self.project_root, relative))
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+        cached = self._hashes.get(relative)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        digest = file_hash(self.project_root, relative)
+        self._hashes[relative] = (signature, digest)
+        return digest
+
+    def _delete(self, ids: List[int]):
+        for entry_id in ids:
+            self._db.execute("DELETE FROM entries WHERE id = ?", (entry_id,))
+            self._db.execute("DELETE FROM entries_fts WHERE rowid = ?", (entry_id,))
+
+    def _upsert(self, task: str, kind: str, topic: str, severity: str, file: str,
+                title: str, detail: str, now: float):
+        digest = self._current_hash(file) if file else None
+        row = self._db.execute(
+            "SELECT id FROM entries WHERE project = ? AND task = ? AND kind = ? AND file = ? AND title = ?",
+            (self.project_root, task, kind, file, title)
+        ).fetchone()
+        if row is not None:
+            self._db.execute(
+                "UPDATE entries SET topic = ?, severity = ?, file_hash = ?, detail = ?, commit_id = ?, "
+                "last_seen = ?, seen = seen + 1 WHERE id = ?",
+                (topic, severity, digest, detail, self.commit, now, row[0])
+            )
+            self._db.execute("DELETE FROM entries_fts WHERE rowid = ?", (row[0],))
+            entry_id = row[0]
+        else:
+            entry_id = self._db.execute(
+                "INSERT INTO entries (project, task, kind, topic, severity, file, file_hash, title, detail, "
+                "commit_id, first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.project_root, task, kind, topic, severity, file, digest, title, detail,
+                 self.commit, now, now)
+            ).lastrowid
+        terms = tokenize(" ".join((task, topic, file, title, detail)))
+        self._db.execute("INSERT INTO entries_fts (rowid, terms) VALUES (?, ?)",
+                         (entry_id, " ".join(terms)))
+
+    def record(self, task_name: str, result: dict):
+        """1 タスク分の抽出結果（roots.findings の形式）を記録する。"""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                # ファイルに紐づかない指摘と要約は、前回の記録を置き換える
+                stale = [r[0] for r in self._db.execute(
+                    "SELECT id FROM entries WHERE project = ? AND task = ? AND file = ''",
+                    (self.project_root, task_name)
+                )]
+                self._delete(stale)
+                if result.get('summary'):
+                    self._upsert(task_name, 'summary', 'summary', '', '', f"{task_name} の評価",
+                                 result['summary'], now)
+                for finding in result.get('findings', []):
+                    self._upsert(task_name, 'finding', finding['category'], finding['severity'],
+                                 self._relative(finding['file']), finding['title'],
+                                 finding['detail'], now)
+                    self.recorded += 1
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _stale(self, rows) -> List[int]:
+        """記録後に内容が変わったファイルの指摘。"""
+        return [entry_id for entry_id, file, digest in rows
+                if file and self._current_hash(file) != digest]
+
+    def prune(self) -> int:
+        """ファイルが変わった指摘と、古くなったファイルなしの指摘を消す。消した件数を返す。"""
+        cutoff = time.time() - MAX_UNFILED_AGE_DAYS * 86400
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, file, file_hash FROM entries WHERE project = ? AND file != ''",
+                (self.project_root,)
+            ).fetchall()
+            ids = self._stale(rows) + [r[0] for r in self._db.execute(
+                "SELECT id FROM entries WHERE project = ? AND file = '' AND last_seen < ?",
+                (self.project_root, cutoff)
+            )]
+            self._delete(ids)
+            self.invalidated += len(ids)
+        return len(ids)
+
+    def search(self, query: str, file: str = "", top_k: int = 10) -> List[dict]:
+        """
+        過去の指摘を検索する。file を指定するとパスにその文字列を含む指摘だけを返す。
+        内容が変わったファイルの指摘は見つかった時点で消し、結果に含めない。
+        """
+        terms = sorted(set(tokenize(query)))
+        conditions, params = ["e.project = ?"], [self.project_root]
+        if file:
+            conditions.append("e.file LIKE ?")
+            params.append(f"%{self._relative(file)}%")
+        where = " AND ".join(conditions)
+        if terms:
+            match = " OR ".join(f'"{t}"' for t in terms)
+            sql = (
+                "SELECT e.*, bm25(entries_fts) AS score FROM entries_fts "
+                "JOIN entries e ON e.id = entries_fts.rowid "
+                f"WHERE entries_fts MATCH ? AND {where} ORDER BY score LIMIT ?"
+            )
+            params = [match] + params
+        elif file:
+            sql = f"SELECT e.*, 0.0 AS score FROM entries e WHERE {where} ORDER BY e.last_seen DESC LIMIT ?"
+        else:
+            return []
+        params.append(top_k * 3)
+
+        with self._lock:
+            self.queries += 1
+            cursor = self._db.execute(sql, params)
+            columns = [c[0] for c in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            stale = set(self._stale((r['id'], r['file'], r['file_hash']) for r in rows))
+            self._delete(sorted(stale))
+            self.invalidated += len(stale)
+        rows.sort(key=lambda r: (r['score'], SEVERITIES.index(r['severity'])
+                                 if r['severity'] in SEVERITIES else len(SEVERITIES)))
+        # 複数のタスクが同じ指摘をしていれば 1 件にまとめる
+        results: Dict[tuple, dict] = {}
+        for row in rows:
+            if row['id'] in stale:
+                continue
+            key = (row['kind'], row['file'], row['title'])
+            if key in results:
+                results[key]['task'] += f", {row['task']}"
+                results[key]['seen'] = max(results[key]['seen'], row['seen'])
+            else:
+                results[key] = row
+        return list(results.values())[:top_k]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, files = self._db.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT NULLIF(file, '')) FROM entries WHERE project = ?",
+                (self.project_root,)
+            ).fetchone()
+        return {'entries': entries, 'files': files, 'recorded': self.recorded,
+                'invalidated': self.invalidated, 'queries': self.queries}
+
+    def report(self) -> str:
+        s = self.stats()
+        return (
+            f"Findings memory ({self.path}): {s['entries']} entries on {s['files']} files, "
+            f"{s['recorded']} findings recorded, {s['invalidated']} invalidated, {s['queries']} queries"
+        )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_MEMORIES: Dict[tuple, FindingsMemory] = {}
+_MEMORIES_LOCK = threading.Lock()
+
+
+def open_memory(project_root: str) -> FindingsMemory:
+    """プロジェクトと保存先ごとに 1 つの FindingsMemory を共有する。"""
+    key = (state_path(DEFAULT_MEMORY_FILE), os.path.realpath(project_root))
+    with _MEMORIES_LOCK:
+        memory = _MEMORIES.get(key)
+        if memory is None:
+            memory = _MEMORIES[key] = FindingsMemory(project_root, key[0])
+        return memory
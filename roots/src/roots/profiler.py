@@ -0,0 +1,208 @@
+import os
+import re
+import sys
+import sysconfig
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from roots.state import state_path
+
+DEFAULT_INTERVAL_MS = 5.0
+DEFAULT_TOP = 25
+
+CPU = 'cpu'
+LLM = 'llm'
+WAIT = 'wait'
+
+# このフレームより内側はすべて LLM の応答待ち（HTTP クライアント・SDK・ラッパーを含む）とみなす。
+# (パスの一部, 関数名の集合。None ならそのファイルのすべての関数)
+_LLM_FRAMES = [
+    (os.sep + os.path.join('litellm', ''), None),
+    (os.path.join('crewai', 'llm.py'), {'call', 'acall'}),
+    (os.path.join('crewai', 'llms', ''), {'call', 'acall'}),
+    (os.path.join('crewai', 'utilities', 'agent_utils.py'), {'get_llm_response', 'aget_llm_response'}),
+    (os.path.join('roots', 'scheduler.py'), {'call'}),
+    (os.path.join('roots', 'llm_cache.py'), {'call'}),
+    (os.path.join('roots', 'llm_replay.py'), {'call'}),
+]
+
+# 最も内側の Python フレームがこれらなら、スレッドは CPU を使わずに待っている
+# （ロック・キュー・スレッドプール・subprocess・ソケット・time.sleep を呼ぶ関数自身ではなく、その中）
+_WAIT_MODULES = ('threading.py', 'queue.py', 'selectors.py', 'socket.py', 'ssl.py',
+                 'subprocess.py', os.path.join('concurrent', 'futures', '_base.py'),
+                 os.path.join('concurrent', 'futures', 'thread.py'))
+_WAIT_FUNCTIONS = {'wait', 'acquire', 'get', 'select', 'poll', 'join', 'result', 'recv', 'recv_into',
+                   'read', 'readinto', 'accept', '_wait_for_tstate_lock', '_communicate', '_worker',
+                   'communicate', 'as_completed', 'do_handshake'}
+
+_THREAD_SUFFIX = re.compile(r'[_-]\d+$')
+
+
+def default_profile_path() -> str:
+    """プロファイルの出力先（拡張子なし。.folded と .txt を書く）。"""
+    return state_path('profiles', f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+
+
+def _short_path(filename: str) -> str:
+    """site-packages・標準ライブラリ・roots のパスを短くする。"""
+    for prefix in sorted({sysconfig.get_paths()[k] for k in ('purelib', 'platlib', 'stdlib')}
+                         | {os.path.dirname(os.path.dirname(os.path.abspath(__file__)))},
+                         key=len, reverse=True):
+        if filename.startswith(prefix + os.sep):
+            return filename[len(prefix) + 1:]
+    return filename
+
+
+class SamplingProfiler:
+    """
+    別スレッドから interval ごとに全スレッドのスタック（sys._current_frames）を記録する
+    サンプリングプロファイラ。計測対象のコードには手を入れないので、オーバーヘッドは
+    サンプリング間隔とスタックの深さだけで決まる（既定の 5 ms 間隔で数 % 以下）。
+    GIL の取り合いでサンプルの間隔は伸びるので、各サンプルは前回からの実際の経過時間で重み付けする。
+
+    各サンプルは次の 3 つに分類する。
+    - llm: LLM 呼び出しの中（応答待ち）
+    - wait: ロック・キュー・subprocess・ソケット等で待っている（アイドルのワーカーを含む）
+    - cpu: それ以外（Python 側の処理）
+    """
+
+    def __init__(self, interval_ms: float = DEFAULT_INTERVAL_MS):
+        self.interval = interval_ms / 1000.0
+        self.samples = 0
+        # スタック -> 秒数（スレッドごと）
+        self.stacks: Dict[tuple, float] = defaultdict(float)
+        self.seconds = 0.0
+        self._labels: Dict[object, Tuple[str, bool, bool]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+
+    def start(self) -> 'SamplingProfiler':
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='roots-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.seconds = time.perf_counter() - self._started
+
+    def _label(self, code) -> Tuple[str, bool, bool]:
+        """コードオブジェクトの表示名と、LLM 呼び出し・待ちの関数かどうか（キャッシュする）。"""
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            name = getattr(code, 'co_qualname', code.co_name)
+            is_llm = any(fragment in filename and (names is None or code.co_name in names)
+                         for fragment, names in _LLM_FRAMES)
+            is_wait = code.co_name in _WAIT_FUNCTIONS and filename.endswith(_WAIT_MODULES)
+            label = (f"{name} ({_short_path(filename)}:{code.co_firstlineno})", is_llm, is_wait)
+            self._labels[code] = label
+        return label
+
+    def _run(self):
+        own = threading.get_ident()
+        next_time = last = time.perf_counter()
+        while not self._stop.is_set():
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                self._sample(names.get(ident, str(ident)), frame, elapsed)
+            self.samples += 1
+            next_time += self.interval
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                # 遅れたぶんは取り戻さない（サンプリングが処理の邪魔をしないように）
+                next_time = time.perf_counter()
+
+    def _sample(self, thread_name: str, frame, elapsed: float):
+        frames: List[str] = []
+        category = CPU
+        leaf = True
+        while frame is not None:
+            label, is_llm, is_wait = self._label(frame.f_code)
+            frames.append(label)
+            if is_llm:
+                category = LLM
+            elif leaf and is_wait and category == CPU:
+                category = WAIT
+            leaf = False
+            frame = frame.f_back
+        frames.reverse()
+        thread = _THREAD_SUFFIX.sub('', thread_name)
+        self.stacks[(category, thread) + tuple(frames)] += elapsed
+
+    # === output ===
+
+    def totals(self) -> Dict[str, float]:
+        """分類ごとの時間（スレッド秒。並列に動くスレッドはそれぞれ数える）。"""
+        totals = defaultdict(float)
+        for stack, seconds in self.stacks.items():
+            totals[stack[0]] += seconds
+        return {c: totals.get(c, 0.0) for c in (CPU, LLM, WAIT)}
+
+    def write_folded(self, path: str):
+        """
+        flamegraph.pl / speedscope / inferno で読める folded 形式。
+        先頭の 2 フレームが分類とスレッド、値はマイクロ秒。
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, seconds in sorted(self.stacks.items()):
+                frames = [f"[{stack[0]}]", stack[1]] + [s.replace(';', ':') for s in stack[2:]]
+                f.write(f"{';'.join(frames)} {max(1, round(seconds * 1e6))}\n")
+
+    def hot_spots(self, top: int = DEFAULT_TOP) -> List[Tuple[str, float, float]]:
+        """CPU のサンプルだけで数えた (関数, 自身の秒数, 呼び出し先を含む秒数) の上位。"""
+        self_time: Dict[str, float] = defaultdict(float)
+        total_time: Dict[str, float] = defaultdict(float)
+        for stack, seconds in self.stacks.items():
+            if stack[0] != CPU or len(stack) < 3:
+                continue
+            self_time[stack[-1]] += seconds
+            for label in set(stack[2:]):
+                total_time[label] += seconds
+        ranked = sorted(self_time, key=lambda l: (-self_time[l], -total_time[l]))[:top]
+        return [(l, self_time[l], total_time[l]) for l in ranked]
+
+    def report(self, top: int = DEFAULT_TOP, folded_path: Optional[str] = None) -> str:
+        totals = self.totals()
+        thread_seconds = sum(totals.values()) or 1.0
+        lines = [
+            f"Sampling profile: {self.samples} samples every {self.interval * 1000:g} ms "
+            f"over {self.seconds:.1f} s wall"
+            + (f" (folded stacks: {folded_path})" if folded_path else ""),
+            "",
+            f"  {'category':<34} {'thread s':>9} {'share':>7}",
+            f"  {'CPU (Python work)':<34} {totals[CPU]:>9.2f} {totals[CPU] / thread_seconds:>7.1%}",
+            f"  {'LLM wait (inside LLM calls)':<34} {totals[LLM]:>9.2f} {totals[LLM] / thread_seconds:>7.1%}",
+            f"  {'Other wait (locks, I/O, idle)':<34} {totals[WAIT]:>9.2f} {totals[WAIT] / thread_seconds:>7.1%}",
+            "",
+            f"Python hot spots (CPU samples only, top {top}):",
+            f"  {'self s':>8} {'total s':>8}  function",
+        ]
+        spots = self.hot_spots(top)
+        for label, self_s, total_s in spots:
+            lines.append(f"  {self_s:>8.3f} {total_s:>8.3f}  {label}")
+        if not spots:
+            lines.append("  (no CPU samples)")
+        return "\n".join(lines)
+
+    def save(self, base_path: str, top: int = DEFAULT_TOP) -> str:
+        """base_path.folded と base_path.txt（report）を書き、report を返す。"""
+        folded = f"{base_path}.folded"
+        self.write_folded(folded)
+        text = self.report(top, folded)
+        with open(f"{base_path}.txt", 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+        return text
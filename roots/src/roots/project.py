@@ -0,0 +1,26 @@
+import os
+from typing import Optional
+
+# 監査対象プロジェクトの既定値（--project-root / 環境変数 ROOTS_PROJECT_ROOT で変更可能）
+DEFAULT_PROJECT_ROOT = "/Users/inu/Desktop/kidos"
+
+_project_root: Optional[str] = None
+
+
+def get_project_root() -> str:
+    """
+    監査対象のプロジェクトのルート。
+
+    set_project_root() で設定した値、環境変数 ROOTS_PROJECT_ROOT、既定値の順に使う。
+    ツールは呼び出しのたびにこの値を参照するので、プロセスごとに別のリポジトリを監査できる。
+    """
+    return _project_root or os.environ.get('ROOTS_PROJECT_ROOT') or DEFAULT_PROJECT_ROOT
+
+
+def set_project_root(path: str) -> str:
+    """このプロセスの監査対象を切り替え、正規化したパスを返す。"""
+    global _project_root
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"プロジェクトのディレクトリが見つかりません: {path}")
+    _project_root = os.path.realpath(path)
+    return _project_root
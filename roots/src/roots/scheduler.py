@@ -0,0 +1,308 @@
+import heapq
+import itertools
+import math
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, TypeVar
+
+from crewai.llms.base_llm import BaseLLM
+
+from roots.usage import add as add_usage, measure
+
+T = TypeVar('T')
+
+# トークン数の見積もり（日本語が多いので 1 トークン ≈ 2 文字で多めに見積もる）
+CHARS_PER_TOKEN = 2
+# 応答のトークン数の見積もり（呼び出し後に実際の使用量で精算する）
+COMPLETION_ALLOWANCE = 1000
+
+# 一度に使える枠の割合（残りは一定速度で補充する）
+BURST_FRACTION = 0.1
+
+DEFAULT_MAX_RETRIES = 6
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 60.0
+
+_RATE_LIMIT_MESSAGE = re.compile(r'\b429\b|RESOURCE_EXHAUSTED|rate.?limit', re.IGNORECASE)
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """429 / RESOURCE_EXHAUSTED（プロバイダの SDK ごとに例外の形が違うので緩く判定する）。"""
+    for attr in ('status_code', 'code', 'status'):
+        if getattr(error, attr, None) in (429, '429', 'RESOURCE_EXHAUSTED'):
+            return True
+    if 'ratelimit' in type(error).__name__.lower():
+        return True
+    message = str(error)
+    return bool(_RATE_LIMIT_MESSAGE.search(message))
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """応答の Retry-After ヘッダ（秒）。なければ None。"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or getattr(error, 'headers', None)
+    if not headers:
+        return None
+    try:
+        value = headers.get('retry-after') or headers.get('Retry-After')
+        return float(value) if value is not None else None
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+class TokenBucket:
+    """
+    1 分あたり per_minute 単位までに抑えるトークンバケット。
+
+    プロバイダは window 秒の移動窓で数えるので、容量（バースト）を枠の BURST_FRACTION、
+    補充速度を残りにして、どの窓でも取り出せる量を上限以下に抑える。
+    容量は少なくとも 1 回分（リクエスト 1 件）にする。n 回目を取り出すには、容量と
+    1 回目からの補充量の合計が n 以上必要で、窓は半開区間なので 1 回目からの経過は window 秒未満。
+    よって「容量 + window 秒の補充量」を floor(上限) + 1 にすれば、どの窓でも floor(上限) 回を
+    超えない（batch や test --workers で枠を分けて上限が 1〜数回/分になっても成り立つ）。
+    """
+
+    def __init__(self, per_minute: float, window: float = 60.0):
+        self.per_minute = per_minute
+        quota = per_minute * window / 60.0
+        self.capacity = max(1.0, quota * BURST_FRACTION)
+        if quota >= 1:
+            self.rate = (math.floor(quota) + 1 - self.capacity) / window
+        else:
+            # 1 回分に満たない上限は、window / quota 秒に 1 回
+            self.rate = quota / window
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """amount を取り出せるまでの秒数（容量を超える要求は満杯になるまで待つ）。"""
+        self._refill(now)
+        needed = min(amount, self.capacity)
+        if self.level >= needed:
+            return 0.0
+        return (needed - self.level) / self.rate
+
+    def take(self, amount: float, now: float):
+        self._refill(now)
+        self.level -= amount
+
+    def adjust(self, amount: float):
+        """見積もりと実際の差を精算する（正なら追加で消費、負なら返却）。"""
+        self.level = min(self.capacity, self.level - amount)
+
+
+class LLMScheduler:
+    """
+    すべての LLM 呼び出しが通る共有スケジューラ。
+
+    - リクエスト数（RPM）とトークン数（TPM）をトークンバケットで制限する
+    - 待っている呼び出しは優先度（クリティカルパス上の残りタスク数）の高い順に通す
+    - 429 を受けたら全体を一時停止し（ジッタ付き指数バックオフ）、同じ呼び出しを再試行する
+    - 待ち時間・429・再試行の回数をタスクごとに集計する
+    """
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES, base_delay: float = DEFAULT_BASE_DELAY,
+                 max_delay: float = DEFAULT_MAX_DELAY, window: float = 60.0,
+                 seed: Optional[int] = None):
+        self.requests = TokenBucket(rpm, window) if rpm else None
+        self.tokens = TokenBucket(tpm, window) if tpm else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.priorities: Dict[str, int] = {}
+        self._random = random.Random(seed)
+        self._cond = threading.Condition()
+        self._waiting: List[tuple] = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._waits: List[float] = []
+        self._task_stats = defaultdict(lambda: {'calls': 0, 'wait': 0.0, 'max_wait': 0.0,
+                                                'rate_limited': 0, 'retries': 0})
+
+    @classmethod
+    def from_env(cls, rpm: Optional[float] = None, tpm: Optional[float] = None) -> 'LLMScheduler':
+        """引数で指定がなければ環境変数 ROOTS_LLM_RPM / ROOTS_LLM_TPM を使う（未設定なら無制限）。"""
+        rpm = rpm or float(os.environ.get('ROOTS_LLM_RPM') or 0) or None
+        tpm = tpm or float(os.environ.get('ROOTS_LLM_TPM') or 0) or None
+        return cls(rpm=rpm, tpm=tpm)
+
+    def _delay(self, tokens: float, now: float) -> float:
+        delay = self._paused_until - now
+        if self.requests is not None:
+            delay = max(delay, self.requests.wait_time(1, now))
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.wait_time(tokens, now))
+        return delay
+
+    def acquire(self, priority: int = 0, tokens: float = 0) -> float:
+        """順番と枠が空くまで待ち、待った秒数を返す。"""
+        start = time.monotonic()
+        ticket = (-priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    timeout = None
+                    if self._waiting[0] == ticket:
+                        now = time.monotonic()
+                        timeout = self._delay(tokens, now)
+                        if timeout <= 0:
+                            heapq.heappop(self._waiting)
+                            if self.requests is not None:
+                                self.requests.take(1, now)
+                            if self.tokens is not None:
+                                self.tokens.take(tokens, now)
+                            self._cond.notify_all()
+                            break
+                    self._cond.wait(timeout)
+            except BaseException:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+                raise
+        return time.monotonic() - start
+
+    def settle(self, estimated: float, actual: float):
+        """呼び出し後、見積もったトークン数を実際の使用量で精算する。"""
+        if self.tokens is None or not actual:
+            return
+        with self._cond:
+            self.tokens.adjust(actual - estimated)
+            self._cond.notify_all()
+
+    def _backoff(self, error: BaseException, attempt: int) -> float:
+        delay = retry_after(error)
+        if delay is None:
+            # full jitter: 同時に 429 を受けた呼び出しが同じ時刻に再試行しないようにする
+            delay = self._random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            self._cond.notify_all()
+        return delay
+
+    def call(self, fn: Callable[[], T], priority: int = 0, tokens: float = 0, task: str = '') -> T:
+        """fn を枠内で実行する。429 なら全体を一時停止してから再試行する。"""
+        attempt = 0
+        while True:
+            waited = self.acquire(priority, tokens)
+            with self._cond:
+                stats = self._task_stats[task]
+                stats['calls'] += 1
+                stats['wait'] += waited
+                stats['max_wait'] = max(stats['max_wait'], waited)
+                self._waits.append(waited)
+            try:
+                return fn()
+            except Exception as e:
+                if not is_rate_limited(e) or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self._backoff(e, attempt)
+                with self._cond:
+                    self._task_stats[task]['rate_limited'] += 1
+                    self._task_stats[task]['retries'] += 1
+
+    def stats(self) -> Dict[str, object]:
+        with self._cond:
+            waits = sorted(self._waits)
+            tasks = {name: dict(s) for name, s in self._task_stats.items()}
+
+        def percentile(p: float) -> float:
+            return waits[min(len(waits) - 1, int(p * len(waits)))] if waits else 0.0
+
+        return {
+            'calls': len(waits),
+            'wait_total': sum(waits),
+            'wait_p50': percentile(0.5),
+            'wait_p95': percentile(0.95),
+            'wait_max': waits[-1] if waits else 0.0,
+            'rate_limited': sum(s['rate_limited'] for s in tasks.values()),
+            'tasks': tasks,
+        }
+
+    def report(self) -> str:
+        stats = self.stats()
+        if not stats['calls']:
+            return "LLM scheduler: no LLM calls."
+        limits = ", ".join(
+            f"{name} {bucket.per_minute:g}/min"
+            for name, bucket in (('RPM', self.requests), ('TPM', self.tokens)) if bucket is not None
+        ) or "no limits"
+        lines = [
+            f"LLM scheduler ({limits}): {stats['calls']} calls, {stats['rate_limited']} rate limited, "
+            f"queue wait total {stats['wait_total']:.1f}s, p50 {stats['wait_p50']:.2f}s, "
+            f"p95 {stats['wait_p95']:.2f}s, max {stats['wait_max']:.2f}s",
+            f"  {'task':<28} {'priority':>8} {'calls':>6} {'wait s':>8} {'max s':>7} {'429s':>5}",
+        ]
+        for name, s in sorted(stats['tasks'].items(), key=lambda kv: -kv[1]['wait']):
+            lines.append(
+                f"  {name or '(none)':<28} {self.priorities.get(name, 0):>8} {s['calls']:>6} "
+                f"{s['wait']:>8.2f} {s['max_wait']:>7.2f} {s['rate_limited']:>5}"
+            )
+        return "\n".join(lines)
+
+
+def estimate_tokens(messages, tools=None) -> int:
+    """プロンプトのトークン数を文字数から見積もり、応答のぶんを足す。"""
+    if isinstance(messages, str):
+        chars = len(messages)
+    else:
+        chars = sum(len(str(m.get('content') or '')) for m in messages)
+    chars += sum(len(str(tool)) for tool in tools or [])
+    return chars // CHARS_PER_TOKEN + COMPLETION_ALLOWANCE
+
+
+class ScheduledLLM(BaseLLM):
+    """LLM をラップし、すべての呼び出しを LLMScheduler 経由で行う。"""
+
+    def __init__(self, inner: BaseLLM, scheduler: LLMScheduler):
+        self.inner = inner
+        stop = list(inner.stop)
+        super().__init__(model=inner.model, temperature=getattr(inner, 'temperature', None))
+        self.stop = stop
+        self.scheduler = scheduler
+
+    # crewAI のエグゼキュータは llm.stop に停止語を追加するので、ラップ先に転送する
+    @property
+    def stop(self) -> List[str]:
+        return self.inner.stop
+
+    @stop.setter
+    def stop(self, value: List[str]):
+        self.inner.stop = value
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None):
+        task_name = getattr(from_task, 'name', None) or ''
+        estimated = estimate_tokens(messages, tools)
+        # ラップ先は並列タスクで共有されるので、この呼び出しの使用量だけを数える
+        with measure(self.inner) as usage:
+            response = self.scheduler.call(
+                lambda: self.inner.call(
+                    messages, tools=tools, callbacks=callbacks, available_functions=available_functions,
+                    from_task=from_task, from_agent=from_agent, response_model=response_model
+                ),
+                priority=self.scheduler.priorities.get(task_name, 0),
+                tokens=estimated,
+                task=task_name,
+            )
+        self.scheduler.settle(estimated, usage['total_tokens'])
+        add_usage(self, usage)
+        return response
+
+    def supports_function_calling(self) -> bool:
+        return self.inner.supports_function_calling()
+
+    def supports_stop_words(self) -> bool:
+        return self.inner.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self.inner.get_context_window_size()
@@ -0,0 +1,71 @@
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+# python -X importtime の出力行: "import time: self [us] | cumulative | imported package"
+_IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def _import_times(module: str) -> List[Tuple[str, int, int, int]]:
+    """別プロセスで module を import し、(モジュール名, 自身の時間, 累積時間, 深さ) を返す（単位は μs）。"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, env=os.environ.copy(), timeout=120
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def _by_package(rows) -> Dict[str, int]:
+    totals: Dict[str, int] = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        totals[name.split('.')[0]] += self_us
+    return totals
+
+
+def profile_startup(top: int = 15) -> str:
+    """
+    CLI の起動時間の内訳を返す。
+
+    - roots.crew（crewAI を含む）の import（新しいプロセスで計測、パッケージ別・モジュール別の上位）
+    - Roots() の初期化と crew() の構築（このプロセスで計測）
+    """
+    rows = _import_times('roots.crew')
+    total_us = max((c for _, _, c, depth in rows if depth == 0), default=0)
+    lines = [f"Startup profile (python {sys.version.split()[0]})", "",
+             f"import roots.crew: {total_us / 1e6:.3f} s (fresh interpreter)", "",
+             "Import time by top-level package (self time):"]
+    packages = sorted(_by_package(rows).items(), key=lambda kv: -kv[1])
+    for package, us in packages[:top]:
+        lines.append(f"  {package:<32} {us / 1e3:>9.1f} ms")
+
+    lines += ["", "Slowest modules (cumulative):"]
+    ranked = sorted(rows, key=lambda r: -r[2])
+    for name, _, cumulative_us, _ in ranked[:top]:
+        lines.append(f"  {name:<48} {cumulative_us / 1e3:>9.1f} ms")
+
+    start = time.perf_counter()
+    from roots.crew import Roots
+    imported = time.perf_counter()
+    instance = Roots()
+    initialized = time.perf_counter()
+    crew = instance.crew()
+    built = time.perf_counter()
+    lines += [
+        "",
+        "Crew construction (this process):",
+        f"  {'import roots.crew':<32} {(imported - start) * 1e3:>9.1f} ms",
+        f"  {'Roots()':<32} {(initialized - imported) * 1e3:>9.1f} ms",
+        f"  {'Roots().crew()':<32} {(built - initialized) * 1e3:>9.1f} ms"
+        f"  ({len(crew.agents)} agents, {len(crew.tasks)} tasks)",
+    ]
+    return "\n".join(lines)
@@ -0,0 +1,68 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any
+
+
+def state_dir() -> str:
+    """
+    Roots の実行状態（前回のタスク結果、インデックス等）を保存するディレクトリ。
+    環境変数 ROOTS_STATE_DIR で変更可能。既定はカレントディレクトリの .roots/
+    """
+    path = os.environ.get('ROOTS_STATE_DIR') or os.path.join(os.getcwd(), '.roots')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def state_path(*parts: str) -> str:
+    """state_dir() 配下のパスを返す（親ディレクトリは作成済み）。"""
+    path = os.path.join(state_dir(), *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def project_key(project_root: str) -> str:
+    """プロジェクトごとに分けて保存するファイルの名前に使う、プロジェクトのパスのハッシュ。"""
+    return hashlib.sha1(os.path.realpath(project_root).encode()).hexdigest()[:12]
+
+
+def cache_dir() -> str:
+    """
+    ファイル内容のハッシュで引くキャッシュ（インデックス等）を保存するディレクトリ。
+    内容が同じなら結果も同じなので、複数のリポジトリ・ブランチの監査で共有できる。
+    環境変数 ROOTS_CACHE_DIR で変更可能。既定は state_dir() と同じ。
+    """
+    path = os.environ.get('ROOTS_CACHE_DIR') or state_dir()
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def cache_path(*parts: str) -> str:
+    """cache_dir() 配下のパスを返す（親ディレクトリは作成済み）。"""
+    path = os.path.join(cache_dir(), *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def load_json(path: str, default: Any = None) -> Any:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def save_json(path: str, data: Any):
+    """途中でプロセスが落ちても壊れたファイルが残らないよう、一時ファイル経由で書き込む。"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -4,6 +4,15 @@ from roots.tools.directory_explorer import DirectoryExplorerTool
 from roots.tools.shell_runner import ShellRunnerTool
 from roots.tools.grep_search import GrepSearchTool
 from roots.tools.supabase_query import SupabaseSchemaExplorerTool
+from roots.tools.knowledge_search import KnowledgeSearchTool
+from roots.tools.code_search import CodeChunkSearchTool
+from roots.tools.spreadsheet_reader import SpreadsheetReaderTool
+from roots.tools.pdf_reader import PdfReaderTool
+from roots.tools.duplicate_code import DuplicateCodeTool
+from roots.tools.import_graph import ImportGraphTool
+from roots.tools.complexity_report import ComplexityReportTool
+from roots.tools.git_history import GitHistoryTool
+from roots.tools.past_findings import PastFindingsTool
 
 __all__ = [
     'FileReaderTool',
@@ -12,4 +21,13 @@ __all__ = [
     'ShellRunnerTool',
     'GrepSearchTool',
     'SupabaseSchemaExplorerTool',
+    'KnowledgeSearchTool',
+    'CodeChunkSearchTool',
+    'SpreadsheetReaderTool',
+    'PdfReaderTool',
+    'DuplicateCodeTool',
+    'ImportGraphTool',
+    'ComplexityReportTool',
+    'GitHistoryTool',
+    'PastFindingsTool',
 ]
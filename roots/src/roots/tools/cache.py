@@ -0,0 +1,246 @@
+import functools
+import hashlib
+import inspect
+import os
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Optional
+
+from roots.project import get_project_root
+
+_local = threading.local()
+
+
+def resolve_path(path: str) -> str:
+    """Resolve a tool path argument the same way the tools do."""
+    if not os.path.isabs(path):
+        path = os.path.join(get_project_root(), path)
+    return os.path.realpath(path)
+
+
+def track(path: str):
+    """Record a file or directory the current cached tool call depends on."""
+    deps = getattr(_local, 'deps', None)
+    if deps is None:
+        return
+    try:
+        deps[path] = os.stat(path).st_mtime_ns
+    except OSError:
+        deps[path] = None
+
+
+_digests: Dict[str, tuple] = {}
+_digests_lock = threading.Lock()
+
+
+def file_digest(path: str) -> str:
+    """SHA-1 of a file's content, read in blocks; unchanged files (same mtime and size) are not re-read."""
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _digests_lock:
+        cached = _digests.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    with _digests_lock:
+        _digests[path] = (signature, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def consume_last_hit() -> Optional[bool]:
+    """Whether the last cached tool call on this thread was a hit (None if none since)."""
+    hit = getattr(_local, 'last_hit', None)
+    _local.last_hit = None
+    return hit
+
+
+def tracked_walk(top: str):
+    """os.walk that records every visited directory as a dependency.
+
+    Callers may still prune `dirs` in place, exactly as with os.walk.
+    """
+    for root, dirs, files in os.walk(top):
+        track(root)
+        yield root, dirs, files
+
+
+class _Entry:
+    __slots__ = ('result', 'scope', 'deps')
+
+    def __init__(self, result: str, scope: str, deps: Dict[str, Optional[int]]):
+        self.result = result
+        self.scope = scope
+        self.deps = deps
+
+    def is_fresh(self) -> bool:
+        for path, mtime in self.deps.items():
+            try:
+                if os.stat(path).st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                if mtime is not None:
+                    return False
+        return True
+
+    def covers(self, path: str) -> bool:
+        return (
+            path in self.deps
+            or path == self.scope
+            or path.startswith(self.scope.rstrip(os.sep) + os.sep)
+        )
+
+
+class ToolCache:
+    """
+    In-memory memoization for read-only tools.
+
+    Entries are keyed on (tool name, normalized arguments) and remember the
+    mtime of every file and directory the call looked at. An entry is dropped
+    when one of those mtimes changes, or when FileWriterTool writes a path
+    inside the entry's scope.
+    """
+
+    def __init__(self):
+        self._entries: Dict[tuple, _Entry] = {}
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {'hits': 0, 'misses': 0, 'invalidations': 0})
+        self.enabled = True
+
+    def get_or_compute(self, tool_name: str, key: tuple, scope: str,
+                       compute: Callable[[], str]) -> str:
+        if not self.enabled:
+            _local.last_hit = False
+            return compute()
+
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            if entry.is_fresh():
+                with self._lock:
+                    self._stats[tool_name]['hits'] += 1
+                _local.last_hit = True
+                return entry.result
+            with self._lock:
+                self._entries.pop(key, None)
+                self._stats[tool_name]['invalidations'] += 1
+
+        previous = getattr(_local, 'deps', None)
+        _local.deps = {}
+        try:
+            result = compute()
+            deps = _local.deps
+        finally:
+            _local.deps = previous
+
+        _local.last_hit = False
+        with self._lock:
+            self._stats[tool_name]['misses'] += 1
+            # Errors (missing files, bad regex...) are cheap and may be fixed
+            # by the agent right away, so they are never cached.
+            if not (isinstance(result, str) and result.startswith('Error')):
+                self._entries[key] = _Entry(result, scope, deps)
+        return result
+
+    def invalidate(self, path: str):
+        """Drop every entry that covers `path` (called after a file write)."""
+        real_path = os.path.realpath(path)
+        with self._lock:
+            stale = [k for k, e in self._entries.items() if e.covers(real_path)]
+            for key in stale:
+                del self._entries[key]
+                self._stats[key[0]]['invalidations'] += 1
+
+    def export_entries(self) -> list:
+        """JSON-serializable snapshot of the entries (for checkpoints)."""
+        with self._lock:
+            return [
+                {'key': [key[0], key[1], [list(item) for item in key[2]]],
+                 'result': entry.result, 'scope': entry.scope, 'deps': entry.deps}
+                for key, entry in self._entries.items()
+            ]
+
+    def import_entries(self, entries: list) -> int:
+        """Load entries saved by export_entries. Stale ones are dropped on first use as usual."""
+        loaded = 0
+        with self._lock:
+            for item in entries:
+                try:
+                    name, project, params = item['key']
+                    key = (name, project, tuple(tuple(p) for p in params))
+                    self._entries.setdefault(key, _Entry(item['result'], item['scope'], item['deps']))
+                    loaded += 1
+                except (KeyError, TypeError, ValueError):
+                    continue
+        return loaded
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {name: dict(s) for name, s in self._stats.items()}
+
+    def report(self) -> str:
+        stats = self.stats()
+        if not stats:
+            return "Tool cache: no cached tool calls."
+        lines = [
+            "Tool cache hit rates:",
+            f"  {'tool':<28} {'hits':>6} {'misses':>7} {'invalidated':>12} {'hit rate':>9}",
+        ]
+        total_hits = total_calls = 0
+        for name in sorted(stats):
+            s = stats[name]
+            calls = s['hits'] + s['misses']
+            total_hits += s['hits']
+            total_calls += calls
+            rate = s['hits'] / calls if calls else 0.0
+            lines.append(
+                f"  {name:<28} {s['hits']:>6} {s['misses']:>7} {s['invalidations']:>12} {rate:>9.1%}"
+            )
+        overall = total_hits / total_calls if total_calls else 0.0
+        lines.append(f"  {'total':<28} {total_hits:>6} {total_calls - total_hits:>7} {'':>12} {overall:>9.1%}")
+        return "\n".join(lines)
+
+
+TOOL_CACHE = ToolCache()
+
+
+def cached(path_arg: Optional[str] = None):
+    """
+    Memoize a read-only tool's `_run` in TOOL_CACHE.
+
+    `path_arg` names the argument holding the path the call covers; it is
+    normalized to a real path for the cache key. Without it the call covers
+    the whole project.
+    """
+    def decorator(run):
+        signature = inspect.signature(run)
+
+        @functools.wraps(run)
+        def wrapper(self, *args, **kwargs):
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            params = dict(bound.arguments)
+            params.pop('self')
+
+            project = os.path.realpath(get_project_root())
+            scope = project
+            if path_arg is not None:
+                scope = resolve_path(params[path_arg])
+                params[path_arg] = scope
+
+            # Relative results (grep, schema lookups) differ per project even for equal arguments
+            key = (self.name, project, tuple(sorted(params.items())))
+            return TOOL_CACHE.get_or_compute(
+                self.name, key, scope, lambda: run(self, *args, **kwargs)
+            )
+
+        return wrapper
+
+    return decorator
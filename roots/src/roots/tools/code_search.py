@@ -0,0 +1,323 @@
+from crewai.tools import BaseTool
+from typing import List, Optional, Set, Tuple, Type
+from pydantic import BaseModel, Field
+from collections import Counter
+import os
+import re
+import unicodedata
+
+from roots.digest import SKIP_DIRS, SKIP_TOP_LEVEL
+from roots.project import get_project_root
+from roots.state import cache_path, load_json, save_json
+from roots.tools.cache import resolve_path
+from roots.tools.knowledge_search import KnowledgeIndex, tokenize
+
+CODE_INDEX_VERSION = 1
+CODE_EXTENSIONS = {'.ts', '.tsx', '.js', '.jsx', '.mjs', '.sql'}
+# Generated bundles and dumps are not worth indexing
+MAX_FILE_BYTES = 1_000_000
+# Longer functions are split at their nested declarations, then into windows of this size
+MAX_CHUNK_LINES = 80
+HEAD_LINES = 6
+MAX_SNIPPET_LINES = 18
+MAX_LINE_CHARS = 160
+
+# Top-level declarations (column 0, as formatted by Prettier)
+_TS_DECLARATION = re.compile(
+    r'^(?:export\s+)?(?:default\s+)?(?:declare\s+)?(?:async\s+)?'
+    r'(?:function\s*\*?\s*(?P<function>[A-Za-z_$][\w$]*)'
+    r'|(?:abstract\s+)?class\s+(?P<class>[A-Za-z_$][\w$]*)'
+    r'|(?:interface|type|enum)\s+(?P<type>[A-Za-z_$][\w$]*)'
+    r'|(?:const|let|var)\s+(?P<const>[A-Za-z_$][\w$]*))'
+)
+_FUNCTION_VALUE = re.compile(
+    r'=\s*(?:async\s+)?(?:function\b|\(|[A-Za-z_$][\w$]*\s*=>|(?:React\.)?(?:memo|forwardRef)\b)'
+)
+# Declarations inside a long function body: callbacks, inner functions, effects
+_TS_NESTED = re.compile(
+    r'^(\s+)(?:(?:const|let)\s+(?P<const>[A-Za-z_$][\w$]*)\s*(?::[^=]+)?=\s*'
+    r'(?:use(?:Callback|Memo)\s*\(|async\b|\(|function\b|[A-Za-z_$][\w$]*\s*=>)'
+    r'|(?:async\s+)?function\s+(?P<function>[A-Za-z_$][\w$]*)'
+    r'|(?P<effect>use(?:Layout)?Effect)\s*\()'
+)
+_SQL_STATEMENT = re.compile(r'^(?:create|alter|comment\s+on|do\b)', re.IGNORECASE)
+_COMMENT_LINE = re.compile(r'^\s*(?://|/\*|\*|--|@)')
+# Import lines would make every importer of a module match its name
+_IMPORT_LINE = re.compile(r'^\s*(?:import\b|export\s+(?:\*|\{[^}]*\})\s+from\b|\}\s*from\s)')
+
+_IDENTIFIER = re.compile(r'[A-Za-z_$][A-Za-z0-9_$]*')
+_CAMEL_PART = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+')
+STOP_WORDS = {
+    'a', 'an', 'and', 'any', 'are', 'as', 'async', 'await', 'boolean', 'break', 'case', 'catch',
+    'class', 'classname', 'const', 'continue', 'default', 'div', 'does', 'else', 'export',
+    'extends', 'for', 'from', 'function', 'how', 'if', 'import', 'in', 'is', 'it', 'let', 'new',
+    'null', 'number', 'of', 'or', 'props', 'react', 'return', 'span', 'string', 'the', 'this',
+    'to', 'true', 'false', 'try', 'type', 'typeof', 'undefined', 'var', 'void', 'what', 'where',
+    'which', 'with',
+}
+
+
+def _stem(word: str) -> str:
+    """Crude English suffix stripping so that 'calculated', 'calculate' and 'calculating' meet."""
+    if len(word) > 5 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    for suffix in ('ing', 'ed', 'es', 's'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3 and not word.endswith('ss'):
+            word = word[:-len(suffix)]
+            break
+    if len(word) > 3 and word.endswith('e'):
+        word = word[:-1]
+    return word
+
+
+def code_terms(text: str) -> List[str]:
+    """
+    Identifiers split on camelCase / snake_case (plus the whole identifier),
+    and Japanese comments and strings as character bigrams.
+    """
+    text = unicodedata.normalize('NFKC', text)
+    terms = []
+    for identifier in _IDENTIFIER.findall(text):
+        parts = [p.lower() for p in _CAMEL_PART.findall(identifier)]
+        if len(parts) > 1:
+            terms.append(identifier.lower().strip('_$'))
+        for part in parts:
+            if len(part) > 1 and not part.isdigit() and part not in STOP_WORDS:
+                terms.append(_stem(part))
+    # What is left after removing identifiers: Japanese text, numbers and punctuation
+    terms.extend(t for t in tokenize(_IDENTIFIER.sub(' ', text)) if not t.isascii())
+    return terms
+
+
+def _kind(name: str, group: str, line: str, ext: str) -> str:
+    if group == 'class':
+        return 'class'
+    if group == 'type':
+        return 'type'
+    if group == 'const' and not _FUNCTION_VALUE.search(line):
+        return 'const'
+    if name.startswith('use') and name[3:4].isupper():
+        return 'hook'
+    if name[:1].isupper() and ext in ('.tsx', '.jsx'):
+        return 'component'
+    return 'function'
+
+
+def _with_comments(lines: List[str], index: int, floor: int) -> int:
+    """Move a chunk boundary up over the comment block (JSDoc, decorators) right above it."""
+    while index > floor and _COMMENT_LINE.match(lines[index - 1]):
+        index -= 1
+    return index
+
+
+def _windows(title: str, kind: str, start: int, lines: List[str]) -> List[dict]:
+    chunks = []
+    for offset in range(0, len(lines), MAX_CHUNK_LINES):
+        piece = lines[offset:offset + MAX_CHUNK_LINES]
+        if "\n".join(piece).strip():
+            chunks.append({'title': title, 'kind': kind, 'line': start + offset,
+                           'end': start + offset + len(piece) - 1, 'text': "\n".join(piece)})
+    return chunks
+
+
+def _split_long(title: str, kind: str, start: int, lines: List[str]) -> List[dict]:
+    """Split a long function at its shallowest nested declarations (a hook's callbacks, ...)."""
+    if len(lines) <= MAX_CHUNK_LINES:
+        return _windows(title, kind, start, lines)
+    nested = [(i, m) for i, line in enumerate(lines) if i > 0 for m in [_TS_NESTED.match(line)] if m]
+    if not nested:
+        return _windows(title, kind, start, lines)
+    indent = min(len(m.group(1)) for _, m in nested)
+    cuts = [(0, title)]
+    for i, m in nested:
+        if len(m.group(1)) == indent:
+            name = m.group('const') or m.group('function') or m.group('effect')
+            cuts.append((_with_comments(lines, i, cuts[-1][0] + 1), f"{title} > {name}"))
+    chunks = []
+    for (begin, piece_title), (end, _) in zip(cuts, cuts[1:] + [(len(lines), None)]):
+        chunks += _windows(piece_title, kind, start + begin, lines[begin:end])
+    return chunks
+
+
+def chunk_source(content: str, ext: str) -> List[dict]:
+    """
+    Split a TS/TSX/JS file into one chunk per top-level function, component, hook,
+    class or type (SQL: one per CREATE/ALTER statement).
+
+    Each chunk has 'title', 'kind', 'line' and 'end' (1-based, inclusive) and 'text'.
+    Code before the first declaration (imports, file header) is a '(module)' chunk.
+    """
+    lines = content.splitlines()
+    starts: List[Tuple[int, str, str]] = [(0, '(module)', 'module')]
+    for i, line in enumerate(lines):
+        if ext == '.sql':
+            if _SQL_STATEMENT.match(line):
+                title = re.sub(r'\s+', ' ', line.split('(')[0]).strip()[:80]
+                starts.append((_with_comments(lines, i, starts[-1][0] + 1), title, 'sql'))
+            continue
+        match = _TS_DECLARATION.match(line)
+        if match is None:
+            continue
+        group = next(g for g in ('function', 'class', 'type', 'const') if match.group(g))
+        name = match.group(group)
+        starts.append((_with_comments(lines, i, starts[-1][0] + 1), name, _kind(name, group, line, ext)))
+
+    chunks = []
+    for (begin, title, kind), (end, _, _) in zip(starts, starts[1:] + [(len(lines), None, None)]):
+        if begin < end:
+            chunks += _split_long(title, kind, begin + 1, lines[begin:end])
+    return chunks
+
+
+def _code_chunks(path: str, digest: str, content: str) -> List[dict]:
+    """Chunks with term frequencies, cached on disk by content hash (shared across checkouts)."""
+    ext = os.path.splitext(path)[1].lower()
+    index_file = cache_path('index', 'code', f"{digest}{ext}.json")
+    cached = load_json(index_file, default=None)
+    if isinstance(cached, dict) and cached.get('version') == CODE_INDEX_VERSION:
+        return cached['chunks']
+
+    chunks = chunk_source(content, ext)
+    for chunk in chunks:
+        code = "\n".join(line for line in chunk['text'].splitlines() if not _IMPORT_LINE.match(line))
+        terms = Counter(code_terms(code))
+        # The declared name counts again, so a query naming the function ranks it first
+        if chunk['kind'] != 'module':
+            terms.update(code_terms(chunk['title']))
+        chunk['tf'] = dict(terms)
+        chunk['length'] = sum(terms.values())
+    # A header with nothing but imports has nothing to find
+    chunks = [chunk for chunk in chunks if chunk['length']]
+    save_json(index_file, {'version': CODE_INDEX_VERSION, 'chunks': chunks})
+    return chunks
+
+
+def code_files(project_root: str) -> List[str]:
+    """TS/TSX/JS/SQL files of the project, skipping dependencies, build output and roots itself."""
+    project_root = os.path.realpath(project_root)
+    files = []
+    for root, dirs, names in os.walk(project_root):
+        top = root == project_root
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not (top and d in SKIP_TOP_LEVEL)]
+        for name in names:
+            if os.path.splitext(name)[1].lower() not in CODE_EXTENSIONS or name.endswith('.min.js'):
+                continue
+            path = os.path.join(root, name)
+            try:
+                if os.path.getsize(path) > MAX_FILE_BYTES:
+                    continue
+            except OSError:
+                continue
+            files.append(path)
+    return sorted(files)
+
+
+class CodeIndex(KnowledgeIndex):
+    """
+    BM25 index over function/component-sized chunks of the project's source files.
+
+    Same incremental scheme as the knowledge index: every search re-stats the files
+    and re-chunks only those whose mtime or size changed; chunks are cached on disk
+    by content hash. The directory of each file is indexed with its chunks, so
+    'billing hooks' also finds src/hooks/billing/*.
+    """
+
+    def _chunk_file(self, path: str, digest: str, content: str) -> List[dict]:
+        chunks = _code_chunks(path, digest, content)
+        directory = Counter(code_terms(" ".join(path.split(os.sep)[-3:])))
+        for chunk in chunks:
+            tf = Counter(chunk['tf'])
+            tf.update(directory)
+            chunk['tf'] = dict(tf)
+            chunk['length'] += sum(directory.values())
+        return chunks
+
+    def _query_terms(self, query: str) -> List[str]:
+        return code_terms(query)
+
+    def _matches_source(self, path: str, source: str) -> bool:
+        return path == source or path.startswith(source.rstrip(os.sep) + os.sep)
+
+
+CODE_INDEX = CodeIndex()
+
+
+def _snippet(chunk: dict, terms: Set[str]) -> List[str]:
+    """The chunk's first lines plus the lines that contain query terms, with line numbers."""
+    lines = chunk['text'].splitlines()
+    shown = set(range(min(HEAD_LINES, len(lines))))
+    for i, line in enumerate(lines):
+        if len(shown) >= MAX_SNIPPET_LINES:
+            break
+        if i not in shown and terms.intersection(code_terms(line)):
+            shown.add(i)
+    output = []
+    previous: Optional[int] = None
+    for i in sorted(shown):
+        if previous is not None and i != previous + 1:
+            output.append("     …")
+        text = lines[i] if len(lines[i]) <= MAX_LINE_CHARS else lines[i][:MAX_LINE_CHARS] + " …"
+        output.append(f"{chunk['line'] + i:>6}| {text}")
+        previous = i
+    if previous is not None and previous < len(lines) - 1:
+        output.append(f"     … ({len(lines) - 1 - previous} more lines)")
+    return output
+
+
+class CodeChunkSearchInput(BaseModel):
+    """Input schema for CodeChunkSearchTool."""
+    query: str = Field(
+        ...,
+        description="What the code does, in English or Japanese, or identifiers "
+                    "(e.g., 'where is attendance billing calculated', '利用者負担 上限', 'fetchStaff')"
+    )
+    path: str = Field(
+        default="",
+        description="Only search under this directory, relative to project root (e.g., 'src/hooks', 'supabase'). Empty = whole project."
+    )
+    top_k: int = Field(
+        default=8,
+        description="Number of chunks to return"
+    )
+
+
+class CodeChunkSearchTool(BaseTool):
+    name: str = "Search Code Chunks"
+    description: str = (
+        "Ranked search (BM25) over the project's TS/TSX/JS/SQL code, split into one chunk per "
+        "function, component, hook, type or SQL statement. Identifiers are split on camelCase "
+        "and snake_case and comments are indexed (Japanese included), so natural-language "
+        "questions like 'where is attendance billing calculated' work. Returns file, line range, "
+        "declaration and the matching lines of each chunk. Use it to locate code in one call "
+        "instead of guessing regexes for Search Code."
+    )
+    args_schema: Type[BaseModel] = CodeChunkSearchInput
+
+    def _run(self, query: str, path: str = "", top_k: int = 8) -> str:
+        if not query.strip():
+            return "Error: Empty query."
+        top_k = max(1, min(top_k, 20))
+
+        project_root = os.path.realpath(get_project_root())
+        scope = resolve_path(path) if path.strip() else ""
+        if scope and not (scope == project_root or scope.startswith(project_root + os.sep)):
+            return f"Error: Access denied. Path must be within {project_root}"
+        if scope and not os.path.exists(scope):
+            return f"Error: Path not found: {path}"
+
+        results = CODE_INDEX.search(code_files(project_root), query, top_k, scope)
+        where = f" in {path}/" if scope else ""
+        if not results:
+            return f"Code search: '{query}'{where}\nNo matching code found."
+
+        terms = set(code_terms(query))
+        lines = [f"Code search: '{query}'{where} (top {len(results)})", "-" * 60]
+        for rank, (score, file_path, chunk) in enumerate(results, 1):
+            display = os.path.relpath(file_path, project_root)
+            lines.append(
+                f"[{rank}] {display}:{chunk['line']}-{chunk['end']}  {chunk['title']} "
+                f"({chunk['kind']}, score {score:.2f})"
+            )
+            lines.extend(_snippet(chunk, terms))
+            lines.append("")
+        return "\n".join(lines).rstrip()
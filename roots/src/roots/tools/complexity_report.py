@@ -0,0 +1,134 @@
+from crewai.tools import BaseTool
+from typing import List, Type
+from pydantic import BaseModel, Field
+import os
+
+from roots.project import get_project_root
+from roots.tools.cache import resolve_path
+
+MAX_TOP_K = 100
+# ESLint's defaults for complexity, max-depth and max-lines-per-function
+LIMITS = {'complexity': 20, 'nesting': 4, 'length': 50}
+# metric -> (file summary key, label)
+FILE_METRICS = {
+    'complexity': ('complexity', 'total complexity'),
+    'length': ('lines', 'lines'),
+    'nesting': ('nesting', 'deepest nesting'),
+    'hooks': ('hooks', 'hook calls'),
+}
+
+
+class ComplexityReportInput(BaseModel):
+    """Input schema for ComplexityReportTool."""
+    metric: str = Field(
+        default="complexity",
+        description="What to rank by: 'complexity' (cyclomatic), 'length' (lines), 'nesting' (deepest if/for/try nesting), 'hooks' (React hook calls)"
+    )
+    level: str = Field(
+        default="function",
+        description="'function' to rank functions/components/hooks/callbacks, 'file' to rank files by their totals"
+    )
+    path: str = Field(
+        default="",
+        description="Directory to limit the ranking to, or a single file to list its functions (e.g., 'src/hooks', 'src/hooks/useFacilityData.ts'). Empty = whole project."
+    )
+    top_k: int = Field(
+        default=20,
+        description="Number of entries to return"
+    )
+
+
+def _function_line(display: str, function: dict) -> str:
+    return (
+        f"{display}:{function['line']}-{function['end']}  {function['title']} ({function['kind']})  "
+        f"complexity {function['complexity']}, {function['length']} lines, "
+        f"nesting {function['nesting']}, {function['hooks']} hooks"
+    )
+
+
+class ComplexityReportTool(BaseTool):
+    name: str = "Rank Code Complexity"
+    description: str = (
+        "Ranks the TS/TSX/JS functions, components, hooks and callbacks of the project (or whole "
+        "files) by cyclomatic complexity, length, nesting depth or number of React hook calls, "
+        "from a precomputed index. Give a file to see how its size is spread over its functions. "
+        "Use it to decide what to split or simplify without reading large files."
+    )
+    args_schema: Type[BaseModel] = ComplexityReportInput
+
+    def _run(self, metric: str = "complexity", level: str = "function", path: str = "", top_k: int = 20) -> str:
+        from roots.complexity import COMPLEXITY_INDEX, METRICS, source_files
+
+        if metric not in METRICS:
+            return f"Error: Unknown metric '{metric}'. Use: {', '.join(METRICS)}"
+        if level not in ('function', 'file'):
+            return f"Error: Unknown level '{level}'. Use: function, file"
+        project_root = os.path.realpath(get_project_root())
+        scope = resolve_path(path) if path.strip() else ""
+        if scope and not (scope == project_root or scope.startswith(project_root + os.sep)):
+            return f"Error: Access denied. Path must be within {project_root}"
+        if scope and not os.path.exists(scope):
+            return f"Error: Path not found: {path}"
+        top_k = max(1, min(top_k, MAX_TOP_K))
+        files = source_files(project_root)
+
+        def display(file_path: str) -> str:
+            return os.path.relpath(file_path, project_root)
+
+        if os.path.isfile(scope):
+            metrics = COMPLEXITY_INDEX.file_metrics(files, scope)
+            if metrics is None:
+                return f"Error: {path} is not a TS/TSX/JS source file"
+            return self._file_report(display(scope), metrics, metric, top_k)
+
+        prefix = scope.rstrip(os.sep) + os.sep if scope else ""
+        where = f" under {path}" if scope else ""
+        if level == 'file':
+            summaries = [s for s in COMPLEXITY_INDEX.files(files) if s['path'].startswith(prefix)]
+            key, label = FILE_METRICS[metric]
+            summaries.sort(key=lambda s: (-s[key], s['path']))
+            lines = [f"Files{where} ranked by {label} ({len(summaries)} files)", "-" * 60]
+            for rank, s in enumerate(summaries[:top_k], 1):
+                lines.append(
+                    f"{rank:>3}. {display(s['path'])}  {s['lines']} lines, {s['functions']} functions, "
+                    f"complexity {s['complexity']} (max {s['max_complexity']}), "
+                    f"nesting {s['nesting']}, {s['hooks']} hooks"
+                )
+            return "\n".join(lines)
+
+        functions = [(p, f) for p, f in COMPLEXITY_INDEX.functions(files) if p.startswith(prefix)]
+        functions.sort(key=lambda item: (-item[1][metric], item[0], item[1]['line']))
+        lines = [f"Functions{where} ranked by {metric} ({len(functions)} functions)"]
+        lines.append(self._over_limits([f for _, f in functions]))
+        lines.append("-" * 60)
+        for rank, (file_path, function) in enumerate(functions[:top_k], 1):
+            lines.append(f"{rank:>3}. " + _function_line(display(file_path), function))
+        return "\n".join(lines)
+
+    @staticmethod
+    def _over_limits(functions: List[dict]) -> str:
+        counts = [f"{sum(1 for f in functions if f[name] > limit)} with {name} > {limit}"
+                  for name, limit in LIMITS.items()]
+        return "Over ESLint's default limits: " + ", ".join(counts)
+
+    def _file_report(self, display: str, metrics: dict, metric: str, top_k: int) -> str:
+        functions = sorted(metrics['functions'], key=lambda f: (-f[metric], f['line']))
+        lines = [f"{display}: {metrics['lines']} lines, {len(functions)} functions"]
+        if not functions:
+            return "\n".join(lines)
+        # Top-level declarations, with the share of the file each one covers
+        top_level = [f for f in metrics['functions'] if ' > ' not in f['title']]
+        lines.append(self._over_limits(functions))
+        lines.append("Top-level declarations:")
+        for function in sorted(top_level, key=lambda f: -f['length'])[:top_k]:
+            share = function['length'] * 100 // max(metrics['lines'], 1)
+            nested = sum(1 for f in functions if f['title'].startswith(function['title'] + ' > '))
+            lines.append(
+                f"  {function['line']}-{function['end']}  {function['title']} ({function['kind']})  "
+                f"{function['length']} lines ({share}%), {nested} nested functions, "
+                f"{function['hooks']} hooks"
+            )
+        lines += ["-" * 60, f"Functions ranked by {metric}:"]
+        for rank, function in enumerate(functions[:top_k], 1):
+            lines.append(f"{rank:>3}. " + _function_line(display, function))
+        return "\n".join(lines)
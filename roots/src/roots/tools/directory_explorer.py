@@ -3,7 +3,8 @@ from typing import Type
 from pydantic import BaseModel, Field
 import os
 
-PROJECT_ROOT = "/Users/inu/Desktop/kidos"
+from roots.project import get_project_root
+from roots.tools.cache import cached, track
 
 
 class DirectoryExplorerInput(BaseModel):
@@ -31,15 +32,17 @@ class DirectoryExplorerTool(BaseTool):
     )
     args_schema: Type[BaseModel] = DirectoryExplorerInput
 
+    @cached(path_arg='path')
     def _run(self, path: str = ".", max_depth: int = 3, show_files: bool = True) -> str:
+        project_root = get_project_root()
         if os.path.isabs(path):
             full_path = path
         else:
-            full_path = os.path.join(PROJECT_ROOT, path)
+            full_path = os.path.join(project_root, path)
 
         real_path = os.path.realpath(full_path)
-        if not real_path.startswith(os.path.realpath(PROJECT_ROOT)):
-            return f"Error: Access denied. Path must be within {PROJECT_ROOT}"
+        if not real_path.startswith(os.path.realpath(project_root)):
+            return f"Error: Access denied. Path must be within {project_root}"
 
         if not os.path.exists(real_path):
             return f"Error: Path not found: {path}"
@@ -66,6 +69,7 @@ class DirectoryExplorerTool(BaseTool):
         skip_dirs = {'.git', 'node_modules', '.next', '.venv', '__pycache__', '.netlify'}
 
         try:
+            track(dir_path)
             entries = sorted(os.listdir(dir_path))
         except PermissionError:
             lines.append(f"{prefix}[permission denied]")
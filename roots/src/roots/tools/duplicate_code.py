@@ -0,0 +1,78 @@
+from crewai.tools import BaseTool
+from typing import Type
+from pydantic import BaseModel, Field
+import os
+
+from roots.project import get_project_root
+from roots.tools.cache import resolve_path
+
+MAX_MEMBERS_SHOWN = 8
+
+
+class DuplicateCodeInput(BaseModel):
+    """Input schema for DuplicateCodeTool."""
+    path: str = Field(
+        default="src",
+        description="Only report duplicates that involve code under this directory, relative to project root (e.g., 'src/components', 'src/hooks')"
+    )
+    threshold: float = Field(
+        default=0.8,
+        description="Minimum similarity (0.5-1.0) of two functions/components to count as near-duplicates"
+    )
+    min_lines: int = Field(
+        default=8,
+        description="Ignore functions/components shorter than this many lines"
+    )
+    top_k: int = Field(
+        default=15,
+        description="Number of duplicate groups to return (largest duplicated line count first)"
+    )
+
+
+class DuplicateCodeTool(BaseTool):
+    name: str = "Find Duplicate Code"
+    description: str = (
+        "Finds copy-pasted and near-duplicate functions, components and hook callbacks across the "
+        "whole project (MinHash/LSH over normalized token streams; renamed strings and numbers "
+        "still match). Returns groups of similar code with file, line range, declaration and "
+        "similarity, ranked by how many lines are duplicated. Use it instead of comparing files "
+        "by hand when looking for components or hooks to merge."
+    )
+    args_schema: Type[BaseModel] = DuplicateCodeInput
+
+    def _run(self, path: str = "src", threshold: float = 0.8, min_lines: int = 8, top_k: int = 15) -> str:
+        from roots.duplicates import DUPLICATE_INDEX, source_files
+
+        project_root = os.path.realpath(get_project_root())
+        scope = resolve_path(path) if path.strip() else ""
+        if scope and not (scope == project_root or scope.startswith(project_root + os.sep)):
+            return f"Error: Access denied. Path must be within {project_root}"
+        if scope and not os.path.exists(scope):
+            return f"Error: Path not found: {path}"
+        threshold = max(0.5, min(threshold, 1.0))
+        top_k = max(1, min(top_k, 50))
+
+        clusters = DUPLICATE_INDEX.find(source_files(project_root), threshold, scope, max(1, min_lines))
+        where = f" involving {path}/" if scope else ""
+        header = f"Duplicate code{where} (similarity >= {threshold:.2f}, >= {min_lines} lines)"
+        if not clusters:
+            return f"{header}\nNo near-duplicate functions or components found."
+
+        total = sum(c['duplicated_lines'] for c in clusters)
+        lines = [header, f"{len(clusters)} groups, about {total} duplicated lines", "-" * 60]
+        for rank, cluster in enumerate(clusters[:top_k], 1):
+            members = cluster['members']
+            lines.append(
+                f"[{rank}] {len(members)} copies, {cluster['duplicated_lines']} duplicated lines, "
+                f"similarity >= {cluster['min_similarity']:.2f}"
+            )
+            for file_path, unit, similarity in members[:MAX_MEMBERS_SHOWN]:
+                display = os.path.relpath(file_path, project_root)
+                lines.append(
+                    f"    {display}:{unit['line']}-{unit['end']}  {unit['title']} ({unit['kind']}, {similarity:.2f})"
+                )
+            if len(members) > MAX_MEMBERS_SHOWN:
+                lines.append(f"    ... and {len(members) - MAX_MEMBERS_SHOWN} more")
+        if len(clusters) > top_k:
+            lines.append(f"\n... {len(clusters) - top_k} smaller groups not shown")
+        return "\n".join(lines)
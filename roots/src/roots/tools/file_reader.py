@@ -3,7 +3,9 @@ from typing import Type
 from pydantic import BaseModel, Field
 import os
 
-PROJECT_ROOT = "/Users/inu/Desktop/kidos"
+from roots.project import get_project_root
+from roots.tools.cache import cached, track
+from roots.tools.spreadsheet_reader import SPREADSHEET_EXTENSIONS
 
 
 class FileReaderInput(BaseModel):
@@ -27,17 +29,19 @@ class FileReaderTool(BaseTool):
     )
     args_schema: Type[BaseModel] = FileReaderInput
 
+    @cached(path_arg='file_path')
     def _run(self, file_path: str, max_lines: int = 200) -> str:
+        project_root = get_project_root()
         # Resolve path
         if os.path.isabs(file_path):
             full_path = file_path
         else:
-            full_path = os.path.join(PROJECT_ROOT, file_path)
+            full_path = os.path.join(project_root, file_path)
 
         # Security: ensure path is within project
         real_path = os.path.realpath(full_path)
-        if not real_path.startswith(os.path.realpath(PROJECT_ROOT)):
-            return f"Error: Access denied. Path must be within {PROJECT_ROOT}"
+        if not real_path.startswith(os.path.realpath(project_root)):
+            return f"Error: Access denied. Path must be within {project_root}"
 
         if not os.path.exists(real_path):
             return f"Error: File not found: {file_path}"
@@ -45,7 +49,13 @@ class FileReaderTool(BaseTool):
         if os.path.isdir(real_path):
             return f"Error: {file_path} is a directory. Use the Directory Explorer tool instead."
 
+        if os.path.splitext(real_path)[1].lower() in SPREADSHEET_EXTENSIONS:
+            return f"Error: {file_path} is a spreadsheet. Use the Read Spreadsheet tool instead."
+        if real_path.lower().endswith('.pdf'):
+            return f"Error: {file_path} is a PDF. Use the Read PDF tool instead."
+
         try:
+            track(real_path)
             with open(real_path, 'r', encoding='utf-8', errors='replace') as f:
                 lines = f.readlines()
 
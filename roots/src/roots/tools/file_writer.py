@@ -5,7 +5,8 @@ import os
 import shutil
 from datetime import datetime
 
-PROJECT_ROOT = "/Users/inu/Desktop/kidos"
+from roots.project import get_project_root
+from roots.tools.cache import TOOL_CACHE
 
 
 class FileWriterInput(BaseModel):
@@ -35,20 +36,21 @@ class FileWriterTool(BaseTool):
     args_schema: Type[BaseModel] = FileWriterInput
 
     def _run(self, file_path: str, content: str, create_backup: bool = True) -> str:
+        project_root = get_project_root()
         # Resolve path
         if os.path.isabs(file_path):
             full_path = file_path
         else:
-            full_path = os.path.join(PROJECT_ROOT, file_path)
+            full_path = os.path.join(project_root, file_path)
 
         # Security: ensure path is within project
-        real_project = os.path.realpath(PROJECT_ROOT)
+        real_project = os.path.realpath(project_root)
         # For new files, check the parent directory
         parent_real = os.path.realpath(os.path.dirname(full_path))
 
         # Allow creating files in new directories within project
-        if not full_path.startswith(PROJECT_ROOT):
-            return f"Error: Access denied. Path must be within {PROJECT_ROOT}"
+        if not full_path.startswith(project_root):
+            return f"Error: Access denied. Path must be within {project_root}"
 
         # Block writing to critical files
         blocked = ['.env.local', '.env', 'package-lock.json', 'node_modules']
@@ -62,7 +64,7 @@ class FileWriterTool(BaseTool):
 
             # Backup existing file
             if create_backup and os.path.exists(full_path):
-                backup_dir = os.path.join(PROJECT_ROOT, '.agent_backups')
+                backup_dir = os.path.join(project_root, '.agent_backups')
                 os.makedirs(backup_dir, exist_ok=True)
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 backup_name = f"{basename}.{timestamp}.bak"
@@ -71,6 +73,9 @@ class FileWriterTool(BaseTool):
             with open(full_path, 'w', encoding='utf-8') as f:
                 f.write(content)
 
+            # Drop cached read results that covered this path
+            TOOL_CACHE.invalidate(full_path)
+
             line_count = content.count('\n') + 1
             return f"Successfully wrote {line_count} lines to {file_path}"
         except Exception as e:
@@ -0,0 +1,174 @@
+from crewai.tools import BaseTool
+from typing import Dict, Type
+from pydantic import BaseModel, Field
+from datetime import datetime
+import os
+
+from roots.project import get_project_root
+
+ACTIONS = ('hotspots', 'churn', 'co_changes', 'file')
+MAX_TOP_K = 100
+FILE_COMMITS_SHOWN = 10
+FILE_PARTNERS_SHOWN = 10
+
+
+class GitHistoryInput(BaseModel):
+    """Input schema for GitHistoryTool."""
+    action: str = Field(
+        default="hotspots",
+        description=(
+            "Query to run: "
+            "'hotspots' - source files that change often AND are complex (where bugs concentrate), "
+            "'churn' - files ranked by number of commits, with lines changed, authors and last change, "
+            "'co_changes' - files that change together (give a file as target to see its partners), "
+            "'file' - history of one file: commits, authors, co-changed files and recent commit messages"
+        )
+    )
+    target: str = Field(
+        default="",
+        description="File for 'file'/'co_changes', or a directory to limit the ranking to (e.g., 'src/hooks'). Empty = whole project."
+    )
+    since_days: int = Field(
+        default=0,
+        description="Only count commits from the last N days (e.g., 90). 0 = whole history."
+    )
+    top_k: int = Field(
+        default=20,
+        description="Number of entries to return"
+    )
+
+
+def _date(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
+
+
+def _authors(entry: dict) -> str:
+    name, count = entry['authors'].most_common(1)[0]
+    return f"{len(entry['authors'])} authors (top: {name} {count * 100 // entry['commits']}%)"
+
+
+class GitHistoryTool(BaseTool):
+    name: str = "Analyze Git History"
+    description: str = (
+        "Answers questions about the kidos git history from a local index of every commit, "
+        "without the output limit of running git log in a shell: change hotspots (files that "
+        "change often and are complex), per-file churn, authors and last change date, files that "
+        "change together, and the history of one file. Use 'hotspots' first to decide which "
+        "files deserve a close review."
+    )
+    args_schema: Type[BaseModel] = GitHistoryInput
+
+    def _run(self, action: str = "hotspots", target: str = "", since_days: int = 0, top_k: int = 20) -> str:
+        from roots.churn import CHURN_INDEX
+
+        if action not in ACTIONS:
+            return f"Error: Unknown action '{action}'. Use: {', '.join(ACTIONS)}"
+        project_root = os.path.realpath(get_project_root())
+        target = target.strip().rstrip('/')
+        full_path = os.path.realpath(os.path.join(project_root, target)) if target else project_root
+        if not (full_path == project_root or full_path.startswith(project_root + os.sep)):
+            return f"Error: Access denied. Path must be within {project_root}"
+        relative = os.path.relpath(full_path, project_root).replace(os.sep, '/') if target else ""
+        if action == 'file' and not target:
+            return "Error: 'file' needs a target file"
+        top_k = max(1, min(top_k, MAX_TOP_K))
+        since_days = max(0, since_days)
+
+        stats = CHURN_INDEX.file_stats(project_root, since_days)
+        if stats is None:
+            return f"Error: {project_root} is not a git repository"
+        period = f"last {since_days} days" if since_days else "whole history"
+
+        if action == 'file' or (action == 'co_changes' and target and os.path.isfile(full_path)):
+            if relative not in stats:
+                return f"No commits touch {relative} ({period})."
+            if action == 'file':
+                return self._file(project_root, relative, stats, since_days, period)
+            partners = CHURN_INDEX.co_changes(project_root, since_days, relative)
+            lines = [f"Files changed together with {relative} ({period}, {stats[relative]['commits']} commits)",
+                     "-" * 60]
+            return "\n".join(lines + self._partners(project_root, relative, stats, partners, top_k))
+
+        # Only files that still exist, under the target directory
+        prefix = relative + '/' if relative else ""
+        current = {path: entry for path, entry in stats.items()
+                   if path.startswith(prefix) and os.path.isfile(os.path.join(project_root, path))}
+        where = f" under {relative}" if relative else ""
+
+        if action == 'churn':
+            ranking = sorted(current.items(), key=lambda item: (-item[1]['commits'], item[0]))
+            lines = [f"Files{where} ranked by number of commits ({period}, {len(ranking)} files changed)", "-" * 60]
+            for rank, (path, entry) in enumerate(ranking[:top_k], 1):
+                lines.append(
+                    f"{rank:>3}. {path}  {entry['commits']} commits, +{entry['added']}/-{entry['deleted']} lines, "
+                    f"{_authors(entry)}, last {_date(entry['last'])}"
+                )
+            return "\n".join(lines)
+        if action == 'co_changes':
+            pairs = CHURN_INDEX.co_changes(project_root, since_days)
+            ranking = []
+            for (a, b), count in pairs.items():
+                if count < 2 or a not in current or b not in current:
+                    continue
+                # Share of the two files' average number of commits in which they changed together
+                coupling = count * 200 // (stats[a]['commits'] + stats[b]['commits'])
+                ranking.append((count, coupling, a, b))
+            ranking.sort(key=lambda r: (-r[0], -r[1], r[2], r[3]))
+            lines = [f"Files{where} that change together ({period}, at least 2 shared commits)", "-" * 60]
+            if not ranking:
+                return "\n".join(lines + ["No files changed together more than once."])
+            for rank, (count, coupling, a, b) in enumerate(ranking[:top_k], 1):
+                lines.append(f"{rank:>3}. {a} <-> {b}  {count} times (coupling {coupling}%)")
+            return "\n".join(lines)
+        return self._hotspots(project_root, current, where, period, top_k)
+
+    @staticmethod
+    def _hotspots(project_root: str, current: Dict[str, dict], where: str, period: str, top_k: int) -> str:
+        from roots.complexity import COMPLEXITY_INDEX, source_files
+
+        complexity = {os.path.relpath(s['path'], project_root).replace(os.sep, '/'): s
+                      for s in COMPLEXITY_INDEX.files(source_files(project_root))}
+        ranking = [(entry['commits'] * complexity[path]['complexity'], path, entry, complexity[path])
+                   for path, entry in current.items() if path in complexity and complexity[path]['complexity']]
+        ranking.sort(key=lambda r: (-r[0], r[1]))
+        lines = [f"Hotspots{where}: source files ranked by commits x total complexity ({period})", "-" * 60]
+        if not ranking:
+            return "\n".join(lines + ["No changed source files with measurable complexity."])
+        top = ranking[0][0]
+        for rank, (score, path, entry, summary) in enumerate(ranking[:top_k], 1):
+            lines.append(
+                f"{rank:>3}. {path}  score {score * 100 // top}: {entry['commits']} commits, "
+                f"complexity {summary['complexity']} (max {summary['max_complexity']}), {summary['lines']} lines, "
+                f"{_authors(entry)}, last {_date(entry['last'])}"
+            )
+        return "\n".join(lines)
+
+    @staticmethod
+    def _partners(project_root: str, path: str, stats: Dict[str, dict], partners, top_k: int) -> list:
+        if not partners:
+            return ["No other file changed in the same commits."]
+        lines = []
+        commits = stats[path]['commits']
+        for rank, (other, count) in enumerate(partners.most_common(top_k), 1):
+            gone = "" if os.path.exists(os.path.join(project_root, other)) else " (deleted)"
+            lines.append(f"{rank:>3}. {other}{gone}  {count} times ({count * 100 // commits}% of its commits)")
+        return lines
+
+    def _file(self, project_root: str, path: str, stats: Dict[str, dict], since_days: int, period: str) -> str:
+        from roots.churn import CHURN_INDEX
+
+        entry = stats[path]
+        lines = [
+            f"History of {path} ({period})",
+            f"{entry['commits']} commits, +{entry['added']}/-{entry['deleted']} lines, "
+            f"first {_date(entry['first'])}, last {_date(entry['last'])}",
+            "Authors: " + ", ".join(f"{name} ({count})" for name, count in entry['authors'].most_common()),
+            "-" * 60,
+            "Changed together with:",
+        ]
+        partners = CHURN_INDEX.co_changes(project_root, since_days, path)
+        lines += ["  " + line for line in self._partners(project_root, path, stats, partners, FILE_PARTNERS_SHOWN)]
+        lines.append("Recent commits:")
+        for sha, author, timestamp, subject in CHURN_INDEX.file_commits(project_root, path, FILE_COMMITS_SHOWN, since_days):
+            lines.append(f"  {sha[:10]} {_date(timestamp)} {author}: {subject}")
+        return "\n".join(lines)
@@ -4,7 +4,8 @@ from pydantic import BaseModel, Field
 import os
 import re
 
-PROJECT_ROOT = "/Users/inu/Desktop/kidos"
+from roots.project import get_project_root
+from roots.tools.cache import cached, track, tracked_walk
 
 SKIP_DIRS = {'.git', 'node_modules', '.next', '.venv', '__pycache__', '.netlify',
              '.agent_backups', 'roots'}
@@ -45,13 +46,15 @@ class GrepSearchTool(BaseTool):
     )
     args_schema: Type[BaseModel] = GrepSearchInput
 
+    @cached(path_arg='path')
     def _run(self, pattern: str, path: str = "src", file_pattern: str = "",
              max_results: int = 30) -> str:
-        search_path = os.path.join(PROJECT_ROOT, path) if not os.path.isabs(path) else path
+        project_root = get_project_root()
+        search_path = os.path.join(project_root, path) if not os.path.isabs(path) else path
         real_path = os.path.realpath(search_path)
 
-        if not real_path.startswith(os.path.realpath(PROJECT_ROOT)):
-            return f"Error: Access denied. Path must be within {PROJECT_ROOT}"
+        if not real_path.startswith(os.path.realpath(project_root)):
+            return f"Error: Access denied. Path must be within {project_root}"
 
         if not os.path.exists(real_path):
             return f"Error: Path not found: {path}"
@@ -64,7 +67,7 @@ class GrepSearchTool(BaseTool):
         results = []
         files_searched = 0
 
-        for root, dirs, files in os.walk(real_path):
+        for root, dirs, files in tracked_walk(real_path):
             # Skip excluded directories
             dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
 
@@ -77,10 +80,11 @@ class GrepSearchTool(BaseTool):
                     continue
 
                 filepath = os.path.join(root, filename)
-                rel_path = os.path.relpath(filepath, PROJECT_ROOT)
+                rel_path = os.path.relpath(filepath, project_root)
                 files_searched += 1
 
                 try:
+                    track(filepath)
                     with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
                         for line_num, line in enumerate(f, 1):
                             if regex.search(line):
@@ -0,0 +1,205 @@
+from crewai.tools import BaseTool
+from typing import Dict, List, Tuple, Type
+from pydantic import BaseModel, Field
+from collections import Counter
+import os
+
+from roots.project import get_project_root
+
+ACTIONS = ('dependents', 'dependencies', 'cycles', 'fan_in', 'fan_out', 'missing')
+MAX_TOP_K = 200
+MAX_DIRECTORIES = 15
+MAX_CYCLE_MEMBERS = 12
+
+
+class ImportGraphInput(BaseModel):
+    """Input schema for ImportGraphTool."""
+    action: str = Field(
+        ...,
+        description=(
+            "Query to run: "
+            "'dependents' - files that import the target, directly or transitively (impact of changing it), "
+            "'dependencies' - files the target imports, directly or transitively, "
+            "'cycles' - circular imports, "
+            "'fan_in' - files imported by the most other files, "
+            "'fan_out' - files that import the most other files, "
+            "'missing' - relative or '@/' imports that do not resolve to a file"
+        )
+    )
+    target: str = Field(
+        default="",
+        description=(
+            "For dependents/dependencies: a file or directory relative to project root, or an import "
+            "path (e.g., 'src/hooks/useFacilityData.ts', '@/hooks/useFacilityData', 'src/contexts'). "
+            "For the other actions: only report files under this directory (e.g., 'src/components'). "
+            "Empty = whole project."
+        )
+    )
+    depth: int = Field(
+        default=0,
+        description="For dependents/dependencies: how many import levels to follow (1 = direct only, 0 = all)"
+    )
+    top_k: int = Field(
+        default=30,
+        description="Maximum number of files or cycles to list"
+    )
+    include_type_imports: bool = Field(
+        default=False,
+        description="For cycles: also count 'import type' edges, which are erased at build time"
+    )
+
+
+class ImportGraphTool(BaseTool):
+    name: str = "Inspect Import Graph"
+    description: str = (
+        "Answers questions about the import graph of the project's TS/TSX/JS files, with '@/' "
+        "aliases resolved from tsconfig.json: who imports a file or directory (directly and "
+        "transitively, grouped by directory), what it imports, circular imports, the most "
+        "imported and most importing files, and broken imports. Use 'dependents' for the "
+        "impact of changing a shared hook or component in one call instead of grepping for imports."
+    )
+    args_schema: Type[BaseModel] = ImportGraphInput
+
+    def _run(self, action: str, target: str = "", depth: int = 0, top_k: int = 30,
+             include_type_imports: bool = False) -> str:
+        from roots.imports import IMPORT_GRAPH, source_files
+
+        if action not in ACTIONS:
+            return f"Error: Unknown action '{action}'. Use: {', '.join(ACTIONS)}"
+        project_root = os.path.realpath(get_project_root())
+        top_k = max(1, min(top_k, MAX_TOP_K))
+        depth = max(0, depth)
+        files = source_files(project_root)
+
+        scope = []
+        if target.strip():
+            full_path = os.path.realpath(os.path.join(project_root, target.strip()))
+            if not (full_path == project_root or full_path.startswith(project_root + os.sep)):
+                return f"Error: Access denied. Path must be within {project_root}"
+            scope = IMPORT_GRAPH.lookup(project_root, files, target)
+            if not scope:
+                return f"Error: No TS/TSX/JS file or directory matches '{target}'"
+        elif action in ('dependents', 'dependencies'):
+            return f"Error: '{action}' needs a target file or directory"
+
+        def display(path: str) -> str:
+            return os.path.relpath(path, project_root)
+
+        if action in ('dependents', 'dependencies'):
+            query = IMPORT_GRAPH.dependents if action == 'dependents' else IMPORT_GRAPH.dependencies
+            found, direct = query(project_root, files, scope, depth)
+            return self._format_walk(action, target, scope, found, direct, top_k, display)
+        if action == 'cycles':
+            cycles = IMPORT_GRAPH.cycles(project_root, files, include_type_imports)
+            return self._format_cycles(target, set(scope), cycles, top_k, include_type_imports, display)
+        if action == 'missing':
+            missing = IMPORT_GRAPH.missing(project_root, files)
+            return self._format_missing(target, set(scope), missing, top_k, display)
+        ranking = IMPORT_GRAPH.fan(project_root, files, 'in' if action == 'fan_in' else 'out')
+        return self._format_fan(action, target, set(scope), ranking, top_k, display)
+
+    @staticmethod
+    def _format_walk(action: str, target: str, scope: List[str], found: Dict[str, int],
+                     direct: Dict[str, List[Tuple[str, int, bool]]], top_k: int, display) -> str:
+        subject = display(scope[0]) if len(scope) == 1 else f"{target} ({len(scope)} files)"
+        header = f"Files that import {subject}" if action == 'dependents' else f"Files imported by {subject}"
+        if not found:
+            return f"{header}\nNone."
+
+        levels = Counter(found.values())
+        lines = [
+            header,
+            f"{len(direct)} direct, {len(found)} in total ("
+            + ", ".join(f"level {level}: {levels[level]}" for level in sorted(levels)) + ")",
+        ]
+        directories = Counter(os.path.dirname(display(path)) for path in found)
+        direct_directories = Counter(os.path.dirname(display(path)) for path in direct)
+        lines.append("By directory:")
+        for directory, count in directories.most_common(MAX_DIRECTORIES):
+            lines.append(f"  {directory or '.'}/  {count} ({direct_directories[directory]} direct)")
+        if len(directories) > MAX_DIRECTORIES:
+            lines.append(f"  ... and {len(directories) - MAX_DIRECTORIES} more directories")
+
+        lines += ["-" * 60, "Direct:"]
+        for path in sorted(direct)[:top_k]:
+            edges = direct[path]
+            type_only = " (type only)" if all(edge[2] for edge in edges) else ""
+            if action == 'dependents':
+                # The import line is in the dependent file
+                targets = "" if len(scope) == 1 else " -> " + ", ".join(display(t) for t, _, _ in edges)
+                lines.append(f"  {display(path)}:{edges[0][1]}{targets}{type_only}")
+            else:
+                sources = ", ".join(f"{display(source)}:{line}" for source, line, _ in edges)
+                lines.append(f"  {display(path)}{type_only}  <- {sources}")
+        if len(direct) > top_k:
+            lines.append(f"  ... and {len(direct) - top_k} more")
+        indirect = sorted((level, path) for path, level in found.items() if level > 1)
+        if indirect:
+            lines.append("Indirect:")
+            for level, path in indirect[:top_k]:
+                lines.append(f"  {display(path)}  (level {level})")
+            if len(indirect) > top_k:
+                lines.append(f"  ... and {len(indirect) - top_k} more")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _format_cycles(target: str, scope: set, cycles: List[dict], top_k: int,
+                       include_types: bool, display) -> str:
+        if scope:
+            cycles = [c for c in cycles if scope.intersection(c['members'])]
+        where = f" involving {target}" if scope else ""
+        kind = "all imports" if include_types else "runtime imports; 'import type' ignored"
+        header = f"Import cycles{where} ({kind}): {len(cycles)}"
+        if not cycles:
+            return f"{header}\nNo circular imports."
+        lines = [header, "-" * 60]
+        for rank, cycle in enumerate(cycles[:top_k], 1):
+            members = cycle['members']
+            lines.append(f"[{rank}] {len(members)} files: " + " -> ".join(display(p) for p in cycle['cycle']))
+            if len(members) > len(cycle['cycle']) - 1:
+                others = [p for p in members if p not in cycle['cycle']]
+                shown = ", ".join(display(p) for p in others[:MAX_CYCLE_MEMBERS])
+                more = f" and {len(others) - MAX_CYCLE_MEMBERS} more" if len(others) > MAX_CYCLE_MEMBERS else ""
+                lines.append(f"    also in this cycle: {shown}{more}")
+        if len(cycles) > top_k:
+            lines.append(f"\n... {len(cycles) - top_k} smaller cycles not shown")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _format_fan(action: str, target: str, scope: set, ranking: List[Tuple[str, int, int]],
+                    top_k: int, display) -> str:
+        if scope:
+            ranking = [r for r in ranking if r[0] in scope]
+        where = f" under {target}" if scope else ""
+        label = "how many files import each one" if action == 'fan_in' else "how many files each one imports"
+        lines = [f"Files{where} ranked by {action.replace('_', '-')} ({label})", "-" * 60]
+        if not ranking:
+            return "\n".join(lines + ["No imports found."])
+        for rank, (path, count, runtime) in enumerate(ranking[:top_k], 1):
+            types = f" ({count - runtime} type only)" if runtime < count else ""
+            lines.append(f"{rank:>3}. {display(path)}  {count}{types}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _format_missing(target: str, scope: set, missing: Dict[str, List[Tuple[str, int]]],
+                        top_k: int, display) -> str:
+        if scope:
+            missing = {path: items for path, items in missing.items() if path in scope}
+        where = f" under {target}" if scope else ""
+        total = sum(len(items) for items in missing.values())
+        lines = [f"Unresolved imports{where}: {total} in {len(missing)} files", "-" * 60]
+        if not missing:
+            return "\n".join(lines + ["All relative and aliased imports resolve to a file."])
+        specs = Counter(spec for items in missing.values() for spec, _ in items)
+        shown = 0
+        for path, items in missing.items():
+            for spec, line in items:
+                if shown < top_k:
+                    lines.append(f"  {display(path)}:{line}  '{spec}'")
+                shown += 1
+        if shown > top_k:
+            lines.append(f"  ... and {shown - top_k} more")
+        common = [f"'{spec}' ({count})" for spec, count in specs.most_common(5) if count > 1]
+        if common:
+            lines.append("Most common: " + ", ".join(common))
+        return "\n".join(lines)
@@ -0,0 +1,311 @@
+from crewai.tools import BaseTool
+from typing import Dict, List, Optional, Tuple, Type
+from pydantic import BaseModel, Field
+from collections import Counter, defaultdict
+import glob
+import hashlib
+import math
+import os
+import re
+import threading
+import unicodedata
+
+from roots.project import get_project_root
+from roots.state import cache_path, load_json, save_json
+
+# Roots' own knowledge base (roots/knowledge/*.md)
+KNOWLEDGE_DIR = os.path.realpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'knowledge')
+)
+
+INDEX_VERSION = 2
+BM25_K1 = 1.5
+BM25_B = 0.75
+MAX_CHUNK_CHARS = 1500
+MAX_PASSAGE_CHARS = 1200
+
+_MARKDOWN_HEADING = re.compile(r'^(#{1,6})\s+(.+?)\s*#*\s*$')
+# Numbered headings used by the regulatory documents: "2.2.1 級地決定のメカニズム".
+# Only used in documents without '#' headings, where "1. foo" is an ordered-list item.
+_NUMBERED_HEADING = re.compile(r'^(\d{1,2}(?:\.\d{1,2}){0,3})\.?\s+(\S.{0,60})$')
+_WORD = re.compile(r'[0-9a-z_]+|[぀-ヿ㐀-鿿豈-﫿々〆ヶ]+')
+_CJK = re.compile(r'[぀-ヿ㐀-鿿豈-﫿々〆ヶ]')
+
+
+def tokenize(text: str) -> List[str]:
+    """ASCII words as-is, Japanese runs as character bigrams (unigram for 1-char runs)."""
+    tokens = []
+    for word in _WORD.findall(unicodedata.normalize('NFKC', text).lower()):
+        if not _CJK.match(word):
+            tokens.append(word)
+        elif len(word) == 1:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def _heading(line: str, numbered: bool) -> Optional[Tuple[int, str]]:
+    """(level, title) if the line is a heading; numbered headings count only if `numbered`."""
+    match = _MARKDOWN_HEADING.match(line)
+    if match:
+        return len(match.group(1)), match.group(2)
+    if not numbered:
+        return None
+    match = _NUMBERED_HEADING.match(line)
+    if match and not line.rstrip().endswith(('。', '、', '：', ':')):
+        return match.group(1).count('.') + 1, line.strip()
+    return None
+
+
+def _unfenced(lines: List[str]) -> List[Tuple[int, str]]:
+    """(line_num, line) for the lines outside ``` code fences."""
+    result = []
+    in_fence = False
+    for line_num, line in enumerate(lines, 1):
+        if line.lstrip().startswith('```'):
+            in_fence = not in_fence
+            continue
+        if not in_fence:
+            result.append((line_num, line))
+    return result
+
+
+def chunk_markdown(text: str) -> List[dict]:
+    """Split a document into one chunk per heading section (long sections are split further)."""
+    lines = text.splitlines()
+    unfenced = _unfenced(lines)
+    # Markdown documents are split by their '#' headings only; numbered lines there are lists
+    numbered = not any(_MARKDOWN_HEADING.match(line) for _, line in unfenced)
+    headings = {}
+    for line_num, line in unfenced:
+        heading = _heading(line, numbered)
+        if heading is not None:
+            headings[line_num] = heading
+
+    chunks = []
+    stack: List[Tuple[int, str]] = []
+    body: List[str] = []
+    start = 1
+
+    def flush():
+        content = "\n".join(body).strip()
+        if not content:
+            return
+        title = " > ".join(t for _, t in stack)
+        piece, piece_start = [], start
+        size = 0
+        for offset, line in enumerate(body):
+            piece.append(line)
+            size += len(line) + 1
+            if size >= MAX_CHUNK_CHARS:
+                chunks.append({'title': title, 'line': piece_start, 'text': "\n".join(piece).strip()})
+                piece, size, piece_start = [], 0, start + offset + 1
+        if "\n".join(piece).strip():
+            chunks.append({'title': title, 'line': piece_start, 'text': "\n".join(piece).strip()})
+
+    for line_num, line in enumerate(lines, 1):
+        heading = headings.get(line_num)
+        if heading is None:
+            body.append(line)
+            continue
+        flush()
+        level, title = heading
+        while stack and stack[-1][0] >= level:
+            stack.pop()
+        stack.append((level, title))
+        body = [line]
+        start = line_num
+    flush()
+    return chunks
+
+
+def _file_chunks(path: str, digest: str, content: str) -> List[dict]:
+    """Chunks with term frequencies, cached on disk by content hash (shared across checkouts)."""
+    index_file = cache_path('index', 'knowledge', f"{digest}.json")
+    cached = load_json(index_file, default=None)
+    if isinstance(cached, dict) and cached.get('version') == INDEX_VERSION:
+        return cached['chunks']
+
+    chunks = chunk_markdown(content)
+    for chunk in chunks:
+        terms = Counter(tokenize(chunk['title'] + "\n" + chunk['text']))
+        chunk['tf'] = dict(terms)
+        chunk['length'] = sum(terms.values())
+    save_json(index_file, {'version': INDEX_VERSION, 'chunks': chunks})
+    return chunks
+
+
+def corpus_files(project_root: str) -> List[str]:
+    """roots/knowledge/*.md plus the project's top-level and docs/ markdown files."""
+    patterns = [
+        os.path.join(KNOWLEDGE_DIR, '*.md'),
+        os.path.join(project_root, '*.md'),
+        os.path.join(project_root, 'docs', '**', '*.md'),
+    ]
+    files = set()
+    for pattern in patterns:
+        files.update(os.path.realpath(p) for p in glob.glob(pattern, recursive=True))
+    return sorted(files)
+
+
+class KnowledgeIndex:
+    """
+    BM25 index over heading-sized chunks of the knowledge and spec markdown files.
+
+    Built lazily on the first search. Every search re-stats the corpus and
+    re-chunks only the files whose mtime or size changed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._files: Dict[str, dict] = {}
+        self._chunks: List[Tuple[str, dict]] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._avg_length = 0.0
+
+    def _chunk_file(self, path: str, digest: str, content: str) -> List[dict]:
+        """Chunks of one file with 'tf' and 'length' (subclasses index other file types)."""
+        return _file_chunks(path, digest, content)
+
+    def _query_terms(self, query: str) -> List[str]:
+        return tokenize(query)
+
+    def _matches_source(self, path: str, source: str) -> bool:
+        return source.lower() in os.path.basename(path).lower()
+
+    def refresh(self, paths: List[str]) -> bool:
+        """Bring the index up to date with `paths`. Returns True if anything changed."""
+        changed = False
+        current = set(paths)
+        for path in list(self._files):
+            if path not in current:
+                del self._files[path]
+                changed = True
+
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature = (stat.st_mtime_ns, stat.st_size)
+            entry = self._files.get(path)
+            if entry is not None and entry['signature'] == signature:
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    content = f.read()
+            except OSError:
+                continue
+            digest = hashlib.sha1(content.encode('utf-8')).hexdigest()
+            if entry is None or entry['digest'] != digest:
+                entry = {'digest': digest, 'chunks': self._chunk_file(path, digest, content)}
+                changed = True
+            entry['signature'] = signature
+            self._files[path] = entry
+
+        if changed or not self._chunks:
+            self._rebuild()
+        return changed
+
+    def _rebuild(self):
+        self._chunks = [(path, chunk) for path in sorted(self._files)
+                        for chunk in self._files[path]['chunks']]
+        postings = defaultdict(list)
+        for index, (_, chunk) in enumerate(self._chunks):
+            for term, tf in chunk['tf'].items():
+                postings[term].append((index, tf))
+        self._postings = dict(postings)
+        total = sum(chunk['length'] for _, chunk in self._chunks)
+        self._avg_length = total / len(self._chunks) if self._chunks else 0.0
+
+    def search(self, paths: List[str], query: str, top_k: int,
+               source: str = "") -> List[Tuple[float, str, dict]]:
+        with self._lock:
+            self.refresh(paths)
+            n = len(self._chunks)
+            scores: Dict[int, float] = defaultdict(float)
+            for term in set(self._query_terms(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for index, tf in postings:
+                    length = self._chunks[index][1]['length']
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / self._avg_length)
+                    scores[index] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+            ranked = sorted(scores.items(), key=lambda kv: -kv[1])
+            results = []
+            seen = set()
+            for index, score in ranked:
+                path, chunk = self._chunks[index]
+                if source and not self._matches_source(path, source):
+                    continue
+                # Several spec files are copies of each other; show each passage once
+                if chunk['text'] in seen:
+                    continue
+                seen.add(chunk['text'])
+                results.append((score, path, chunk))
+                if len(results) >= top_k:
+                    break
+            return results
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'files': len(self._files), 'chunks': len(self._chunks),
+                    'terms': len(self._postings)}
+
+
+KNOWLEDGE_INDEX = KnowledgeIndex()
+
+
+class KnowledgeSearchInput(BaseModel):
+    """Input schema for KnowledgeSearchTool."""
+    query: str = Field(
+        ...,
+        description="What to look for, in Japanese or English (e.g., '訪問支援員特別加算 要件', '人員配置基準 児童発達支援管理責任者')"
+    )
+    top_k: int = Field(
+        default=5,
+        description="Number of passages to return"
+    )
+    source: str = Field(
+        default="",
+        description="Only search files whose name contains this text (e.g., 'hohou', 'regulatory'). Empty = all files."
+    )
+
+
+class KnowledgeSearchTool(BaseTool):
+    name: str = "Search Knowledge Base"
+    description: str = (
+        "Ranked full-text search (BM25) over the regulatory and specification documents: "
+        "roots/knowledge/*.md, the project's top-level markdown (syougai_manual.md, hohou.md, "
+        "SYSTEM_SPEC.md, ...) and docs/. Returns the most relevant sections with their file, "
+        "heading and line number, so you can cite the exact clause instead of reading whole documents."
+    )
+    args_schema: Type[BaseModel] = KnowledgeSearchInput
+
+    def _run(self, query: str, top_k: int = 5, source: str = "") -> str:
+        if not query.strip():
+            return "Error: Empty query."
+        top_k = max(1, min(top_k, 20))
+
+        project_root = get_project_root()
+        results = KNOWLEDGE_INDEX.search(corpus_files(project_root), query, top_k, source)
+        if not results:
+            return f"Knowledge search: '{query}'\nNo matching passages found."
+
+        lines = [f"Knowledge search: '{query}' (top {len(results)})", "-" * 60]
+        for rank, (score, path, chunk) in enumerate(results, 1):
+            if path.startswith(KNOWLEDGE_DIR + os.sep):
+                display = os.path.join('roots', 'knowledge', os.path.relpath(path, KNOWLEDGE_DIR))
+            else:
+                display = os.path.relpath(path, project_root)
+            text = chunk['text']
+            if len(text) > MAX_PASSAGE_CHARS:
+                text = text[:MAX_PASSAGE_CHARS] + " …"
+            lines.append(f"[{rank}] {display}:{chunk['line']}  {chunk['title'] or '(no heading)'}  (score {score:.2f})")
+            lines.append(text)
+            lines.append("")
+        return "\n".join(lines).rstrip()
@@ -0,0 +1,64 @@
+from crewai.tools import BaseTool
+from typing import Type
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+from roots.project import get_project_root
+
+MAX_DETAIL_CHARS = 400
+
+
+class PastFindingsInput(BaseModel):
+    """Input schema for PastFindingsTool."""
+    query: str = Field(
+        default="",
+        description="What to look for, in Japanese or English (e.g., 'RLS ポリシー', 'useFacilityData 分割')"
+    )
+    file: str = Field(
+        default="",
+        description="Only return findings on files whose path contains this text (e.g., 'src/hooks/', 'AuthContext'). Empty = all files."
+    )
+    top_k: int = Field(
+        default=10,
+        description="Number of findings to return"
+    )
+
+
+class PastFindingsTool(BaseTool):
+    name: str = "Search Past Findings"
+    description: str = (
+        "Searches the findings of previous audits of this project (severity, category, file, "
+        "title, detail, and which task reported them). Findings on files that changed since "
+        "they were recorded are dropped, so every result still applies to the current code. "
+        "Check here before re-investigating a file or topic, and build on what was found."
+    )
+    args_schema: Type[BaseModel] = PastFindingsInput
+
+    def _run(self, query: str = "", file: str = "", top_k: int = 10) -> str:
+        from roots.memory import open_memory
+
+        if not query.strip() and not file.strip():
+            return "Error: Provide a query or a file."
+        top_k = max(1, min(top_k, 30))
+
+        results = open_memory(get_project_root()).search(query, file.strip(), top_k)
+        label = " ".join(part for part in (f"'{query}'" if query else "", f"file~'{file}'" if file else "") if part)
+        if not results:
+            return f"Past findings: {label}\nNo matching findings from previous audits."
+
+        lines = [f"Past findings: {label} ({len(results)})", "-" * 60]
+        for rank, r in enumerate(results, 1):
+            seen = datetime.fromtimestamp(r['last_seen']).strftime('%Y-%m-%d')
+            commit = f" @{r['commit_id'][:8]}" if r['commit_id'] else ""
+            location = f" {r['file']}" if r['file'] else ""
+            severity = f"[{r['severity']}] " if r['severity'] else ""
+            detail = r['detail']
+            if len(detail) > MAX_DETAIL_CHARS:
+                detail = detail[:MAX_DETAIL_CHARS] + " …"
+            lines.append(
+                f"[{rank}] {severity}{r['topic']}{location} — {r['title']}"
+                f"  ({r['task']}, {seen}{commit}, seen {r['seen']}x)"
+            )
+            if detail:
+                lines.append(f"    {detail}")
+        return "\n".join(lines)
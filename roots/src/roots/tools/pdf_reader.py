@@ -0,0 +1,250 @@
+from crewai.tools import BaseTool
+from typing import List, Optional, Type
+from pydantic import BaseModel, Field
+import os
+import re
+import threading
+import unicodedata
+
+from roots.project import get_project_root
+from roots.state import cache_path, load_json, save_json
+from roots.tools.cache import cached, file_digest, track
+
+# Bump when the extraction changes (old caches are then ignored)
+PDF_CACHE_VERSION = 1
+DEFAULT_PAGES = 5
+MAX_OUTPUT_CHARS = 15000
+MAX_RESULT_PAGES = 10
+MAX_SNIPPETS_PER_PAGE = 3
+SNIPPET_CONTEXT_CHARS = 90
+
+# PDFium is not thread-safe; agents call tools from several threads
+_PDFIUM_LOCK = threading.Lock()
+_PAGE_SPEC = re.compile(r'^(\d+)?\s*(?:-\s*(\d+)?)?$')
+
+
+def _write_text(path: str, text: str):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+class PdfText:
+    """
+    The text layer of a PDF, extracted page by page with pypdfium2 and cached
+    under cache_dir()/pdf/ by (content hash, page number).
+
+    Only the pages a call needs are extracted; a search extracts each missing page
+    once, and every later call reads the cached text without opening the PDF.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.directory = os.path.dirname(
+            cache_path('pdf', f"v{PDF_CACHE_VERSION}", file_digest(path), 'info.json')
+        )
+
+    def page_count(self) -> int:
+        info_file = os.path.join(self.directory, 'info.json')
+        info = load_json(info_file, default=None)
+        if not isinstance(info, dict):
+            import pypdfium2
+
+            with _PDFIUM_LOCK:
+                document = pypdfium2.PdfDocument(self.path)
+                try:
+                    info = {'pages': len(document)}
+                finally:
+                    document.close()
+            save_json(info_file, info)
+        return info['pages']
+
+    def pages(self, numbers: List[int]) -> List[str]:
+        """Text of the given 1-based pages (extracting only those not cached yet)."""
+        texts = {}
+        missing = []
+        for number in numbers:
+            try:
+                with open(os.path.join(self.directory, f"{number}.txt"), 'r', encoding='utf-8') as f:
+                    texts[number] = f.read()
+            except OSError:
+                missing.append(number)
+        if missing:
+            import pypdfium2
+
+            with _PDFIUM_LOCK:
+                document = pypdfium2.PdfDocument(self.path)
+                try:
+                    for number in missing:
+                        page = document[number - 1]
+                        text_page = page.get_textpage()
+                        try:
+                            text = text_page.get_text_range().replace('\r\n', '\n').replace('\r', '\n')
+                        finally:
+                            text_page.close()
+                            page.close()
+                        texts[number] = text
+                        _write_text(os.path.join(self.directory, f"{number}.txt"), text)
+                finally:
+                    document.close()
+        return [texts[number] for number in numbers]
+
+
+def parse_pages(spec: str, count: int) -> Optional[List[int]]:
+    """'3', '2-5', '1,4,7-9', '10-' -> page numbers within 1..count (None if malformed)."""
+    numbers: List[int] = []
+    for part in spec.replace('、', ',').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        match = _PAGE_SPEC.match(part)
+        if match is None or not (match.group(1) or match.group(2)):
+            return None
+        first = int(match.group(1) or 1)
+        last = int(match.group(2) or count) if '-' in part else first
+        numbers.extend(n for n in range(max(first, 1), min(last, count) + 1) if n not in numbers)
+    return numbers
+
+
+def format_pages(numbers: List[int]) -> str:
+    """Inverse of parse_pages: [5, 7, 8, 9, 40] -> '5,7-9,40' (consecutive runs only)."""
+    parts: List[str] = []
+    first = last = None
+    for n in numbers + [None]:
+        if last is not None and n == last + 1:
+            last = n
+            continue
+        if first is not None:
+            parts.append(str(first) if first == last else f"{first}-{last}")
+        first = last = n
+    return ",".join(parts)
+
+
+def _keyword_pattern(keyword: str) -> re.Pattern:
+    """Match a keyword across the line breaks and spaces PDF extraction puts inside phrases."""
+    characters = [re.escape(c) for c in unicodedata.normalize('NFKC', keyword) if not c.isspace()]
+    return re.compile(r'\s*'.join(characters), re.IGNORECASE)
+
+
+def _snippets(text: str, patterns: List[re.Pattern]) -> List[str]:
+    text = unicodedata.normalize('NFKC', text)
+    snippets = []
+    last_end = -1
+    hits = sorted(m.span() for pattern in patterns for m in pattern.finditer(text))
+    for start, end in hits:
+        if start < last_end or len(snippets) >= MAX_SNIPPETS_PER_PAGE:
+            continue
+        begin = max(0, start - SNIPPET_CONTEXT_CHARS)
+        last_end = min(len(text), end + SNIPPET_CONTEXT_CHARS)
+        snippet = re.sub(r'\s+', ' ', text[begin:last_end]).strip()
+        snippets.append(("…" if begin else "") + snippet + ("…" if last_end < len(text) else ""))
+    return snippets
+
+
+class PdfReaderInput(BaseModel):
+    """Input schema for PdfReaderTool."""
+    file_path: str = Field(
+        ...,
+        description="Path to a PDF relative to project root (e.g., 'reference-forms/変更届注意事項.pdf')"
+    )
+    pages: str = Field(
+        default="",
+        description="Pages to read or search, e.g. '3', '2-5', '1,4,7-9', '10-'. Empty = first pages (or all pages when searching)."
+    )
+    query: str = Field(
+        default="",
+        description="Keywords to find (all must appear on the page), e.g. '人員配置 基準'. Returns matching pages with excerpts instead of full text."
+    )
+
+
+class PdfReaderTool(BaseTool):
+    name: str = "Read PDF"
+    description: str = (
+        "Extracts the text of PDFs in the kidos project (reference-forms/, unei/, ...) page by page. "
+        "Read a page range, or search for keywords to get the matching pages with excerpts, "
+        "so you can cite the page of a clause without reading the whole document. "
+        "Use it instead of Read File, which cannot decode PDFs."
+    )
+    args_schema: Type[BaseModel] = PdfReaderInput
+
+    @cached(path_arg='file_path')
+    def _run(self, file_path: str, pages: str = "", query: str = "") -> str:
+        project_root = get_project_root()
+        full_path = file_path if os.path.isabs(file_path) else os.path.join(project_root, file_path)
+        real_path = os.path.realpath(full_path)
+        if not real_path.startswith(os.path.realpath(project_root)):
+            return f"Error: Access denied. Path must be within {project_root}"
+        if not os.path.isfile(real_path):
+            return f"Error: File not found: {file_path}"
+        if not real_path.lower().endswith('.pdf'):
+            return f"Error: {file_path} is not a PDF. Use the Read File tool instead."
+
+        try:
+            track(real_path)
+            document = PdfText(real_path)
+            count = document.page_count()
+            if pages.strip():
+                numbers = parse_pages(pages, count)
+                if numbers is None:
+                    return f"Error: Invalid page range '{pages}'. Use e.g. '3', '2-5', '1,4,7-9'."
+                if not numbers:
+                    return f"Error: No such pages in {file_path} ({count} pages)."
+            elif query.strip():
+                numbers = list(range(1, count + 1))
+            else:
+                numbers = list(range(1, min(count, DEFAULT_PAGES) + 1))
+
+            if query.strip():
+                return self._search(file_path, count, document, numbers, query)
+            return self._read(file_path, count, document, numbers, bool(pages.strip()))
+        except Exception as e:
+            return f"Error reading PDF: {str(e)}"
+
+    @staticmethod
+    def _read(file_path: str, count: int, document: PdfText, numbers: List[int], explicit: bool) -> str:
+        lines = [f"PDF: {file_path} ({count} pages)", "-" * 60]
+        size = 0
+        shown = 0
+        for number, text in zip(numbers, document.pages(numbers)):
+            text = text.strip() or "(no text layer on this page; it is probably a scanned image)"
+            if size and size + len(text) > MAX_OUTPUT_CHARS:
+                break
+            lines += [f"--- page {number} ---", text]
+            size += len(text)
+            shown += 1
+        remaining = numbers[shown:]
+        if remaining:
+            lines.append(f"\n... (output limit reached; continue with pages='{format_pages(remaining)}')")
+        elif not explicit and numbers[-1] < count:
+            lines.append(f"\n... (pages {numbers[-1] + 1}-{count} not shown; use pages or query)")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _search(file_path: str, count: int, document: PdfText, numbers: List[int], query: str) -> str:
+        patterns = [_keyword_pattern(k) for k in query.split()]
+        matches = []
+        empty = 0
+        for number, text in zip(numbers, document.pages(numbers)):
+            if not text.strip():
+                empty += 1
+                continue
+            normalized = unicodedata.normalize('NFKC', text)
+            counts = [len(pattern.findall(normalized)) for pattern in patterns]
+            if all(counts):
+                matches.append((sum(counts), number, text))
+
+        header = f"PDF search: '{query}' in {file_path} ({len(numbers)} of {count} pages searched)"
+        lines = [header, f"Pages with all keywords: {len(matches)}", "-" * 60]
+        if empty:
+            lines.insert(1, f"({empty} pages have no text layer and could not be searched)")
+        if not matches:
+            return "\n".join(lines + ["No matches found."])
+        matches.sort(key=lambda m: (-m[0], m[1]))
+        for hits, number, text in matches[:MAX_RESULT_PAGES]:
+            lines.append(f"[page {number}] {hits} hits")
+            lines.extend(f"  {snippet}" for snippet in _snippets(text, patterns))
+        if len(matches) > MAX_RESULT_PAGES:
+            others = sorted(m[1] for m in matches[MAX_RESULT_PAGES:])
+            lines.append(f"\nAlso on pages: {', '.join(map(str, others))}")
+        return "\n".join(lines)
@@ -4,7 +4,7 @@ from pydantic import BaseModel, Field
 import subprocess
 import os
 
-PROJECT_ROOT = "/Users/inu/Desktop/kidos"
+from roots.project import get_project_root
 
 # Allowed command prefixes for safety
 ALLOWED_PREFIXES = [
@@ -77,7 +77,7 @@ class ShellRunnerTool(BaseTool):
                 capture_output=True,
                 text=True,
                 timeout=timeout,
-                cwd=PROJECT_ROOT,
+                cwd=get_project_root(),
                 env={**os.environ, 'NODE_ENV': 'production'}
             )
 
@@ -0,0 +1,302 @@
+from crewai.tools import BaseTool
+from typing import Iterator, List, Optional, Tuple, Type
+from pydantic import BaseModel, Field
+import datetime
+import json
+import os
+import tempfile
+
+from roots.project import get_project_root
+from roots.state import cache_path, load_json, save_json
+from roots.tools.cache import cached, file_digest, track
+
+# Bump when the parsed format changes (old caches are then ignored)
+SHEET_CACHE_VERSION = 1
+SPREADSHEET_EXTENSIONS = {'.xlsx', '.xlsm', '.xls'}
+MAX_ROWS = 500
+MAX_CELL_CHARS = 120
+MAX_OUTPUT_CHARS = 20000
+# The row file's byte offset is recorded every this many rows, so a range deep in a sheet is a seek
+OFFSET_EVERY_ROWS = 1000
+
+
+def _cell_text(value) -> str:
+    """One cell as compact text ('' for empty)."""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, datetime.datetime):
+        return value.date().isoformat() if value.time() == datetime.time() else value.isoformat(' ')
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else f"{value:.10g}"
+    text = str(value).strip().replace('\r\n', '\n').replace('\n', ' / ')
+    return text if len(text) <= MAX_CELL_CHARS else text[:MAX_CELL_CHARS - 1] + '…'
+
+
+def _column_letter(index: int) -> str:
+    """1 -> A, 27 -> AA."""
+    letters = ''
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _xlsx_sheets(path: str) -> List[str]:
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+
+
+def _xlsx_rows(path: str, index: int) -> Iterator[Tuple[int, List[list]]]:
+    """Stream (row number, [[column, text], ...]) of the non-empty rows (read-only mode)."""
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[index]
+        for row_number, row in enumerate(sheet.iter_rows(values_only=True), 1):
+            cells = [[column, _cell_text(value)] for column, value in enumerate(row, 1)]
+            cells = [cell for cell in cells if cell[1]]
+            if cells:
+                yield row_number, cells
+    finally:
+        workbook.close()
+
+
+def _xls_open(path: str):
+    import xlrd
+
+    # on_demand: sheets are parsed only when requested
+    return xlrd, xlrd.open_workbook(path, on_demand=True)
+
+
+def _xls_sheets(path: str) -> List[str]:
+    _, book = _xls_open(path)
+    try:
+        return book.sheet_names()
+    finally:
+        book.release_resources()
+
+
+def _xls_rows(path: str, index: int) -> Iterator[Tuple[int, List[list]]]:
+    xlrd, book = _xls_open(path)
+    try:
+        sheet = book.sheet_by_index(index)
+        for r in range(sheet.nrows):
+            cells = []
+            for c, cell in enumerate(sheet.row(r), 1):
+                value = cell.value
+                if cell.ctype == xlrd.XL_CELL_DATE:
+                    value = xlrd.xldate_as_datetime(value, book.datemode)
+                elif cell.ctype == xlrd.XL_CELL_BOOLEAN:
+                    value = bool(value)
+                text = _cell_text(value)
+                if text:
+                    cells.append([c, text])
+            if cells:
+                yield r + 1, cells
+        book.unload_sheet(index)
+    finally:
+        book.release_resources()
+
+
+class ParsedWorkbook:
+    """
+    A workbook converted once into per-sheet row files under cache_dir()/sheets/,
+    keyed by the file's content hash.
+
+    Sheets are streamed (openpyxl read-only mode, xlrd on demand) straight into a
+    JSON-lines file with one non-empty row per line, so neither parsing nor later
+    reads hold a whole sheet in memory. Sparse byte offsets let a read start near
+    the requested rows. Unchanged files reuse the cache across runs
+    and checkouts; a changed file gets a new hash and is parsed again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.legacy = path.lower().endswith('.xls')
+        self.directory = os.path.dirname(
+            cache_path('sheets', f"v{SHEET_CACHE_VERSION}", file_digest(path), 'workbook.json')
+        )
+
+    def sheets(self) -> List[str]:
+        index_file = os.path.join(self.directory, 'workbook.json')
+        names = load_json(index_file, default=None)
+        if not isinstance(names, list):
+            names = _xls_sheets(self.path) if self.legacy else _xlsx_sheets(self.path)
+            save_json(index_file, names)
+        return names
+
+    def _parse(self, index: int) -> dict:
+        """Stream one sheet into its row file and return its size."""
+        rows_file = os.path.join(self.directory, f"{index}.jsonl")
+        meta = {'rows': 0, 'columns': 0, 'cells': 0, 'offsets': []}
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                rows = _xls_rows(self.path, index) if self.legacy else _xlsx_rows(self.path, index)
+                for count, (row_number, cells) in enumerate(rows):
+                    if count % OFFSET_EVERY_ROWS == 0:
+                        meta['offsets'].append([row_number, f.tell()])
+                    f.write(json.dumps([row_number, cells], ensure_ascii=False).encode('utf-8') + b"\n")
+                    meta['rows'] = row_number
+                    meta['columns'] = max(meta['columns'], cells[-1][0])
+                    meta['cells'] += len(cells)
+            os.replace(tmp_path, rows_file)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        save_json(os.path.join(self.directory, f"{index}.json"), meta)
+        return meta
+
+    def sheet_meta(self, index: int) -> dict:
+        meta = load_json(os.path.join(self.directory, f"{index}.json"), default=None)
+        if not isinstance(meta, dict) or 'offsets' not in meta or not os.path.exists(os.path.join(self.directory, f"{index}.jsonl")):
+            meta = self._parse(index)
+        return meta
+
+    def rows(self, index: int, min_row: int = 1, max_row: Optional[int] = None,
+             min_col: int = 1, max_col: Optional[int] = None) -> Iterator[Tuple[int, List[list]]]:
+        """Non-empty rows in the range, read line by line from the cache."""
+        meta = self.sheet_meta(index)
+        start = 0
+        for row_number, offset in meta['offsets']:
+            if row_number > min_row:
+                break
+            start = offset
+        with open(os.path.join(self.directory, f"{index}.jsonl"), 'rb') as f:
+            f.seek(start)
+            for line in f:
+                # The row number leads the line: skip rows without decoding them
+                row_number = int(line[1:line.index(b',')])
+                if row_number < min_row:
+                    continue
+                if max_row is not None and row_number > max_row:
+                    break
+                cells = json.loads(line)[1]
+                cells = [cell for cell in cells
+                         if cell[0] >= min_col and (max_col is None or cell[0] <= max_col)]
+                if cells:
+                    yield row_number, cells
+
+
+def parse_range(cell_range: str) -> Tuple[int, Optional[int], int, Optional[int]]:
+    """'A1:H40', 'B3', 'A:F' or '5:20' -> (min_row, max_row, min_col, max_col)."""
+    from openpyxl.utils.cell import range_boundaries
+
+    min_col, min_row, max_col, max_row = range_boundaries(cell_range.strip().upper().replace('$', ''))
+    return min_row or 1, max_row, min_col or 1, max_col
+
+
+class SpreadsheetReaderInput(BaseModel):
+    """Input schema for SpreadsheetReaderTool."""
+    file_path: str = Field(
+        ...,
+        description="Path to an .xlsx/.xlsm/.xls file relative to project root (e.g., 'reference-forms/付表.xlsx')"
+    )
+    sheet: str = Field(
+        default="",
+        description="Sheet name or 1-based sheet number. Empty = first sheet."
+    )
+    cell_range: str = Field(
+        default="",
+        description="Cells to read, e.g. 'A1:H40', 'A:F' (columns), '5:20' (rows). Empty = whole sheet."
+    )
+    max_rows: int = Field(
+        default=100,
+        description="Maximum number of non-empty rows to return"
+    )
+
+
+class SpreadsheetReaderTool(BaseTool):
+    name: str = "Read Spreadsheet"
+    description: str = (
+        "Reads Excel workbooks (.xlsx, .xlsm and legacy .xls) in the kidos project, such as the "
+        "official forms in reference-forms/ and templates/. Lists the sheets with their size and "
+        "returns the non-empty cells of a sheet or cell range as compact rows "
+        "('12 | B=氏名 | D=職種'). Use it instead of Read File, which cannot decode spreadsheets."
+    )
+    args_schema: Type[BaseModel] = SpreadsheetReaderInput
+
+    @cached(path_arg='file_path')
+    def _run(self, file_path: str, sheet: str = "", cell_range: str = "", max_rows: int = 100) -> str:
+        project_root = get_project_root()
+        full_path = file_path if os.path.isabs(file_path) else os.path.join(project_root, file_path)
+        real_path = os.path.realpath(full_path)
+        if not real_path.startswith(os.path.realpath(project_root)):
+            return f"Error: Access denied. Path must be within {project_root}"
+        if not os.path.isfile(real_path):
+            return f"Error: File not found: {file_path}"
+        if os.path.splitext(real_path)[1].lower() not in SPREADSHEET_EXTENSIONS:
+            return f"Error: {file_path} is not a spreadsheet (.xlsx, .xlsm, .xls). Use the Read File tool instead."
+        max_rows = max(1, min(max_rows, MAX_ROWS))
+
+        try:
+            bounds = parse_range(cell_range) if cell_range.strip() else (1, None, 1, None)
+        except ValueError:
+            return f"Error: Invalid cell range '{cell_range}'. Use e.g. 'A1:H40', 'A:F' or '5:20'."
+
+        try:
+            track(real_path)
+            workbook = ParsedWorkbook(real_path)
+            names = workbook.sheets()
+            index = self._sheet_index(names, sheet)
+            if index is None:
+                return f"Error: Sheet '{sheet}' not found. Sheets: {', '.join(names)}"
+
+            lines = [f"Workbook: {file_path} ({len(names)} sheets)"]
+            for i, name in enumerate(names):
+                marker = '*' if i == index else ' '
+                lines.append(f" {marker}{i + 1}. {name}")
+            meta = workbook.sheet_meta(index)
+            label = f" {cell_range.strip().upper()}" if cell_range.strip() else ""
+            lines.append(
+                f"Sheet: {names[index]}{label} (used range A1:{_column_letter(meta['columns']) or 'A'}"
+                f"{meta['rows'] or 1}, {meta['cells']} non-empty cells)"
+            )
+            lines.append("-" * 60)
+
+            shown = 0
+            size = sum(len(line) + 1 for line in lines)
+            truncated = False
+            for row_number, cells in workbook.rows(index, *bounds):
+                if shown >= max_rows or size >= MAX_OUTPUT_CHARS:
+                    truncated = True
+                    break
+                line = f"{row_number:>5} | " + " | ".join(
+                    f"{_column_letter(column)}={text}" for column, text in cells
+                )
+                lines.append(line)
+                size += len(line) + 1
+                shown += 1
+        except Exception as e:
+            return f"Error reading spreadsheet: {str(e)}"
+
+        if shown == 0:
+            lines.append("(no non-empty cells in this range)")
+        if truncated:
+            lines.append(f"\n... (stopped after {shown} rows; use cell_range to read further)")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _sheet_index(names: List[str], sheet: str) -> Optional[int]:
+        sheet = sheet.strip()
+        if not sheet:
+            return 0 if names else None
+        if sheet in names:
+            return names.index(sheet)
+        lowered = [name.lower() for name in names]
+        if sheet.lower() in lowered:
+            return lowered.index(sheet.lower())
+        if sheet.isdigit() and 1 <= int(sheet) <= len(names):
+            return int(sheet) - 1
+        return None
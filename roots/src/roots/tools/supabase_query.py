@@ -4,7 +4,8 @@ from pydantic import BaseModel, Field
 import os
 import re
 
-PROJECT_ROOT = "/Users/inu/Desktop/kidos"
+from roots.project import get_project_root
+from roots.tools.cache import cached, track, tracked_walk
 
 
 class SupabaseSchemaInput(BaseModel):
@@ -35,6 +36,7 @@ class SupabaseSchemaExplorerTool(BaseTool):
     )
     args_schema: Type[BaseModel] = SupabaseSchemaInput
 
+    @cached()
     def _run(self, action: str, target: str = "") -> str:
         if action == "list_migrations":
             return self._list_migrations()
@@ -54,16 +56,17 @@ class SupabaseSchemaExplorerTool(BaseTool):
 
     def _list_migrations(self) -> str:
         """List all SQL migration files in the project."""
+        project_root = get_project_root()
         sql_files = []
 
-        for root, dirs, files in os.walk(PROJECT_ROOT):
+        for root, dirs, files in tracked_walk(project_root):
             # Skip non-relevant directories
             skip = {'.git', 'node_modules', '.next', '.venv', '__pycache__', 'roots'}
             dirs[:] = [d for d in dirs if d not in skip]
 
             for f in files:
                 if f.endswith('.sql'):
-                    rel_path = os.path.relpath(os.path.join(root, f), PROJECT_ROOT)
+                    rel_path = os.path.relpath(os.path.join(root, f), project_root)
                     sql_files.append(rel_path)
 
         sql_files.sort()
@@ -75,8 +78,9 @@ class SupabaseSchemaExplorerTool(BaseTool):
 
     def _read_migration(self, filename: str) -> str:
         """Read a specific migration file."""
+        project_root = get_project_root()
         # Search for the file
-        for root, dirs, files in os.walk(PROJECT_ROOT):
+        for root, dirs, files in tracked_walk(project_root):
             skip = {'.git', 'node_modules', '.next', '.venv', '__pycache__'}
             dirs[:] = [d for d in dirs if d not in skip]
 
@@ -84,9 +88,10 @@ class SupabaseSchemaExplorerTool(BaseTool):
                 if f == filename or filename in f:
                     filepath = os.path.join(root, f)
                     try:
+                        track(filepath)
                         with open(filepath, 'r', encoding='utf-8') as fh:
                             content = fh.read()
-                        rel_path = os.path.relpath(filepath, PROJECT_ROOT)
+                        rel_path = os.path.relpath(filepath, project_root)
                         return f"File: {rel_path}\n{'=' * 40}\n{content[:5000]}"
                     except Exception as e:
                         return f"Error reading {filepath}: {e}"
@@ -95,6 +100,7 @@ class SupabaseSchemaExplorerTool(BaseTool):
 
     def _find_table(self, table_name: str) -> str:
         """Find CREATE TABLE statements for a given table."""
+        project_root = get_project_root()
         if not table_name:
             return "Error: Please provide a table name to search for."
 
@@ -104,7 +110,7 @@ class SupabaseSchemaExplorerTool(BaseTool):
             re.IGNORECASE
         )
 
-        for root, dirs, files in os.walk(PROJECT_ROOT):
+        for root, dirs, files in tracked_walk(project_root):
             skip = {'.git', 'node_modules', '.next', '.venv', '__pycache__'}
             dirs[:] = [d for d in dirs if d not in skip]
 
@@ -112,10 +118,11 @@ class SupabaseSchemaExplorerTool(BaseTool):
                 if f.endswith('.sql'):
                     filepath = os.path.join(root, f)
                     try:
+                        track(filepath)
                         with open(filepath, 'r', encoding='utf-8') as fh:
                             content = fh.read()
                         if pattern.search(content):
-                            rel_path = os.path.relpath(filepath, PROJECT_ROOT)
+                            rel_path = os.path.relpath(filepath, project_root)
                             # Extract the CREATE TABLE block
                             for match in pattern.finditer(content):
                                 start = match.start()
@@ -134,6 +141,7 @@ class SupabaseSchemaExplorerTool(BaseTool):
 
     def _find_rls(self, table_name: str) -> str:
         """Find RLS policies for a table."""
+        project_root = get_project_root()
         if not table_name:
             return "Error: Please provide a table name."
 
@@ -143,7 +151,7 @@ class SupabaseSchemaExplorerTool(BaseTool):
             re.IGNORECASE
         )
 
-        for root, dirs, files in os.walk(PROJECT_ROOT):
+        for root, dirs, files in tracked_walk(project_root):
             skip = {'.git', 'node_modules', '.next', '.venv', '__pycache__'}
             dirs[:] = [d for d in dirs if d not in skip]
 
@@ -151,10 +159,11 @@ class SupabaseSchemaExplorerTool(BaseTool):
                 if f.endswith('.sql'):
                     filepath = os.path.join(root, f)
                     try:
+                        track(filepath)
                         with open(filepath, 'r', encoding='utf-8') as fh:
                             for line_num, line in enumerate(fh, 1):
                                 if pattern.search(line):
-                                    rel_path = os.path.relpath(filepath, PROJECT_ROOT)
+                                    rel_path = os.path.relpath(filepath, project_root)
                                     results.append(f"{rel_path}:{line_num}: {line.strip()}")
                     except Exception:
                         continue
@@ -165,6 +174,7 @@ class SupabaseSchemaExplorerTool(BaseTool):
 
     def _analyze_types(self, type_name: str) -> str:
         """Find TypeScript type/interface definitions."""
+        project_root = get_project_root()
         if not type_name:
             return "Error: Please provide a type name."
 
@@ -174,11 +184,11 @@ class SupabaseSchemaExplorerTool(BaseTool):
             re.IGNORECASE
         )
 
-        types_dir = os.path.join(PROJECT_ROOT, 'src', 'types')
-        search_dirs = [types_dir, os.path.join(PROJECT_ROOT, 'src')]
+        types_dir = os.path.join(project_root, 'src', 'types')
+        search_dirs = [types_dir, os.path.join(project_root, 'src')]
 
         for search_dir in search_dirs:
-            for root, dirs, files in os.walk(search_dir):
+            for root, dirs, files in tracked_walk(search_dir):
                 skip = {'node_modules', '.next', '__pycache__'}
                 dirs[:] = [d for d in dirs if d not in skip]
 
@@ -186,6 +196,7 @@ class SupabaseSchemaExplorerTool(BaseTool):
                     if f.endswith(('.ts', '.tsx')):
                         filepath = os.path.join(root, f)
                         try:
+                            track(filepath)
                             with open(filepath, 'r', encoding='utf-8') as fh:
                                 content = fh.read()
                             for match in pattern.finditer(content):
@@ -204,7 +215,7 @@ class SupabaseSchemaExplorerTool(BaseTool):
                                             break
 
                                 block = content[line_start:end]
-                                rel_path = os.path.relpath(filepath, PROJECT_ROOT)
+                                rel_path = os.path.relpath(filepath, project_root)
                                 results.append(f"In {rel_path}:\n{block[:2000]}\n")
                         except Exception:
                             continue
@@ -0,0 +1,398 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from crewai.events.event_bus import crewai_event_bus
+from crewai.events.types.task_events import (
+    TaskCompletedEvent,
+    TaskFailedEvent,
+    TaskStartedEvent,
+)
+from crewai.hooks.llm_hooks import (
+    register_after_llm_call_hook,
+    register_before_llm_call_hook,
+    unregister_after_llm_call_hook,
+    unregister_before_llm_call_hook,
+)
+from crewai.hooks.tool_hooks import (
+    register_after_tool_call_hook,
+    register_before_tool_call_hook,
+    unregister_after_tool_call_hook,
+    unregister_before_tool_call_hook,
+)
+
+from roots.state import state_path
+from roots.tools.cache import consume_last_hit
+from roots.usage import start as start_usage, stop as stop_usage
+
+# OTLP/JSON の列挙値
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_CODE_OK = 1
+STATUS_CODE_ERROR = 2
+
+MAX_ARGS_LENGTH = 500
+
+_active: Optional['Tracer'] = None
+_event_handlers_registered = False
+
+
+def default_trace_path() -> str:
+    return state_path('traces', f"trace-{datetime.now().strftime('%Y%m%d-%H%M%S')}.jsonl")
+
+
+def _span_id(*parts: Any) -> str:
+    """タスク ID 等から決定的なスパン ID を作る（イベントの到着順に依存しないため）。"""
+    return hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:16]
+
+
+def _attribute(key: str, value: Any) -> dict:
+    if isinstance(value, bool):
+        typed = {'boolValue': value}
+    elif isinstance(value, int):
+        typed = {'intValue': str(value)}
+    elif isinstance(value, float):
+        typed = {'doubleValue': value}
+    else:
+        typed = {'stringValue': str(value)}
+    return {'key': key, 'value': typed}
+
+
+def _event_time_ns(event) -> int:
+    return int(event.timestamp.timestamp() * 1_000_000_000)
+
+
+class Tracer:
+    """
+    タスク・エージェントのステップ・ツール呼び出し・LLM リクエストをスパンとして記録する。
+
+    スパンは OTLP/JSON の Span と同じ形で 1 行ずつ JSONL ファイルに追記される。
+    タスクのスパンは crewAI のイベントから、ツールと LLM のスパンは
+    実行スレッド上で同期的に呼ばれる crewAI のフックから作る。
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_trace_path()
+        self.trace_id = uuid.uuid4().hex
+        self.root_span_id = _span_id(self.trace_id, 'run')
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._open: Dict[str, dict] = {}
+        self._finished: List[dict] = []
+        self._current_step: Dict[str, str] = {}
+        self._file = None
+        self._started_ns = 0
+
+    # === lifecycle ===
+
+    def start(self) -> 'Tracer':
+        global _active
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._started_ns = time.time_ns()
+        _register_event_handlers()
+        register_before_tool_call_hook(self._before_tool)
+        register_after_tool_call_hook(self._after_tool)
+        register_before_llm_call_hook(self._before_llm)
+        register_after_llm_call_hook(self._after_llm)
+        _active = self
+        return self
+
+    def stop(self):
+        global _active
+        crewai_event_bus.flush()
+        unregister_before_tool_call_hook(self._before_tool)
+        unregister_after_tool_call_hook(self._after_tool)
+        unregister_before_llm_call_hook(self._before_llm)
+        unregister_after_llm_call_hook(self._after_llm)
+        if _active is self:
+            _active = None
+
+        now = time.time_ns()
+        with self._lock:
+            # フック／イベントが対にならなかったスパン（例外で中断された LLM 呼び出し等）も残す
+            for span in list(self._open.values()):
+                self._finish_locked(span, now, STATUS_CODE_ERROR)
+        self._finish(self._new_span('roots.run', None, self._started_ns,
+                                    span_id=self.root_span_id), now)
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    # === span bookkeeping ===
+
+    def _new_span(self, name: str, parent_id: Optional[str], start_ns: int,
+                  span_id: Optional[str] = None, kind: int = SPAN_KIND_INTERNAL,
+                  attributes: Optional[Dict[str, Any]] = None) -> dict:
+        return {
+            'traceId': self.trace_id,
+            'spanId': span_id or uuid.uuid4().hex[:16],
+            'parentSpanId': parent_id or '',
+            'name': name,
+            'kind': kind,
+            'startTimeUnixNano': start_ns,
+            'endTimeUnixNano': None,
+            'attributes': dict(attributes or {}),
+            'status': {'code': STATUS_CODE_OK},
+        }
+
+    def _open_span(self, span: dict) -> dict:
+        with self._lock:
+            existing = self._open.get(span['spanId'])
+            if existing is not None:
+                # 終了イベントが先に届いていた場合は開始時刻だけ補う
+                existing['startTimeUnixNano'] = span['startTimeUnixNano']
+                existing['attributes'] = {**span['attributes'], **existing['attributes']}
+                if existing['endTimeUnixNano'] is not None:
+                    self._write_locked(self._open.pop(span['spanId']))
+                return existing
+            self._open[span['spanId']] = span
+            return span
+
+    def _finish(self, span: dict, end_ns: int, status: int = STATUS_CODE_OK):
+        with self._lock:
+            self._finish_locked(span, end_ns, status)
+
+    def _finish_locked(self, span: dict, end_ns: int, status: int):
+        span['endTimeUnixNano'] = end_ns
+        span['status'] = {'code': status}
+        if span['startTimeUnixNano'] is None:
+            self._open[span['spanId']] = span
+            return
+        self._open.pop(span['spanId'], None)
+        self._write_locked(span)
+
+    def _write_locked(self, span: dict):
+        self._finished.append(span)
+        if self._file is None:
+            return
+        record = dict(span)
+        record['startTimeUnixNano'] = str(span['startTimeUnixNano'])
+        record['endTimeUnixNano'] = str(span['endTimeUnixNano'])
+        record['attributes'] = [_attribute(k, v) for k, v in span['attributes'].items()]
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def _parent_for(self, task) -> str:
+        if task is None:
+            return self.root_span_id
+        with self._lock:
+            return self._current_step.get(str(task.id), _span_id(self.trace_id, 'task', task.id))
+
+    def _stack(self, kind: str) -> list:
+        stacks = getattr(self._local, 'stacks', None)
+        if stacks is None:
+            stacks = self._local.stacks = defaultdict(list)
+        return stacks[kind]
+
+    # === task spans (crewAI events) ===
+
+    def on_task_started(self, event):
+        task = event.task
+        attributes = {'roots.task.name': task.name or ''}
+        if task.agent is not None:
+            attributes['roots.agent.role'] = task.agent.role.strip()
+        self._open_span(self._new_span(
+            f"task {task.name}", self.root_span_id, _event_time_ns(event),
+            span_id=_span_id(self.trace_id, 'task', task.id), attributes=attributes
+        ))
+
+    def on_task_finished(self, event, status: int):
+        task = event.task
+        span_id = _span_id(self.trace_id, 'task', task.id)
+        end_ns = _event_time_ns(event)
+        with self._lock:
+            step_id = self._current_step.pop(str(task.id), None)
+            step = self._open.get(step_id) if step_id else None
+            if step is not None:
+                self._finish_locked(step, end_ns, status)
+            span = self._open.get(span_id)
+            if span is None:
+                span = self._new_span(f"task {task.name}", self.root_span_id, None,
+                                      span_id=span_id,
+                                      attributes={'roots.task.name': task.name or ''})
+            self._finish_locked(span, end_ns, status)
+
+    # === agent steps / LLM spans (hooks) ===
+
+    def _before_llm(self, context):
+        now = time.time_ns()
+        task = context.task
+        if task is not None:
+            task_key = str(task.id)
+            with self._lock:
+                previous = self._open.get(self._current_step.get(task_key, ''))
+                if previous is not None:
+                    self._finish_locked(previous, now, STATUS_CODE_OK)
+            step = self._open_span(self._new_span(
+                'agent.step', _span_id(self.trace_id, 'task', task.id), now,
+                attributes={
+                    'roots.task.name': task.name or '',
+                    'roots.agent.step': context.iterations,
+                }
+            ))
+            with self._lock:
+                self._current_step[task_key] = step['spanId']
+
+        llm = context.llm
+        span = self._new_span(
+            'llm.request', self._parent_for(task), now, kind=SPAN_KIND_CLIENT,
+            attributes={
+                'gen_ai.request.model': getattr(llm, 'model', str(llm)),
+                'roots.task.name': getattr(task, 'name', '') or '',
+            }
+        )
+        self._open_span(span)
+        # 同じ LLM を並列タスクが共有するので、このスレッドの呼び出しの使用量だけを数える
+        counter = start_usage(llm) if hasattr(llm, '_track_token_usage_internal') else None
+        self._stack('llm').append((span, counter))
+        return None
+
+    def _after_llm(self, context):
+        stack = self._stack('llm')
+        if not stack:
+            return None
+        span, counter = stack.pop()
+        if counter is not None:
+            usage = stop_usage(counter)
+            span['attributes']['gen_ai.usage.input_tokens'] = usage['prompt_tokens']
+            span['attributes']['gen_ai.usage.output_tokens'] = usage['completion_tokens']
+        span['attributes']['roots.llm.response_chars'] = len(context.response or '')
+        self._finish(span, time.time_ns())
+        return None
+
+    # === tool spans (hooks) ===
+
+    def _before_tool(self, context):
+        consume_last_hit()
+        try:
+            args = json.dumps(context.tool_input, ensure_ascii=False, sort_keys=True)
+        except (TypeError, ValueError):
+            args = str(context.tool_input)
+        span = self._new_span(
+            f"tool {context.tool_name}", self._parent_for(context.task), time.time_ns(),
+            attributes={
+                'roots.tool.name': context.tool_name,
+                'roots.tool.args': args[:MAX_ARGS_LENGTH],
+                'roots.task.name': getattr(context.task, 'name', '') or '',
+            }
+        )
+        self._open_span(span)
+        self._stack('tool').append(span)
+        return None
+
+    def _after_tool(self, context):
+        stack = self._stack('tool')
+        if not stack:
+            return None
+        span = stack.pop()
+        result = context.tool_result if context.tool_result is not None else ''
+        span['attributes']['roots.tool.bytes'] = len(str(result).encode('utf-8'))
+        hit = consume_last_hit()
+        if hit is not None:
+            span['attributes']['roots.tool.cache_hit'] = hit
+        status = STATUS_CODE_ERROR if str(result).startswith('Error') else STATUS_CODE_OK
+        self._finish(span, time.time_ns(), status)
+        return None
+
+    # === summary ===
+
+    def totals(self) -> Dict[str, float]:
+        """ツール・LLM 呼び出しの回数と合計時間（秒）。並列実行分は重複して数える。"""
+        totals = {'tool_calls': 0, 'tool_seconds': 0.0, 'llm_calls': 0, 'llm_seconds': 0.0}
+        with self._lock:
+            spans = list(self._finished)
+        for span in spans:
+            seconds = (span['endTimeUnixNano'] - span['startTimeUnixNano']) / 1e9
+            if 'roots.tool.name' in span['attributes']:
+                totals['tool_calls'] += 1
+                totals['tool_seconds'] += seconds
+            elif span['name'] == 'llm.request':
+                totals['llm_calls'] += 1
+                totals['llm_seconds'] += seconds
+        return totals
+
+    def summary(self, top: int = 10) -> str:
+        with self._lock:
+            spans = list(self._finished)
+
+        def duration(span):
+            return (span['endTimeUnixNano'] - span['startTimeUnixNano']) / 1e9
+
+        tools = defaultdict(list)
+        tasks: Dict[str, dict] = {}
+        for span in spans:
+            attrs = span['attributes']
+            if 'roots.tool.name' in attrs:
+                tools[attrs['roots.tool.name']].append(span)
+            elif span['name'].startswith('task '):
+                tasks.setdefault(attrs.get('roots.task.name', ''), {}).update(seconds=duration(span))
+
+        for span in spans:
+            if span['name'] != 'llm.request':
+                continue
+            name = span['attributes'].get('roots.task.name', '')
+            stats = tasks.setdefault(name, {})
+            stats['llm_calls'] = stats.get('llm_calls', 0) + 1
+            stats['llm_seconds'] = stats.get('llm_seconds', 0.0) + duration(span)
+            stats['input_tokens'] = stats.get('input_tokens', 0) + span['attributes'].get('gen_ai.usage.input_tokens', 0)
+            stats['output_tokens'] = stats.get('output_tokens', 0) + span['attributes'].get('gen_ai.usage.output_tokens', 0)
+
+        lines = [f"Trace: {self.path}", "", "Slowest tools:"]
+        lines.append(f"  {'tool':<28} {'calls':>6} {'total s':>9} {'mean s':>8} {'max s':>8} {'KB out':>8} {'hits':>5}")
+        ranked = sorted(tools.items(), key=lambda kv: -sum(duration(s) for s in kv[1]))
+        for name, calls in ranked[:top]:
+            total = sum(duration(s) for s in calls)
+            size = sum(s['attributes'].get('roots.tool.bytes', 0) for s in calls) / 1024
+            hits = sum(1 for s in calls if s['attributes'].get('roots.tool.cache_hit'))
+            lines.append(
+                f"  {name:<28} {len(calls):>6} {total:>9.2f} {total / len(calls):>8.3f} "
+                f"{max(duration(s) for s in calls):>8.3f} {size:>8.1f} {hits:>5}"
+            )
+        if not tools:
+            lines.append("  (no tool calls)")
+
+        lines += ["", "Most expensive tasks:"]
+        lines.append(f"  {'task':<28} {'total s':>8} {'llm s':>8} {'calls':>6} {'in tok':>9} {'out tok':>8}")
+        ranked_tasks = sorted(
+            ((n, s) for n, s in tasks.items() if n),
+            key=lambda kv: (-(kv[1].get('input_tokens', 0) + kv[1].get('output_tokens', 0)),
+                            -kv[1].get('seconds', 0.0))
+        )
+        for name, stats in ranked_tasks[:top]:
+            lines.append(
+                f"  {name:<28} {stats.get('seconds', 0.0):>8.1f} {stats.get('llm_seconds', 0.0):>8.1f} "
+                f"{stats.get('llm_calls', 0):>6} {stats.get('input_tokens', 0):>9} {stats.get('output_tokens', 0):>8}"
+            )
+        if not ranked_tasks:
+            lines.append("  (no tasks)")
+        return "\n".join(lines)
+
+
+def _register_event_handlers():
+    """crewAI のイベントバスにはハンドラ解除の API がないため、一度だけ登録して有効な Tracer に転送する。"""
+    global _event_handlers_registered
+    if _event_handlers_registered:
+        return
+    _event_handlers_registered = True
+
+    @crewai_event_bus.on(TaskStartedEvent)
+    def _task_started(source, event):
+        if _active is not None and event.task is not None:
+            _active.on_task_started(event)
+
+    @crewai_event_bus.on(TaskCompletedEvent)
+    def _task_completed(source, event):
+        if _active is not None and event.task is not None:
+            _active.on_task_finished(event, STATUS_CODE_OK)
+
+    @crewai_event_bus.on(TaskFailedEvent)
+    def _task_failed(source, event):
+        if _active is not None and event.task is not None:
+            _active.on_task_finished(event, STATUS_CODE_ERROR)
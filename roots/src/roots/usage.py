@@ -0,0 +1,81 @@
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from crewai.llms.base_llm import BaseLLM
+
+USAGE_KEYS = ('total_tokens', 'prompt_tokens', 'completion_tokens', 'successful_requests', 'cached_prompt_tokens')
+
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def innermost(llm: BaseLLM) -> BaseLLM:
+    """ScheduledLLM / CachedLLM / RecordingLLM のラップを外した、実際に応答を返す LLM。"""
+    while getattr(llm, 'inner', None) is not None:
+        llm = llm.inner
+    return llm
+
+
+def _install(llm: BaseLLM):
+    """
+    llm が使用量を加算するたびに、その加算分を呼び出したスレッドの計測中の counter にも足す。
+
+    crewAI の LLM（各プロバイダ実装を含む）は応答ごとに _track_token_usage_internal で
+    _token_usage に加算するので、そこを差し替える。_token_usage 全体の前後の差を取ると、
+    同じ LLM を共有する並列タスクの使用量まで混ざる。
+    """
+    original = llm._track_token_usage_internal
+
+    def track(usage_data):
+        with _lock:
+            before = dict(llm._token_usage)
+            original(usage_data)
+            delta = {k: llm._token_usage.get(k, 0) - before.get(k, 0) for k in USAGE_KEYS}
+        for counter in getattr(_local, 'counters', ()):
+            for k, v in delta.items():
+                counter[k] += v
+
+    llm._track_token_usage_internal = track
+    llm._roots_usage_tracked = True
+
+
+def start(llm: BaseLLM) -> Dict[str, int]:
+    """このスレッドで llm（ラッパーならラップ先）が使うトークン数を数え始め、counter を返す。"""
+    target = innermost(llm)
+    with _lock:
+        if not getattr(target, '_roots_usage_tracked', False):
+            _install(target)
+    counter = dict.fromkeys(USAGE_KEYS, 0)
+    if not hasattr(_local, 'counters'):
+        _local.counters = []
+    _local.counters.append(counter)
+    return counter
+
+
+def stop(counter: Dict[str, int]) -> Dict[str, int]:
+    """start() で始めた計測を終え、数えた使用量を返す。"""
+    counters = getattr(_local, 'counters', [])
+    for i, active in enumerate(counters):
+        if active is counter:
+            del counters[i]
+            break
+    return counter
+
+
+@contextmanager
+def measure(llm: BaseLLM) -> Iterator[Dict[str, int]]:
+    """with ブロック内でこのスレッドが llm に行った呼び出しの使用量（ブロックを抜けた後に確定）。"""
+    counter = start(llm)
+    try:
+        yield counter
+    finally:
+        stop(counter)
+
+
+def add(llm: BaseLLM, usage: Dict[str, int]):
+    """ラッパー自身の _token_usage（get_token_usage_summary() の集計元）に 1 回分の使用量を足す。"""
+    with _lock:
+        for k, v in usage.items():
+            if k in llm._token_usage:
+                llm._token_usage[k] += v